@@ -2,13 +2,25 @@
 app.py
 Gemini Prompt Generatorアプリケーションの起動およびUI統合機能を提供するコンポーネントです。
 """
+import time
+
+# 起動時間の計測（--profile-startup）のため、他のモジュールより先に時刻を記録する
+IMPORT_START = time.perf_counter()
+
+import argparse
 import os
 import tkinter as tk
 
+from src.core.instrumentation import TRACE_ENV_VAR, instrumentation
+from src.core.startup_profiler import StartupProfiler
 from src.core.template_manager import TemplateManager  # インポートパスを更新
 from src.ui.app_menu import AppMenu
 from src.ui.app_settings import AppSettings
 from src.ui.app_ui_manager import AppUIManager
+from src.ui.stall_watchdog import DEFAULT_THRESHOLD_MS, WATCHDOG_ENV_VAR, StallWatchdog
+
+IMPORT_END = time.perf_counter()
+STARTUP_PROFILE_DIR = "startup_profile"
 
 
 class PromptGeneratorApp:
@@ -17,22 +29,25 @@ class PromptGeneratorApp:
     
     引数:
       master (tk.Widget): メインウィジェット
+      profiler (StartupProfiler): 起動時間の計測（省略時は計測しない）
        
     戻り値:
       なし
     """
 
-    def __init__(self, master):
+    def __init__(self, master, profiler=None):
         """
         コンストラクタ
         
         引数:
           master (tk.Widget): メインウィジェット
+          profiler (StartupProfiler): 起動時間の計測（省略時は計測しない）
           
         戻り値:
           なし
         """
         self.master = master
+        profiler = profiler or StartupProfiler(enabled=False)
         # アプリケーションのタイトル設定
         self.master.title("Image Prompt Word-Mixer ")
         # ウィンドウサイズの固定（リサイズ不可）
@@ -42,8 +57,9 @@ class PromptGeneratorApp:
         settings_dir = os.path.join(os.getcwd(), "settings")
 
         # settingsフォルダが存在しない場合は作成
-        if not os.path.exists(settings_dir):
-            os.makedirs(settings_dir)
+        with profiler.phase("settings_dir"):
+            if not os.path.exists(settings_dir):
+                os.makedirs(settings_dir)
 
         # 設定ファイルパス
         basic_prompts_path = os.path.join(settings_dir, "basic_prompts.json")
@@ -53,26 +69,120 @@ class PromptGeneratorApp:
 
         # テンプレートマネージャー初期化
         # プロンプト用JSONファイルを読み込み、データを管理するマネージャーを作成
-        self.template_manager = TemplateManager(basic_prompts_path, element_prompts_path)
+        with profiler.phase("template_manager"):
+            self.template_manager = TemplateManager(basic_prompts_path, element_prompts_path)
 
         # 設定クラス初期化
         # APIキーなどのアプリケーション設定を管理するクラスを初期化
-        self.app_settings = AppSettings(self.master, api_key_path)
+        with profiler.phase("app_settings"):
+            self.app_settings = AppSettings(self.master, api_key_path)
 
         # UIマネージャー初期化
         # アプリケーションのUIコンポーネントを生成・管理するクラスを初期化
-        self.ui_manager = AppUIManager(self.master, self.template_manager)
-        # アプリケーションアイコンを設定
-        self.ui_manager.set_icon()
+        with profiler.phase("ui_manager"):
+            self.ui_manager = AppUIManager(self.master, self.template_manager)
+            # アプリケーションアイコンを設定
+            self.ui_manager.set_icon()
 
         # メニュークラス初期化
         # アプリケーションのメニューバーを生成・管理するクラスを初期化
         # 各コンポーネントを連携させるために必要なオブジェクトを渡す
-        self.app_menu = AppMenu(self.master, self.template_manager, self.ui_manager,
-                                self.app_settings.open_api_key_dialog, settings_dir)
+        with profiler.phase("app_menu"):
+            self.app_menu = AppMenu(self.master, self.template_manager, self.ui_manager,
+                                    self.app_settings.open_api_key_dialog, settings_dir)
+
+        # ウィンドウを閉じる際に保留中のデータを書き込む
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """
+        ウィンドウを閉じる際の処理を行います。
+        保留中の変更を保存してからウィンドウを破棄します。
+        
+        引数:
+          なし
+          
+        戻り値:
+          なし
+        """
+        self.ui_manager.shutdown()
+        # トレース中であれば、保存処理の区間まで含めて書き出す
+        if instrumentation.tracing:
+            instrumentation.write_trace()
+        self.master.destroy()
+
+
+def parse_args(argv=None):
+    """
+    コマンドライン引数を解析します。
+    
+    引数:
+      argv (list): 引数のリスト（省略時は sys.argv）
+      
+    戻り値:
+      argparse.Namespace: 解析結果
+    """
+    parser = argparse.ArgumentParser(description="Image Prompt Word-Mixer")
+    parser.add_argument("--watchdog",
+                        metavar="MS",
+                        type=int,
+                        nargs="?",
+                        const=DEFAULT_THRESHOLD_MS,
+                        default=os.environ.get(WATCHDOG_ENV_VAR) or None,
+                        help="画面がこの時間（ミリ秒）以上固まった時に、原因の関数をログに出力する"
+                        f"（環境変数 {WATCHDOG_ENV_VAR} でも指定可）")
+    parser.add_argument("--profile-startup",
+                        metavar="DIR",
+                        nargs="?",
+                        const=STARTUP_PROFILE_DIR,
+                        help="起動の段階ごとの時間・cProfile・モジュールの読み込み時間を DIR に書き出す"
+                        f"（省略時は {STARTUP_PROFILE_DIR}）")
+    parser.add_argument("--exit-after-startup",
+                        action="store_true",
+                        help="起動が完了したら終了する（起動時間の計測用）")
+    parser.add_argument("--trace",
+                        metavar="PATH",
+                        default=os.environ.get(TRACE_ENV_VAR),
+                        help=f"計測した区間を Chrome のトレース形式で書き出す（環境変数 {TRACE_ENV_VAR} でも指定可）")
+    return parser.parse_args(argv)
+
+
+def finish_startup(app, profiler, args, idle_start):
+    """
+    起動後に初めてイベントループが空いた時に呼ばれ、起動時間の計測結果を書き出します。
+    
+    引数:
+      app (PromptGeneratorApp): アプリケーション
+      profiler (StartupProfiler): 起動時間の計測
+      args (argparse.Namespace): コマンドライン引数
+      idle_start (float): イベントループを開始する直前の時刻（time.perf_counter の値）
+      
+    戻り値:
+      なし
+    """
+    profiler.add_phase("first_idle", time.perf_counter() - idle_start)
+    profiler.stop_profile()
+    if args.profile_startup:
+        print(profiler.report())
+        profiler.write(args.profile_startup,
+                       import_cwd=os.path.dirname(os.path.abspath(__file__)))
+        print(f"起動時間の計測結果を書き出しました: {os.path.abspath(args.profile_startup)}")
+    if args.exit_after_startup:
+        app.on_close()
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = PromptGeneratorApp(root)
+    args = parse_args()
+    if args.trace:
+        instrumentation.start_trace(args.trace)
+    profiler = StartupProfiler(enabled=bool(args.profile_startup))
+    profiler.add_phase("imports", IMPORT_END - IMPORT_START)
+    profiler.start_profile()
+    with profiler.phase("tk_root"):
+        root = tk.Tk()
+    app = PromptGeneratorApp(root, profiler)
+    if args.watchdog:
+        StallWatchdog(root, threshold_ms=args.watchdog).start()
+    # 最初のアイドル（画面の表示とレイアウトの完了）までを起動時間とする
+    root.after_idle(finish_startup, app, profiler, args, time.perf_counter())
     root.mainloop()
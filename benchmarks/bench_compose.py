@@ -0,0 +1,125 @@
+"""
+bench_compose.py
+完成プロンプトの組み立て（PromptComposer）の処理時間を計測するベンチマークです。
+settings の基本プロンプトと追加プロンプトから組み合わせを作り、一括生成と
+変数を1つずつ書き換える操作（入力中の再描画に相当）を計測します。
+
+使い方:
+  python benchmarks/bench_compose.py --combinations 20000 --edits 20000 [--post] [--cache]
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from src.core.prompt_composer import PromptComposer
+from src.core.prompt_pipeline import PostProcessPipeline
+from src.core.render_cache import BatchRenderer, RenderCache
+
+
+def load_settings():
+    """
+    リポジトリの settings から基本プロンプトと追加プロンプトを読み込みます。
+
+    戻り値:
+      tuple: (基本プロンプトのリスト, 追加プロンプトのリスト, 既定の主語)
+    """
+    settings_dir = os.path.join(REPO_ROOT, "settings")
+    with open(os.path.join(settings_dir, "basic_prompts.json"), "r", encoding="utf-8") as f:
+        basic_prompts = json.load(f)
+    with open(os.path.join(settings_dir, "element_prompts.json"), "r", encoding="utf-8") as f:
+        element_data = json.load(f)
+    elements = [p["prompt"] for c in element_data["categories"] for p in c["prompt_lists"]]
+    return basic_prompts, elements, element_data.get("default_subject", "人物")
+
+
+def variables_of(basic):
+    """
+    基本プロンプトの既定の変数値を、入力欄から取得した時と同じく文字列の辞書にして返します。
+    """
+    return {name: str(value) for name, value in basic.get("default_variables", {}).items()}
+
+
+def build_jobs(basic_prompts, elements, subject, count):
+    """
+    計測用の組み合わせ（基本プロンプト × 追加プロンプト2件）を作成します。
+
+    戻り値:
+      list: PromptComposer.compose の引数の組のリスト
+    """
+    pairs = itertools.cycle(itertools.combinations(elements, 2))
+    jobs = []
+    for basic in basic_prompts:
+        for _ in range(max(1, count // len(basic_prompts))):
+            jobs.append((basic["prompt"], variables_of(basic), next(pairs), subject))
+    return jobs[:count]
+
+
+def bench_cache(jobs, new_composer):
+    """
+    描画結果のキャッシュを使い、一括生成の初回と、基本プロンプトを1つ編集した後のやり直しを計測します。
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(os.path.join(tmp, "render_cache.db"))
+        edited = jobs[0][0]
+        rerun_jobs = [(t + "（編集）" if t == edited else t, *rest) for t, *rest in jobs]
+        for label, batch_jobs in (("cold", jobs), ("warm", jobs), ("edit", rerun_jobs)):
+            batch = BatchRenderer(new_composer(), cache)
+            start = time.perf_counter()
+            batch.run(batch_jobs)
+            elapsed = time.perf_counter() - start
+            print(f"cache {label}: {elapsed * 1000:.1f} ms, {dict(batch.last_run)}")
+        print(f"cache stats: {cache.stats()}")
+        cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--combinations", type=int, default=20000)
+    parser.add_argument("--edits", type=int, default=20000)
+    parser.add_argument("--post", action="store_true", help="画面と同じ後処理を適用する")
+    parser.add_argument("--cache", action="store_true",
+                        help="描画結果のキャッシュを使った一括生成のやり直しも計測する")
+    args = parser.parse_args()
+
+    basic_prompts, elements, subject = load_settings()
+    jobs = build_jobs(basic_prompts, elements, subject, args.combinations)
+
+    def new_composer():
+        return PromptComposer(pipeline=PostProcessPipeline.default() if args.post else None)
+
+    composer = new_composer()
+    start = time.perf_counter()
+    composer.compose_batch(jobs)
+    batch = time.perf_counter() - start
+
+    template, variables = basic_prompts[0]["prompt"], variables_of(basic_prompts[0])
+    name = next(iter(variables))
+    composer = new_composer()
+    start = time.perf_counter()
+    for i in range(args.edits):
+        variables[name] = f"値{i}"
+        composer.compose(template, variables, elements[:3], subject)
+    edits = time.perf_counter() - start
+
+    print(f"batch: {len(jobs)} prompts in {batch * 1000:.1f} ms "
+          f"({batch / len(jobs) * 1e6:.1f} us/prompt)")
+    print(f"edits: {args.edits} renders in {edits * 1000:.1f} ms "
+          f"({edits / args.edits * 1e6:.1f} us/render)")
+    print(f"stage stats [reused, computed]: {composer.stats}")
+    if args.cache:
+        bench_cache(jobs, new_composer)
+    if composer.pipeline:
+        for name, timing in composer.pipeline.timings().items():
+            print(f"post {name}: {timing['runs']} runs, {timing['hits']} hits, "
+                  f"{timing['total'] * 1000:.1f} ms total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+bench_startup.py
+アプリケーション起動から最初の描画完了までの時間を計測するベンチマークです。
+大量の定型文カテゴリ・エントリーを持つ合成データを一時ディレクトリに作成して計測します。
+
+使い方:
+  python benchmarks/bench_startup.py --categories 64 --entries 200 --repeat 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+
+def create_settings(base_dir, categories, entries):
+    """
+    計測用のsettingsフォルダを作成します。
+
+    引数:
+      base_dir (str): 作成先ディレクトリ
+      categories (int): 定型文カテゴリ数
+      entries (int): カテゴリごとのエントリー数
+
+    戻り値:
+      なし
+    """
+    settings_dir = os.path.join(base_dir, "settings")
+    os.makedirs(settings_dir)
+    for name in ("basic_prompts.json", "element_prompts.json"):
+        shutil.copy(os.path.join(REPO_ROOT, "settings", name), settings_dir)
+    order = [f"カテゴリ{c + 1}" for c in range(categories)]
+    data = {
+        "order": order,
+        "entries": {
+            cat: [{
+                "title": f"{cat}-{i}",
+                "text": f"{cat}の定型文{i}です。" * 5
+            } for i in range(entries)] for cat in order
+        }
+    }
+    with open(os.path.join(settings_dir, "one_click.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def measure_first_paint():
+    """
+    アプリケーションを生成し、最初の描画が完了するまでの時間を計測します。
+
+    戻り値:
+      float: 経過時間（ミリ秒）
+    """
+    from app import PromptGeneratorApp
+
+    start = time.perf_counter()
+    root = tk.Tk()
+    app = PromptGeneratorApp(root)
+    # 表示・描画イベントを処理し終えた時点を最初の描画完了とみなす
+    root.update()
+    elapsed = (time.perf_counter() - start) * 1000
+    app.ui_manager.shutdown()
+    root.destroy()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--categories", type=int, default=64)
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        create_settings(work_dir, args.categories, args.entries)
+        os.chdir(work_dir)
+        timings = [measure_first_paint() for _ in range(args.repeat)]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"categories={args.categories} entries={args.entries} repeat={args.repeat}")
+    print(f"first paint: median {statistics.median(timings):.1f} ms, "
+          f"min {min(timings):.1f} ms, max {max(timings):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
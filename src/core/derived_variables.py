@@ -0,0 +1,126 @@
+"""
+derived_variables.py
+他の変数から計算される派生変数（例: age から age_group、character から pronoun）を扱うコンポーネントです。
+派生変数の式はテンプレートの書式（template_compiler）で書き、参照している変数から依存グラフを作ります。
+変数が1つ変わった時は、その変数に依存する派生変数だけを依存の順に計算し直します。
+"""
+from src.core.template_compiler import compile_template
+
+
+class DerivedVariables:
+    """
+    DerivedVariables クラスは、派生変数の定義と現在の値を保持し、変更を差分で反映します。
+    循環している派生変数は計算せず、空文字になります。
+
+    引数:
+      definitions (dict): 派生変数名 -> 式（テンプレート文字列）
+      compiler (callable): テンプレートを変換する関数（省略時は compile_template）
+    """
+
+    def __init__(self, definitions, compiler=compile_template):
+        """
+        コンストラクタ
+
+        引数:
+          definitions (dict): 派生変数名 -> 式（テンプレート文字列）
+          compiler (callable): テンプレートを変換する関数
+        """
+        self.definitions = dict(definitions or {})
+        self._compiled = {name: compiler(str(expr)) for name, expr in self.definitions.items()}
+        self._dependents = {}  # 変数名 -> その変数を直接参照している派生変数名のリスト
+        for name, compiled in self._compiled.items():
+            for dep in compiled.variables:
+                self._dependents.setdefault(dep, []).append(name)
+        self.order, self.cycles = self._sort()
+        self._rank = {name: i for i, name in enumerate(self.order)}
+        self._values = {}
+
+    def _sort(self):
+        """
+        派生変数を、参照している派生変数より後になるように並べます（深さ優先探索によるトポロジカルソート）。
+
+        戻り値:
+          tuple: (計算順の派生変数名のリスト, 循環している派生変数名のリスト)
+        """
+        order = []
+        state = {}  # 派生変数名 -> 1: 探索中, 2: 完了
+        cycles = set()
+
+        def visit(name, path):
+            state[name] = 1
+            path.append(name)
+            for dep in self._compiled[name].variables:
+                if dep not in self._compiled:
+                    continue
+                if state.get(dep) == 1:
+                    cycles.update(path[path.index(dep):])
+                elif dep not in state:
+                    visit(dep, path)
+            path.pop()
+            state[name] = 2
+            order.append(name)
+
+        for name in self._compiled:
+            if name not in state:
+                visit(name, [])
+        # 循環に含まれる派生変数と、それに依存する派生変数は計算しない
+        blocked = set(cycles)
+        for name in order:
+            if any(dep in blocked for dep in self._compiled[name].variables):
+                blocked.add(name)
+        if cycles:
+            print(f"派生変数が循環しています: {', '.join(sorted(cycles))}")
+        return [name for name in order if name not in blocked], sorted(blocked)
+
+    def __contains__(self, name):
+        return name in self.definitions
+
+    def evaluate(self, variables):
+        """
+        すべての変数の値を設定し直し、すべての派生変数を計算します。
+
+        引数:
+          variables (dict): 変数名と値の辞書
+
+        戻り値:
+          dict: 派生変数名と値の辞書（定義順）
+        """
+        self._values = dict(variables)
+        for name in self.cycles:
+            self._values[name] = ""
+        for name in self.order:
+            self._values[name] = self._compiled[name].render(self._values)
+        return {name: self._values[name] for name in self.definitions}
+
+    def update(self, name, value):
+        """
+        変数を1つ更新し、影響を受ける派生変数だけを依存の順に計算し直します。
+        計算し直しても値が変わらなかった派生変数より先へは伝播しません。
+
+        引数:
+          name (str): 変数名
+          value (str): 新しい値
+
+        戻り値:
+          dict: 値が変わった派生変数名と新しい値の辞書（計算順）
+        """
+        if name in self._values and self._values[name] == value:
+            return {}
+        self._values[name] = value
+        pending = self._ranked_dependents(name)
+        changed = {}
+        while pending:
+            derived = min(pending, key=self._rank.__getitem__)
+            pending.discard(derived)
+            new_value = self._compiled[derived].render(self._values)
+            if new_value != self._values.get(derived):
+                self._values[derived] = new_value
+                changed[derived] = new_value
+                pending.update(self._ranked_dependents(derived))
+        return changed
+
+    def _ranked_dependents(self, name):
+        """
+        指定した変数を直接参照している派生変数のうち、計算対象のものの集合を返します。
+        """
+        return {d for d in self._dependents.get(name, ()) if d in self._rank}
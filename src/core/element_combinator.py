@@ -0,0 +1,208 @@
+"""
+element_combinator.py
+追加プロンプトの組み合わせを、制約（カテゴリごとの上限・同時に使えないカテゴリ・必須カテゴリ・
+合計数）を満たすものだけ列挙またはランダムに抽出するコンポーネントです。
+残りのカテゴリで作れる組み合わせの数を動的計画法で数えておき、列挙中に条件を満たせない枝を
+その場で打ち切ります。同じ数を使うことで、総数を列挙せずに求め、一様なランダム抽出も行えます。
+"""
+import random
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+
+
+class ElementCombinator:
+    """
+    ElementCombinator クラスは、追加プロンプトのデータ（element_prompts.json の内容）から
+    制約を満たす組み合わせを生成します。組み合わせは (カテゴリ番号, プロンプト番号) のタプルのリストです。
+
+    引数:
+      element_prompts (dict): 追加プロンプトのデータ（"categories" を含む）
+      max_per_category (int または dict): カテゴリごとに選べる上限（dictの場合はカテゴリ名 -> 上限、
+        含まれないカテゴリは1）
+      exclusive (list): 同時に使えないカテゴリ名の組のリスト（各組から使えるカテゴリは1つまで）
+      required (list): 必ず1つ以上選ぶカテゴリ名のリスト
+      min_total (int): 組み合わせに含める追加プロンプトの最小数
+      max_total (int): 組み合わせに含める追加プロンプトの最大数（Noneの場合は制限しない）
+    """
+
+    def __init__(self,
+                 element_prompts,
+                 max_per_category=1,
+                 exclusive=(),
+                 required=(),
+                 min_total=1,
+                 max_total=None):
+        """
+        コンストラクタ
+
+        引数:
+          element_prompts (dict): 追加プロンプトのデータ（"categories" を含む）
+          max_per_category (int または dict): カテゴリごとに選べる上限
+          exclusive (list): 同時に使えないカテゴリ名の組のリスト
+          required (list): 必ず1つ以上選ぶカテゴリ名のリスト
+          min_total (int): 組み合わせに含める追加プロンプトの最小数
+          max_total (int): 組み合わせに含める追加プロンプトの最大数（Noneの場合は制限しない）
+
+        例外:
+          ValueError: 存在しないカテゴリ名が指定された場合
+        """
+        self.categories = element_prompts.get("categories", [])
+        names = [category.get("category", "") for category in self.categories]
+        index_of = {name: i for i, name in enumerate(names)}
+        for name in list(required) + [name for group in exclusive for name in group]:
+            if name not in index_of:
+                raise ValueError(f"カテゴリ '{name}' は存在しません。")
+
+        self._sizes = [len(category.get("prompt_lists", [])) for category in self.categories]
+        self._masks = [0] * len(self.categories)  # カテゴリが属する排他グループのビット集合
+        for bit, group in enumerate(exclusive):
+            for name in group:
+                self._masks[index_of[name]] |= 1 << bit
+        self._ranges = []  # カテゴリごとに選べる数の範囲 (下限, 上限)
+        for i, name in enumerate(names):
+            if isinstance(max_per_category, dict):
+                limit = max_per_category.get(name, 1)
+            else:
+                limit = max_per_category
+            low = 1 if name in required else 0
+            self._ranges.append((low, min(limit, self._sizes[i])))
+        self.min_total = min_total
+        self.max_total = max_total
+        self._ways = lru_cache(maxsize=None)(self._count_ways)
+        self._options = {}  # (カテゴリ番号, 排他グループの状態, 選んだ数) -> 抽出用の累積重み
+
+    def _count_ways(self, index, used, total):
+        """
+        index 番目以降のカテゴリで、条件を満たす組み合わせを完成させる方法の数を返します。
+
+        引数:
+          index (int): 次に選ぶカテゴリの番号
+          used (int): 既に使われた排他グループのビット集合
+          total (int): ここまでに選んだ追加プロンプトの数
+
+        戻り値:
+          int: 組み合わせの数
+        """
+        if self.max_total is not None and total > self.max_total:
+            return 0
+        if index == len(self._sizes):
+            return 1 if total >= self.min_total else 0
+        ways = 0
+        for k, next_used in self._choices(index, used):
+            ways += comb(self._sizes[index], k) * self._ways(index + 1, next_used, total + k)
+        return ways
+
+    def _choices(self, index, used):
+        """
+        index 番目のカテゴリから選べる数と、選んだ後の排他グループの状態の組を返します。
+        """
+        low, high = self._ranges[index]
+        mask = self._masks[index]
+        for k in range(low, high + 1):
+            if k == 0:
+                yield k, used
+            elif not used & mask:
+                yield k, used | mask
+
+    def count(self):
+        """
+        条件を満たす組み合わせの総数を、列挙せずに返します。
+
+        引数:
+          なし
+
+        戻り値:
+          int: 組み合わせの総数
+        """
+        return self._ways(0, 0, 0)
+
+    def __iter__(self):
+        """
+        条件を満たす組み合わせをすべて列挙します（条件を満たせない枝は列挙の途中で打ち切ります）。
+
+        戻り値:
+          iterator: (カテゴリ番号, プロンプト番号) のタプルのリストを順に返すイテレーター
+        """
+        if self.count():
+            yield from self._enumerate(0, 0, 0, [])
+
+    def _enumerate(self, index, used, total, picked):
+        """
+        index 番目以降のカテゴリについて、完成できる枝だけをたどって組み合わせを列挙します。
+        """
+        if index == len(self._sizes):
+            yield list(picked)
+            return
+        for k, next_used in self._choices(index, used):
+            if not self._ways(index + 1, next_used, total + k):
+                continue
+            for prompts in combinations(range(self._sizes[index]), k):
+                picked.extend((index, p) for p in prompts)
+                yield from self._enumerate(index + 1, next_used, total + k, picked)
+                del picked[len(picked) - k:]
+
+    def sample(self, count, seed=None):
+        """
+        条件を満たす組み合わせを一様にランダムに抽出します（重複を含みます）。
+        組み合わせの総数が膨大でも、1件あたりカテゴリ数に比例した時間で抽出できます。
+
+        引数:
+          count (int): 抽出する件数
+          seed (int): 乱数のシード（同じシードなら同じ結果になります）
+
+        戻り値:
+          iterator: (カテゴリ番号, プロンプト番号) のタプルのリストを順に返すイテレーター
+        """
+        if not self.count():
+            return
+        rng = random.Random(seed)
+        for _ in range(count):
+            yield self._sample_one(rng)
+
+    def _sample_one(self, rng):
+        """
+        条件を満たす組み合わせを1件、一様にランダムに選びます。
+        """
+        used = total = 0
+        picked = []
+        for index, size in enumerate(self._sizes):
+            state = (index, used, total)
+            options = self._options.get(state)
+            if options is None:
+                options = self._options[state] = self._weighted_choices(index, used, total)
+            cumulative, choices = options
+            k, used = choices[bisect_right(cumulative, rng.randrange(cumulative[-1]))]
+            if k:
+                picked.extend((index, p) for p in sorted(rng.sample(range(size), k)))
+                total += k
+        return picked
+
+    def _weighted_choices(self, index, used, total):
+        """
+        各選択肢を、その先で作れる組み合わせの数に比例した確率で選ぶための累積重みを作成します。
+        """
+        cumulative = []
+        choices = []
+        acc = 0
+        for k, next_used in self._choices(index, used):
+            weight = comb(self._sizes[index], k) * self._ways(index + 1, next_used, total + k)
+            if weight:
+                acc += weight
+                cumulative.append(acc)
+                choices.append((k, next_used))
+        return cumulative, choices
+
+    def prompts_of(self, combination):
+        """
+        組み合わせを追加プロンプトのテンプレートのリストに変換します（PromptComposer に渡せる形式）。
+
+        引数:
+          combination (list): (カテゴリ番号, プロンプト番号) のタプルのリスト
+
+        戻り値:
+          list: 追加プロンプトのテンプレートのリスト
+        """
+        return [self.categories[c]["prompt_lists"][p]["prompt"] for c, p in combination]
+
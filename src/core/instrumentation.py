@@ -0,0 +1,375 @@
+"""
+instrumentation.py
+処理時間と回数を名前ごとに集計する、軽量な計測の登録簿です。
+計測は既定で無効になっており、無効な間の計測箇所のコストは属性の参照と条件分岐1回だけです。
+パフォーマンス表示（performance_hud）を開いている間だけ有効にして、利用者の環境での処理時間を確認できます。
+トレースを開始すると、計測した区間をスレッドごとに記録し、Chrome のトレース形式（chrome://tracing や
+Perfetto で開けるJSON）で書き出します。
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+# トレースの書き出し先を指定する環境変数（app.py の --trace でも指定できます）
+TRACE_ENV_VAR = "IPWM_TRACE"
+MAX_TRACE_EVENTS = 500000  # これを超えた区間は記録しない（メモリの使用量を抑えるため）
+
+
+class Metric:
+    """
+    Metric クラスは、1つの計測名についての回数・時間・量（書き込んだバイト数など）の集計です。
+    """
+    __slots__ = ("count", "total", "last", "max", "amount")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.amount = 0
+
+    def add(self, seconds, amount=0):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.amount += amount
+
+
+class _Timer:
+    """
+    with 文の範囲の処理時間を計測します。value に量を設定すると合わせて集計されます。
+    """
+    __slots__ = ("registry", "name", "start", "value")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.value = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.registry.record(self.name, time.perf_counter() - self.start, self.value, self.start)
+        return False
+
+
+class _NullTimer:
+    """
+    計測が無効な時に timer が返す、何もしない with 文用のオブジェクトです。
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    @property
+    def value(self):
+        return 0
+
+    @value.setter
+    def value(self, _):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    """
+    Instrumentation クラスは、計測名ごとの Metric と、表示時に値を求めるゲージを保持します。
+    トレース中は、計測した区間を開始時刻・スレッドとともに記録します。
+    複数のスレッド（保存処理のライタースレッドなど）から記録できます。
+    """
+
+    def __init__(self):
+        """
+        コンストラクタ
+        """
+        self._enabled = False
+        self.active = False  # 集計またはトレースのどちらかが有効な場合はTrue
+        self._metrics = {}
+        self._gauges = {}  # 名前 -> 値を返す関数（表示する時だけ呼び出す）
+        self._lock = threading.Lock()
+        self._trace = None  # トレース中は区間のイベントのリスト
+        self._trace_origin = 0.0
+        self._trace_path = None
+        self._thread_names = {}  # スレッドID -> スレッド名
+        self._exit_hook = False
+        self.dropped_events = 0
+
+    @property
+    def enabled(self):
+        """
+        名前ごとの集計が有効かどうか（パフォーマンス表示を開いている間はTrue）
+        """
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = bool(value)
+        self.active = self._enabled or self._trace is not None
+
+    @property
+    def tracing(self):
+        """
+        トレースを記録中かどうか
+        """
+        return self._trace is not None
+
+    def timer(self, name):
+        """
+        with 文の範囲の処理時間を計測するオブジェクトを返します。
+
+        引数:
+          name (str): 計測名
+
+        戻り値:
+          with 文で使うオブジェクト（無効な場合は何もしません）
+        """
+        if not self.active:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name, seconds, amount=0, start=None):
+        """
+        処理時間を1回分記録します。
+
+        引数:
+          name (str): 計測名
+          seconds (float): 処理時間（秒）
+          amount (int): 合わせて集計する量（書き込んだバイト数など）
+          start (float): 開始時刻（time.perf_counter の値。省略時は終了時刻から逆算します）
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            if self._enabled:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = Metric()
+                metric.add(seconds, amount)
+            if self._trace is not None:
+                self._add_event(name, seconds, amount, start)
+
+    def _add_event(self, name, seconds, amount, start):
+        """
+        区間を Chrome のトレース形式の完了イベント（ph: "X"）として記録します（ロック内で呼び出すこと）。
+        """
+        if len(self._trace) >= MAX_TRACE_EVENTS:
+            self.dropped_events += 1
+            return
+        if start is None:
+            start = time.perf_counter() - seconds
+        thread = threading.current_thread()
+        if thread.ident not in self._thread_names:
+            self._thread_names[thread.ident] = thread.name
+        event = {
+            "name": name,
+            "cat": name.partition(".")[0],
+            "ph": "X",
+            "ts": (start - self._trace_origin) * 1e6,
+            "dur": seconds * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if amount:
+            event["args"] = {"amount": amount}
+        self._trace.append(event)
+
+    def start_trace(self, path=None):
+        """
+        トレースの記録を開始します。書き出し先を指定した場合は、終了時に自動で書き出します。
+
+        引数:
+          path (str): 書き出し先のファイルパス（省略可）
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            if self._trace is None:
+                self._trace = []
+                self._trace_origin = time.perf_counter()
+                self._thread_names = {}
+                self.dropped_events = 0
+        if path and not self._exit_hook:
+            atexit.register(self._write_at_exit)
+            self._exit_hook = True
+        self._trace_path = path or self._trace_path
+        self.active = True
+
+    def stop_trace(self):
+        """
+        トレースの記録を終了し、記録したイベントを返します。
+
+        引数:
+          なし
+
+        戻り値:
+          dict: Chrome のトレース形式のデータ（記録していなかった場合はNone）
+        """
+        with self._lock:
+            events = self._trace
+            self._trace = None
+            self.active = self._enabled
+            if events is None:
+                return None
+            pid = os.getpid()
+            metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                         "args": {"name": "Image Prompt Word-Mixer"}}]
+            metadata += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                          "args": {"name": name}} for tid, name in self._thread_names.items()]
+        trace = {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+        if self.dropped_events:
+            trace["otherData"] = {"dropped_events": self.dropped_events}
+        return trace
+
+    def write_trace(self, path=None):
+        """
+        トレースの記録を終了し、Chrome のトレース形式のJSONファイルに書き出します。
+
+        引数:
+          path (str): 書き出し先のファイルパス（省略時は start_trace で指定したパス）
+
+        戻り値:
+          bool: 書き出した場合はTrue
+        """
+        path = path or self._trace_path
+        trace = self.stop_trace()
+        if trace is None or not path:
+            return False
+        self._trace_path = None
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(trace, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"トレースの書き出しに失敗しました: {e}")
+            return False
+        print(f"トレースを書き出しました: {path}")
+        return True
+
+    def _write_at_exit(self):
+        if self.tracing and self._trace_path:
+            self.write_trace()
+
+    def count(self, name, amount=1):
+        """
+        処理時間を伴わない回数（キャッシュのヒットなど）を記録します。
+
+        引数:
+          name (str): 計測名
+          amount (int): 加算する量
+
+        戻り値:
+          なし
+        """
+        if self._enabled:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = Metric()
+                metric.add(0.0, amount)
+
+    def gauge(self, name, func):
+        """
+        表示する時に値を求める項目（キャッシュのヒット率など）を登録します。
+
+        引数:
+          name (str): 項目名
+          func (callable): 値を返す関数（Noneを返した場合は表示しません）
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            self._gauges[name] = func
+
+    def snapshot(self):
+        """
+        現在の集計結果を返します。
+
+        引数:
+          なし
+
+        戻り値:
+          tuple: (計測名 -> {"count", "total", "last", "max", "mean", "amount"} の辞書（時間は秒）,
+            項目名 -> 値 の辞書)
+        """
+        with self._lock:
+            metrics = {
+                name: {
+                    "count": m.count,
+                    "total": m.total,
+                    "last": m.last,
+                    "max": m.max,
+                    "mean": m.total / m.count if m.count else 0.0,
+                    "amount": m.amount,
+                }
+                for name, m in self._metrics.items()
+            }
+            gauges = list(self._gauges.items())
+        values = {}
+        for name, func in gauges:
+            try:
+                value = func()
+            except Exception as e:
+                value = f"エラー: {e}"
+            if value is not None:
+                values[name] = value
+        return metrics, values
+
+    def reset(self):
+        """
+        集計結果を消去します（ゲージの登録は残します）。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            self._metrics = {}
+
+
+# アプリケーション全体で共有する登録簿
+instrumentation = Instrumentation()
+
+
+def instrumented(name):
+    """
+    関数の処理時間を計測するデコレーターです。計測が無効な間は元の関数をそのまま呼び出します。
+
+    引数:
+      name (str): 計測名
+
+    戻り値:
+      function: デコレーター
+    """
+
+    def decorator(func):
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.active:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instrumentation.record(name, time.perf_counter() - start, 0, start)
+
+        return wrapper
+
+    return decorator
@@ -3,13 +3,41 @@ one_click_manager.py
 ワンクリック機能のデータ管理とロジックを担当するモジュールです。
 JSONファイルの読み書きやエントリー操作などを処理します。
 """
-import json
+import contextlib
+import csv
 import os
+import threading
 from tkinter import messagebox
 
+from src.core.instrumentation import instrumentation, instrumented
+from src.core.one_click_store import JsonOneClickStore, apply_record, move_range_order
+from src.core.one_click_writer import DEFAULT_SAVE_DELAY, DebouncedWriter
+
 DEFAULT_ENTRY_COUNT = 20
 DEFAULT_CATEGORIES = ["カテゴリ1", "カテゴリ2", "カテゴリ3"]
-MAX_CATEGORIES = 8  # カテゴリタブの最大数（7から8に変更）
+MAX_CATEGORIES = 64  # カテゴリタブの最大数
+GRID_COLUMNS = 2  # ボタングリッドの既定の列数
+# 保存形式の切り替え用環境変数（"json" または "sqlite"）
+BACKEND_ENV_VAR = "IPWM_ONE_CLICK_BACKEND"
+
+
+def create_one_click_store(json_path, backend=None):
+    """
+    ワンクリックデータのストレージバックエンドを生成します。
+
+    引数:
+      json_path (str): one_click.json のパス
+      backend (str): "json" または "sqlite"。省略時は環境変数、未設定なら "json"
+
+    戻り値:
+      JsonOneClickStore または SqliteOneClickStore: ストア
+    """
+    backend = backend or os.environ.get(BACKEND_ENV_VAR, "json")
+    if backend == "sqlite":
+        from src.core.one_click_sqlite_store import SqliteOneClickStore
+        db_path = os.path.join(os.path.dirname(json_path), "one_click.db")
+        return SqliteOneClickStore(db_path, json_path)
+    return JsonOneClickStore(json_path)
 
 
 class OneClickManager:
@@ -18,18 +46,115 @@ class OneClickManager:
     JSONファイルの読み書き、エントリーの操作などを処理します。
     """
 
-    def __init__(self):
+    def __init__(self,
+                 json_path=None,
+                 save_delay=DEFAULT_SAVE_DELAY,
+                 backend=None,
+                 columns=GRID_COLUMNS):
         """
         コンストラクタ。
         データの初期化を行います。
+
+        引数:
+          json_path (str): 保存先JSONファイルのパス。省略時はsettings/one_click.json
+          save_delay (float): 変更から自動保存までの待ち時間（秒）
+          backend (str): ストレージバックエンド（"json" または "sqlite"）
+          columns (int): ボタングリッドの列数（矢印キー移動の計算に使用）
         """
+        if json_path is None:
+            json_path = os.path.join(os.getcwd(), "settings", "one_click.json")
+        self.json_path = json_path
+        self.columns = max(1, columns)
         self.one_click_entries = {}
         self.category_order = []  # カテゴリの表示順を保持するリスト
+        self.store = create_one_click_store(json_path, backend)
+        # バックグラウンド書き込みとの排他用ロック
+        self._lock = threading.RLock()
+        # 未書き込みの編集レコード（ライタースレッドがジャーナルへ追記する）
+        self._pending_records = []
+        self._compact_requested = False
+        # トランザクションの入れ子の深さと、確定前の編集レコード
+        self._txn_depth = 0
+        self._txn_records = []
+        # 変更通知を受け取る関数（検索インデックスの更新などに使用）
+        self._listeners = []
+        self._writer = DebouncedWriter(self._persist, delay=save_delay)
         self.load_one_click_entries()
         self.current_category = None
         self.current_index = None
 
+    @instrumented("one_click.load")
     def load_one_click_entries(self):
+        """
+        one_click.jsonから各カテゴリごとのワンクリックエントリーを読み込み、
+        ジャーナルに残っている未統合の編集を再生します。
+        
+        引数:
+          なし
+        
+        戻り値:
+          dict: カテゴリごとにエントリーリストを格納した辞書
+        """
+        with self._lock:
+            self._pending_records = []
+            self._compact_requested = False
+            self._load_snapshot()
+            self._replay_journal()
+            # JSONからの取り込み（SQLiteへの移行など）が必要な場合
+            if self.store.requires_snapshot:
+                self._compact_requested = True
+        conflict_path = getattr(self.store, "conflict_path", None)
+        if conflict_path:
+            messagebox.showwarning(
+                "警告", "one_click.json が外部で編集されていたため、その内容を読み込みました。\n"
+                "one_click.json に書き出していなかった編集は\n"
+                f"「{os.path.basename(conflict_path)}」に保存されています。")
+        # 形式変換やジャーナル再生があった場合はスナップショットへ統合して保存
+        if self._compact_requested:
+            self.save_one_click_entries()
+        self._notify({"op": "reload"})
+        return self.one_click_entries
+
+    def reload(self):
+        """
+        保留中の変更を書き込んだ後、保存先からデータを再読み込みします。
+        選択中のカテゴリ・インデックスは、再読み込み後も有効であれば維持されます。
+
+        引数:
+          なし
+
+        戻り値:
+          dict: カテゴリごとにエントリーリストを格納した辞書
+        """
+        self.flush()
+        self.load_one_click_entries()
+        entries = self.one_click_entries.get(self.current_category)
+        if entries is None or self.current_index is None or self.current_index >= len(entries):
+            self.current_category = None
+            self.current_index = None
+        return self.one_click_entries
+
+    def _replay_journal(self):
+        """
+        ジャーナルの編集レコードをスナップショットに適用します。
+        再生したレコードがある場合は、スナップショットへの統合を予約します。
+        """
+        try:
+            records = self.store.read_journal()
+        except Exception as e:
+            print(f"one_click.json.journal の読み込みに失敗しました: {e}")
+            return
+        if not records:
+            return
+        for record in records:
+            try:
+                apply_record(self.category_order, self.one_click_entries, record)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"ジャーナルレコードの再生に失敗しました: {e}")
+        print(f"ジャーナルから{len(records)}件の編集を復元しました")
+        self._compact_requested = True
+
+    def _load_snapshot(self):
         """
         one_click.jsonから各カテゴリごとのワンクリックエントリーを読み込みます。
         読み込みデータがリストの場合は旧形式として先頭カテゴリに割り当て、
@@ -41,15 +166,13 @@ class OneClickManager:
         戻り値:
           dict: カテゴリごとにエントリーリストを格納した辞書
         """
-        # settingsフォルダのパスを取得
-        settings_dir = os.path.join(os.getcwd(), "settings")
-        json_path = os.path.join(settings_dir, "one_click.json")
+        json_path = self.json_path
 
         self.one_click_entries = {}
         self.category_order = []
 
         # ファイルが存在しない場合はデフォルト
-        if not os.path.exists(json_path):
+        if not self.store.exists():
             self.category_order = DEFAULT_CATEGORIES[:MAX_CATEGORIES]
             for cat in self.category_order:
                 self.one_click_entries[cat] = [{
@@ -59,78 +182,79 @@ class OneClickManager:
             return self.one_click_entries
 
         try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                json_data = json.load(f)
-
-                is_format_converted = False  # フォーマット変換されたかどうか
-
-                # 新形式（order属性を持つ）かどうか確認
-                if isinstance(json_data, dict) and "order" in json_data and "entries" in json_data:
-                    # 既に新形式: カテゴリ順序とエントリーが分離されている
-                    self.category_order = json_data["order"]
-                    entries_data = json_data["entries"]
-                elif isinstance(json_data, dict):
-                    # 中間形式: 辞書形式だがorder属性はない - 変換が必要
-                    is_format_converted = True
-                    self.category_order = list(json_data.keys())
-                    entries_data = json_data
-                    # バックアップ作成
-                    self._backup_json_file(json_path)
-                else:
-                    # 旧形式: リスト形式 - 変換が必要
-                    is_format_converted = True
-                    self.category_order = [DEFAULT_CATEGORIES[0]]
-                    entries_data = {DEFAULT_CATEGORIES[0]: json_data}
-                    # 他のデフォルトカテゴリも追加
-                    for cat in DEFAULT_CATEGORIES[1:]:
-                        if cat not in self.category_order:
-                            self.category_order.append(cat)
-                            entries_data[cat] = []
-                    # バックアップ作成
-                    self._backup_json_file(json_path)
-
-                # カテゴリ数が上限を超える場合は警告
-                if len(self.category_order) > MAX_CATEGORIES:
-                    messagebox.showwarning(
-                        "警告", f"カテゴリタブは{MAX_CATEGORIES}つまでしか設定できません。先頭{MAX_CATEGORIES}個のみ読み込みます。")
-                    self.category_order = self.category_order[:MAX_CATEGORIES]
-
-                # カテゴリ順序に従ってエントリーを処理
+            json_data = self.store.read_snapshot()
+
+            is_format_converted = False  # フォーマット変換されたかどうか
+
+            # 新形式（order属性を持つ）かどうか確認
+            if isinstance(json_data, dict) and "order" in json_data and "entries" in json_data:
+                # 既に新形式: カテゴリ順序とエントリーが分離されている
+                self.category_order = json_data["order"]
+                entries_data = json_data["entries"]
+            elif isinstance(json_data, dict):
+                # 中間形式: 辞書形式だがorder属性はない - 変換が必要
+                is_format_converted = True
+                self.category_order = list(json_data.keys())
+                entries_data = json_data
+                # バックアップ作成
+                self._backup_json_file(json_path)
+            else:
+                # 旧形式: リスト形式 - 変換が必要
+                is_format_converted = True
+                self.category_order = [DEFAULT_CATEGORIES[0]]
+                entries_data = {DEFAULT_CATEGORIES[0]: json_data}
+                # 他のデフォルトカテゴリも追加
+                for cat in DEFAULT_CATEGORIES[1:]:
+                    if cat not in self.category_order:
+                        self.category_order.append(cat)
+                        entries_data[cat] = []
+                # バックアップ作成
+                self._backup_json_file(json_path)
+
+            # カテゴリ数が上限を超える場合は警告
+            if len(self.category_order) > MAX_CATEGORIES:
+                messagebox.showwarning(
+                    "警告", f"カテゴリタブは{MAX_CATEGORIES}つまでしか設定できません。先頭{MAX_CATEGORIES}個のみ読み込みます。")
+                self.category_order = self.category_order[:MAX_CATEGORIES]
+
+            # カテゴリ順序に従ってエントリーを処理
+            for cat in self.category_order:
+                entries = entries_data.get(cat, [])
+                # エントリーのバリデーションと正規化
+                for entry in entries:
+                    if "title" not in entry:
+                        entry["title"] = ""
+                    if "text" not in entry:
+                        entry["text"] = ""
+                # エントリー数を最低数まで補完（カテゴリごとに任意の数を保持できる）
+                while len(entries) < DEFAULT_ENTRY_COUNT:
+                    entries.append({"title": "", "text": ""})
+                self.one_click_entries[cat] = entries
+
+            # データ形式が変換された場合、ユーザーに通知（初回のみ）
+            if is_format_converted:
+                messagebox.showinfo(
+                    "情報", "定型文データの形式を更新しました。\n"
+                    "カテゴリの順序が保持されるようになります。\n"
+                    "元のデータは「one_click.json.bak」にバックアップされています。")
+                # 新形式で保存（読み込み完了後に書き込む）
+                self._compact_requested = True
+
+            # 少なくとも1つのカテゴリがあることを保証
+            if not self.category_order:
+                self.category_order = DEFAULT_CATEGORIES[:MAX_CATEGORIES]
                 for cat in self.category_order:
-                    entries = entries_data.get(cat, [])
-                    # エントリーのバリデーションと正規化
-                    for entry in entries:
-                        if "title" not in entry:
-                            entry["title"] = ""
-                        if "text" not in entry:
-                            entry["text"] = ""
-                    # エントリー数を標準化
-                    while len(entries) < DEFAULT_ENTRY_COUNT:
-                        entries.append({"title": "", "text": ""})
-                    self.one_click_entries[cat] = entries[:DEFAULT_ENTRY_COUNT]
-
-                # データ形式が変換された場合、ユーザーに通知（初回のみ）
-                if is_format_converted:
-                    messagebox.showinfo(
-                        "情報", "定型文データの形式を更新しました。\n"
-                        "カテゴリの順序が保持されるようになります。\n"
-                        "元のデータは「one_click.json.bak」にバックアップされています。")
-                    # 新形式で保存
-                    self.save_one_click_entries()
-
-                # 少なくとも1つのカテゴリがあることを保証
-                if not self.category_order:
-                    self.category_order = DEFAULT_CATEGORIES[:MAX_CATEGORIES]
-                    for cat in self.category_order:
-                        self.one_click_entries[cat] = [{
-                            "title": "",
-                            "text": ""
-                        } for _ in range(DEFAULT_ENTRY_COUNT)]
-
-                return self.one_click_entries
+                    self.one_click_entries[cat] = [{
+                        "title": "",
+                        "text": ""
+                    } for _ in range(DEFAULT_ENTRY_COUNT)]
+
+            return self.one_click_entries
 
         except Exception as e:
             print(f"one_click.json の読み込みに失敗しました: {e}")
+            # 読み込めなかったファイルは上書きされる前に退避しておく
+            self._backup_json_file(json_path, ".corrupt")
             # エラー時はデフォルト値を使用
             self.category_order = DEFAULT_CATEGORIES[:MAX_CATEGORIES]
             for cat in self.category_order:
@@ -140,18 +264,19 @@ class OneClickManager:
                 } for _ in range(DEFAULT_ENTRY_COUNT)]
             return self.one_click_entries
 
-    def _backup_json_file(self, file_path):
+    def _backup_json_file(self, file_path, suffix=".bak"):
         """
         JSONファイルのバックアップを作成します。
         
         引数:
           file_path (str): バックアップ対象のファイルパス
+          suffix (str): バックアップファイルの拡張子
         
         戻り値:
           なし
         """
         try:
-            backup_path = file_path + ".bak"
+            backup_path = file_path + suffix
             # バックアップが既に存在する場合は上書きしない
             if not os.path.exists(backup_path):
                 import shutil
@@ -162,8 +287,8 @@ class OneClickManager:
 
     def save_one_click_entries(self):
         """
-        ワンクリックエントリーをone_click.jsonに保存します。
-        カテゴリ数が上限を超える場合は警告を表示します。
+        ワンクリックエントリー全体をone_click.jsonに即座に保存します。
+        ジャーナルの内容もスナップショットへ統合されます。
         
         引数:
           なし
@@ -171,35 +296,236 @@ class OneClickManager:
         戻り値:
           なし
         """
-        # カテゴリ数をチェック
-        if len(self.category_order) > MAX_CATEGORIES:
-            messagebox.showwarning("警告", f"カテゴリタブは{MAX_CATEGORIES}つまでしか設定できません。")
-            # 最大数に制限
-            self.category_order = self.category_order[:MAX_CATEGORIES]
-            limited_entries = {}
-            for cat in self.category_order:
-                if cat in self.one_click_entries:
-                    limited_entries[cat] = self.one_click_entries[cat]
-            self.one_click_entries = limited_entries
+        with self._lock:
+            self._compact_requested = True
+        self._writer.mark_dirty()
+        self._writer.flush()
+
+    def schedule_save(self):
+        """
+        バックグラウンドでの遅延保存をスケジュールします。
+        連続した変更はまとめて1回の書き込みになります。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        self._writer.mark_dirty()
+
+    def _apply(self, record):
+        """
+        編集レコードをメモリ上のデータに適用し、ジャーナルへの追記を予約します。
+
+        引数:
+          record (dict): 編集レコード
+
+        戻り値:
+          bool: 適用できた場合はTrue
+        """
+        with self._lock:
+            if not apply_record(self.category_order, self.one_click_entries, record):
+                return False
+            in_transaction = self._txn_depth > 0
+            if in_transaction:
+                self._txn_records.append(record)
+            else:
+                self._pending_records.append(record)
+        self._notify(record)
+        # トランザクション中の保存はコミット時に1回だけ予約する
+        if not in_transaction:
+            self.schedule_save()
+        return True
+
+    def add_change_listener(self, listener):
+        """
+        データが変更された時に呼び出される関数を登録します。
+        関数には適用された編集レコードが渡され、再読み込みやトランザクションの取り消しでは
+        {"op": "reload"} が渡されます。
+
+        引数:
+          listener (callable): 編集レコードを受け取る関数
+
+        戻り値:
+          なし
+        """
+        self._listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        """
+        add_change_listener で登録した関数を解除します。
+
+        引数:
+          listener (callable): 登録済みの関数
+
+        戻り値:
+          なし
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, record):
+        for listener in list(self._listeners):
+            try:
+                listener(record)
+            except Exception as e:
+                print(f"定型文の変更通知に失敗しました: {e}")
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        複数の変更をまとめて適用するトランザクションを開始します。
+        ブロック内の変更はメモリ上で適用され、正常終了時に1回だけ保存が予約されます。
+        ブロック内で例外が発生した場合は、カテゴリ・エントリー・選択状態を開始前に戻し、
+        例外を再送出します。入れ子にした場合は最も外側のブロックでまとめて確定します。
+
+        使用例:
+          with manager.transaction():
+              manager.update_entry("カテゴリ1", 0, "タイトル", "定型文")
+              manager.move_range("カテゴリ1", 0, 4, 10)
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            saved = (list(self.category_order),
+                     {c: [e.copy() for e in items] for c, items in self.one_click_entries.items()},
+                     self.current_category, self.current_index)
+            start = len(self._txn_records)
+            self._txn_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self.category_order[:] = saved[0]
+                self.one_click_entries.clear()
+                self.one_click_entries.update(saved[1])
+                self.current_category, self.current_index = saved[2], saved[3]
+                del self._txn_records[start:]
+                self._txn_depth -= 1
+            self._notify({"op": "reload"})
+            raise
+        with self._lock:
+            self._txn_depth -= 1
+            committed = self._txn_depth == 0 and bool(self._txn_records)
+            if committed:
+                self._pending_records.extend(self._txn_records)
+                self._txn_records = []
+        if committed:
+            self.schedule_save()
+
+    def flush(self, timeout=None):
+        """
+        保留中の変更をファイルに書き込み、完了まで待機します。
+
+        引数:
+          timeout (float): 最大待機時間（秒）。Noneの場合は無制限
+
+        戻り値:
+          bool: 書き込みが完了した場合はTrue
+        """
+        return self._writer.flush(timeout)
+
+    def close(self):
+        """
+        保留中の変更をスナップショットへ統合して書き込み、バックグラウンドライターを停止します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            if self._pending_records or self.store.journal_records:
+                self._compact_requested = True
+                self._writer.mark_dirty()
+        self._writer.close()
+        self.store.close()
+
+    def search(self, query, limit=50):
+        """
+        タイトルと定型文からエントリーを検索します。
+        ストアが全文検索に対応している場合はそれを利用します。
+
+        引数:
+          query (str): 検索文字列
+          limit (int): 最大件数
+
+        戻り値:
+          list: (カテゴリ名, インデックス, タイトル) のタプルのリスト
+
+        例外:
+          SnapshotChangedError: one_click.json が外部で変更され、本文を読み込めない場合
+        """
+        store_search = getattr(self.store, "search", None)
+        if store_search is not None:
+            self.flush()
+            return store_search(query, limit)
+        query = query.strip()
+        results = []
+        if not query:
+            return results
+        for category in self.category_order:
+            for index, entry in enumerate(self.one_click_entries.get(category, [])):
+                if query in entry["title"] or query in entry["text"]:
+                    results.append((category, index, entry["title"]))
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def _snapshot(self):
+        """
+        保存用に現在のデータのコピーを作成します（ロック取得済みで呼び出すこと）。
 
+        戻り値:
+          dict: order と entries を持つ保存用データ
+        """
+        order = list(self.category_order)
         # orderリストの順序に合わせてentriesを整理
         ordered_entries = {}
-        for category in self.category_order:
+        for category in order:
             if category in self.one_click_entries:
-                ordered_entries[category] = self.one_click_entries[category]
-
+                # 未読み込みの本文は読まずに参照だけを複製する（本文はライタースレッドで複写）
+                ordered_entries[category] = [
+                    entry.copy() for entry in self.one_click_entries[category]
+                ]
         # 新しいJSON構造（順序情報を含む）
-        json_data = {"order": self.category_order, "entries": ordered_entries}
-
-        # settingsフォルダのパスを取得し、そこにJSONを保存
-        settings_dir = os.path.join(os.getcwd(), "settings")
-        json_path = os.path.join(settings_dir, "one_click.json")
+        return {"order": order, "entries": ordered_entries}
 
+    def _persist(self):
+        """
+        保留中の編集を永続化します（ライタースレッドから呼び出されます）。
+        通常は編集レコードをジャーナルへ追記するだけで、ジャーナルが大きくなった場合や
+        明示的に要求された場合はスナップショットを原子的に書き込んでジャーナルを統合します。
+        """
+        with self._lock:
+            records = self._pending_records
+            self._pending_records = []
+            compact = self._compact_requested or self.store.needs_compaction()
+            # トランザクション中のメモリ上のデータは未確定のため、統合はコミット後に持ち越す
+            deferred = compact and self._txn_depth > 0
+            if deferred:
+                compact = False
+            # 外部エディタで編集されたファイルは上書きせず、編集はジャーナルに残す
+            if compact and not self.store.requires_snapshot and self.store.modified_externally():
+                compact = False
+            json_data = self._snapshot() if compact else None
+            self._compact_requested = deferred and self._compact_requested
         try:
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=4)
+            # 書き込んだバイト数（SQLiteへの追記はレコード数）も合わせて集計する
+            with instrumentation.timer("one_click.save") as timer:
+                if json_data is not None:
+                    timer.value = self.store.write_snapshot(json_data, records)
+                else:
+                    timer.value = self.store.append(records)
         except Exception as e:
             print(f"one_click.json の保存に失敗しました: {e}")
+            # 失敗した編集は次回の書き込みで再試行する
+            with self._lock:
+                self._pending_records[:0] = records
+                self._compact_requested = self._compact_requested or json_data is not None
 
     def update_entry(self, category, index, title, text):
         """
@@ -216,11 +542,15 @@ class OneClickManager:
         """
         if category in self.one_click_entries and 0 <= index < len(
                 self.one_click_entries[category]):
-            self.one_click_entries[category][index]["title"] = title
-            self.one_click_entries[category][index]["text"] = text
+            self._apply({
+                "op": "update",
+                "category": category,
+                "index": index,
+                "title": title,
+                "text": text
+            })
             self.current_category = category
             self.current_index = index
-            self.save_one_click_entries()
             return True
         return False
 
@@ -234,14 +564,57 @@ class OneClickManager:
         
         戻り値:
           dict: エントリー情報（title, textのキーを持つ辞書）
+
+        例外:
+          SnapshotChangedError: one_click.json が外部で変更され、本文を読み込めない場合
+            （reload で再読み込みしてから取得し直してください）
         """
         if category in self.one_click_entries and 0 <= index < len(
                 self.one_click_entries[category]):
+            entry = self.one_click_entries[category][index]
+            # 本文はここで読み込み、読み込めない場合は選択状態を変えずに例外を送出する
+            result = {"title": entry["title"], "text": entry["text"]}
             self.current_category = category
             self.current_index = index
-            return self.one_click_entries[category][index]
+            return result
         return {"title": "", "text": ""}
 
+    def read_entries(self, category, indices=None):
+        """
+        カテゴリのエントリーを本文ごとまとめて取得します（検索インデックスの構築用）。
+        未読み込みの本文はストアから一括で読み込み、本文のキャッシュには残しません。
+        UIスレッド以外から呼び出すこともできます。
+
+        引数:
+          category (str): カテゴリ名
+          indices (list): 取得するインデックス。省略時はカテゴリの全エントリー
+
+        戻り値:
+          list: (インデックス, タイトル, 本文) のタプルのリスト
+
+        例外:
+          SnapshotChangedError: one_click.json が外部で変更され、本文を読み込めない場合
+        """
+        with self._lock:
+            entries = self.one_click_entries.get(category, [])
+            if indices is None:
+                indices = range(len(entries))
+            rows = []
+            pending = []  # (rowsの位置, 本文の参照)
+            for index in indices:
+                if 0 <= index < len(entries):
+                    entry = entries[index]
+                    ref = getattr(entry, "body_ref", None)
+                    if ref is not None:
+                        pending.append((len(rows), ref))
+                    rows.append([index, entry["title"], None if ref is not None else entry["text"]])
+        # 本文の読み込みはロックの外で行い、その間の編集を妨げない
+        if pending:
+            texts = self.store.read_bodies([ref for _, ref in pending])
+            for (position, _), text in zip(pending, texts):
+                rows[position][2] = text
+        return [tuple(row) for row in rows]
+
     def swap_entries(self, category, index1, index2):
         """
         同じカテゴリ内の2つのエントリーを入れ替えます。
@@ -259,8 +632,7 @@ class OneClickManager:
                 0 <= index2 < len(self.one_click_entries[category])):
 
             # エントリーを入れ替え
-            entries = self.one_click_entries[category]
-            entries[index1], entries[index2] = entries[index2], entries[index1]
+            self._apply({"op": "swap", "category": category, "i": index1, "j": index2})
 
             # 現在選択中のインデックスを更新
             if self.current_index == index1:
@@ -268,33 +640,69 @@ class OneClickManager:
             elif self.current_index == index2:
                 self.current_index = index1
 
-            self.save_one_click_entries()
             return True
         return False
 
-    def get_target_index(self, current, direction):
+    def get_target_index(self, current, direction, count=None):
         """
-        現在のインデックスから指定された方向への移動先インデックスを計算します。（2列グリッドを前提）
+        現在のインデックスから指定された方向への移動先インデックスを計算します。
+        グリッドの列数は self.columns に従います。
         
         引数:
           current (int): 現在のインデックス
           direction (str): "up"、"down"、"left"、"right"
+          count (int): エントリー総数。省略時は選択中カテゴリのエントリー数
         
         戻り値:
           int または None: 新しいインデックス。移動できない場合は None を返す
         """
+        columns = self.columns
+        if count is None:
+            count = self.entry_count(self.current_category)
         if direction == "up":
-            new_index = current - 2 if current >= 2 else None
+            new_index = current - columns if current >= columns else None
         elif direction == "down":
-            new_index = current + 2 if current + 2 < DEFAULT_ENTRY_COUNT else None
+            new_index = current + columns if current + columns < count else None
         elif direction == "left":
-            new_index = current - 1 if current % 2 == 1 else None
+            new_index = current - 1 if current % columns != 0 else None
         elif direction == "right":
-            new_index = current + 1 if current % 2 == 0 and current + 1 < DEFAULT_ENTRY_COUNT else None
+            new_index = current + 1 if (current % columns != columns - 1 and
+                                        current + 1 < count) else None
         else:
             new_index = None
         return new_index
 
+    def entry_count(self, category):
+        """
+        指定されたカテゴリのエントリー数を返します。
+
+        引数:
+          category (str): カテゴリ名
+
+        戻り値:
+          int: エントリー数。カテゴリが存在しない場合は DEFAULT_ENTRY_COUNT
+        """
+        entries = self.one_click_entries.get(category)
+        return DEFAULT_ENTRY_COUNT if entries is None else len(entries)
+
+    def add_entries(self, category, count=None):
+        """
+        指定されたカテゴリの末尾に空のエントリーを追加します。
+
+        引数:
+          category (str): カテゴリ名
+          count (int): 追加する数。省略時はグリッド1行分（列数）
+
+        戻り値:
+          bool: 追加が成功したかどうか
+        """
+        if category not in self.one_click_entries:
+            return False
+        count = self.columns if count is None else count
+        if count <= 0:
+            return False
+        return self._apply({"op": "add_entries", "category": category, "count": count})
+
     def rename_category(self, old_name, new_name):
         """
         カテゴリ名を変更します。
@@ -320,21 +728,12 @@ class OneClickManager:
             messagebox.showerror("エラー", "カテゴリ名を入力してください")
             return False
 
-        # カテゴリ名を変更（順序を維持）
-        self.one_click_entries[new_name] = self.one_click_entries.pop(old_name)
-
-        # カテゴリ順序リストも更新（重要: 同じインデックス位置で名前のみ変更）
-        for i, cat in enumerate(self.category_order):
-            if cat == old_name:
-                self.category_order[i] = new_name
-                break
+        # カテゴリ名を変更（順序を維持し、同じインデックス位置で名前のみ変更）
+        self._apply({"op": "rename", "old": old_name, "new": new_name})
 
         # 現在選択中のカテゴリを更新
         if self.current_category == old_name:
             self.current_category = new_name
-
-        # 変更を保存（JSONファイルの保存位置は変わりません）
-        self.save_one_click_entries()
         return True
 
     def remove_category(self, category):
@@ -342,15 +741,12 @@ class OneClickManager:
         指定されたカテゴリを削除します
         """
         if category in self.category_order:
-            # 順序リストからカテゴリを削除
-            self.category_order.remove(category)
-
-            # エントリー辞書からカテゴリを削除
-            if category in self.one_click_entries:
-                del self.one_click_entries[category]
+            # 順序リストとエントリー辞書からカテゴリを削除
+            self._apply({"op": "remove_category", "category": category})
 
-            # 変更をJSONファイルに保存
-            self.save_one_click_entries()
+            if self.current_category == category:
+                self.current_category = None
+                self.current_index = None
             return True
         return False
 
@@ -365,10 +761,156 @@ class OneClickManager:
             messagebox.showwarning("警告", f"カテゴリタブは{MAX_CATEGORIES}つまでしか設定できません。")
             return False
 
-        self.category_order.append(category)
-        self.one_click_entries[category] = [{
-            "title": "",
-            "text": ""
-        } for _ in range(DEFAULT_ENTRY_COUNT)]
-        self.save_one_click_entries()
+        self._apply({"op": "add_category", "category": category, "count": DEFAULT_ENTRY_COUNT})
+        return True
+
+    def swap_categories(self, index1, index2):
+        """
+        カテゴリ（タブ）の表示順を入れ替えます。
+
+        引数:
+          index1 (int): 1つ目のカテゴリの位置
+          index2 (int): 2つ目のカテゴリの位置
+
+        戻り値:
+          bool: 入れ替えが成功したかどうか
+        """
+        return self._apply({"op": "swap_categories", "i": index1, "j": index2})
+
+    def clear_entries(self, category, start=0, stop=None):
+        """
+        指定された範囲のエントリーのタイトルと定型文を空にします。
+
+        引数:
+          category (str): カテゴリ名
+          start (int): 範囲の先頭
+          stop (int): 範囲の末尾（この位置は含まない）。省略時はカテゴリの末尾
+
+        戻り値:
+          bool: 消去が成功したかどうか
+        """
+        if category not in self.one_click_entries:
+            return False
+        count = len(self.one_click_entries[category])
+        stop = count if stop is None else min(stop, count)
+        start = max(0, start)
+        if start >= stop:
+            return False
+        return self._apply({"op": "clear", "category": category, "start": start, "stop": stop})
+
+    def move_range(self, category, start, stop, dest):
+        """
+        範囲 [start, stop) のエントリーをまとめて dest の位置へ移動します。
+        dest は範囲を取り除いた後の並びにおける挿入位置です。
+
+        引数:
+          category (str): カテゴリ名
+          start (int): 移動する範囲の先頭
+          stop (int): 移動する範囲の末尾（この位置は含まない）
+          dest (int): 挿入位置
+
+        戻り値:
+          bool: 移動が成功したかどうか
+        """
+        items = self.one_click_entries.get(category)
+        if items is None or not 0 <= start < stop <= len(items):
+            return False
+        dest = min(max(0, dest), len(items) - (stop - start))
+        order = move_range_order(len(items), start, stop, dest)
+        if not self._apply({
+                "op": "move_range",
+                "category": category,
+                "start": start,
+                "stop": stop,
+                "dest": dest
+        }):
+            return False
+        # 選択中のエントリーが移動先でも選択されたままになるようにする
+        if self.current_category == category and self.current_index is not None:
+            self.current_index = order.index(self.current_index)
         return True
+
+    def copy_category(self, source, new_name):
+        """
+        カテゴリをエントリーごと複製し、末尾に追加します。
+
+        引数:
+          source (str): 複製元のカテゴリ名
+          new_name (str): 新しいカテゴリ名
+
+        戻り値:
+          bool: 複製が成功したかどうか
+        """
+        if source not in self.one_click_entries or new_name in self.one_click_entries:
+            return False
+        if not new_name.strip():
+            return False
+        if len(self.category_order) >= MAX_CATEGORIES:
+            messagebox.showwarning("警告", f"カテゴリタブは{MAX_CATEGORIES}つまでしか設定できません。")
+            return False
+        return self._apply({"op": "copy_category", "source": source, "category": new_name})
+
+    def import_entries(self, path, category=None, delimiter=None):
+        """
+        CSV/TSVファイルから定型文をまとめて取り込みます。
+        2列の行は「タイトル, 定型文」として category に、3列の行は
+        「カテゴリ, タイトル, 定型文」として指定カテゴリに取り込みます（無ければ作成）。
+        空きエントリー（タイトルと定型文が空）を先頭から埋め、足りない分は末尾に追加します。
+        取り込みは1つのトランザクションで行い、途中で失敗した場合は何も変更しません。
+
+        引数:
+          path (str): 取り込むファイルのパス
+          category (str): 2列の行の取り込み先。省略時は選択中のカテゴリ
+          delimiter (str): 区切り文字。省略時は拡張子から判定（.tsv/.txtはタブ、それ以外はカンマ）
+
+        戻り値:
+          int: 取り込んだエントリー数
+        """
+        if delimiter is None:
+            ext = os.path.splitext(path)[1].lower()
+            delimiter = "\t" if ext in (".tsv", ".txt") else ","
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = [row for row in csv.reader(f, delimiter=delimiter) if any(row)]
+
+        imported = 0
+        with self.transaction():
+            for line_no, row in enumerate(rows, 1):
+                if len(row) == 2:
+                    target = category or self.current_category
+                    title, text = row
+                elif len(row) == 3:
+                    target, title, text = row
+                else:
+                    raise ValueError(f"{path}:{line_no}: 列数が不正です（{len(row)}列）")
+                if not target:
+                    raise ValueError(f"{path}:{line_no}: 取り込み先のカテゴリが指定されていません")
+                if target not in self.one_click_entries and not self.add_category(target):
+                    raise ValueError(f"{path}:{line_no}: カテゴリ「{target}」を追加できません")
+                index = self._first_empty_index(target)
+                if index is None:
+                    index = len(self.one_click_entries[target])
+                    self.add_entries(target)
+                self._apply({
+                    "op": "update",
+                    "category": target,
+                    "index": index,
+                    "title": title,
+                    "text": text
+                })
+                imported += 1
+        return imported
+
+    def _first_empty_index(self, category):
+        """
+        タイトルと定型文がどちらも空の最初のエントリーのインデックスを返します。
+
+        引数:
+          category (str): カテゴリ名
+
+        戻り値:
+          int または None: 空きが無い場合はNone
+        """
+        for index, entry in enumerate(self.one_click_entries.get(category, [])):
+            if not entry["title"] and not entry["text"]:
+                return index
+        return None
@@ -0,0 +1,493 @@
+"""
+one_click_sqlite_store.py
+ワンクリックデータをSQLiteデータベースで管理するストレージバックエンドです。
+読み込み時はタイトルと行IDだけをメモリに持ち、定型文本文は参照時に主キーで1件ずつ読み込みます。
+トランザクションによる並べ替え、FTS5による全文検索を提供し、外部編集用に one_click.json への
+書き出しも継続します。
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from src.core.one_click_store import LazyEntry, atomic_write_json, move_range_order
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    text TEXT NOT NULL DEFAULT '',
+    UNIQUE (category_id, position)
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, text, content='entries', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, text)
+    VALUES ('delete', old.id, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE OF title, text ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, text)
+    VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO entries_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+"""
+
+EXPORT_RECORD_LIMIT = 200  # この件数の編集ごとに one_click.json へ書き出す
+TRIGRAM_MIN_LENGTH = 3  # trigramトークナイザで検索できる最短の文字数
+CONFLICT_SUFFIX = ".conflict"  # 外部編集で置き換える前に、データベースの内容を退避するファイル
+
+
+class RowRef:
+    """
+    データベース上の定型文本文（entries テーブルの行）を表すクラスです。
+    行の本文は後から書き換わるため、カテゴリを複製する場合は参照を共有せずに本文を読み込みます。
+
+    引数:
+      row_id (int): entries テーブルの行ID
+    """
+    __slots__ = ("row_id",)
+    immutable = False
+
+    def __init__(self, row_id):
+        """
+        コンストラクタ
+
+        引数:
+          row_id (int): entries テーブルの行ID
+        """
+        self.row_id = row_id
+
+
+class SqliteOneClickStore:
+    """
+    one_click.db を主データとし、one_click.json を書き出し先として扱うストアです。
+    one_click.json が前回の書き出し以降に外部で編集されていた場合は、
+    次回読み込み時にJSONの内容を取り込みます（旧形式を含む全形式に対応）。
+
+    引数:
+      db_path (str): SQLiteデータベースのパス
+      json_path (str): one_click.json のパス
+    """
+
+    def __init__(self, db_path, json_path):
+        """
+        コンストラクタ
+
+        引数:
+          db_path (str): SQLiteデータベースのパス
+          json_path (str): one_click.json のパス
+        """
+        self.db_path = db_path
+        self.json_path = json_path
+        self.requires_snapshot = False
+        # 外部編集で置き換えた際に、未書き出しの編集を退避したファイル（読み込み時に設定）
+        self.conflict_path = None
+        # UIスレッドとライタースレッドの双方から利用するため、接続をロックで保護する
+        self._db_lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(SCHEMA)
+        self.fts_enabled = self._create_fts()
+        # 前回の書き出し以降にDBへ反映した編集数（再起動後も書き出しが必要か判定できるよう保存する）
+        self.journal_records = int(self._get_meta("unexported") or 0)
+
+    def _create_fts(self):
+        """
+        FTS5の全文検索テーブルを作成します。日本語の部分一致のためtrigramを優先します。
+
+        戻り値:
+          bool: FTS5が利用できる場合はTrue
+        """
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                self._conn.executescript(FTS_SCHEMA.format(tokenizer=tokenizer))
+            except sqlite3.OperationalError:
+                continue
+            self.trigram = tokenizer == "trigram"
+            return True
+        self.trigram = False
+        return False
+
+    def close(self):
+        """
+        データベース接続を閉じます。
+        """
+        with self._db_lock:
+            self._conn.close()
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    def _json_mtime(self):
+        if not os.path.exists(self.json_path):
+            return None
+        return repr(os.path.getmtime(self.json_path))
+
+    def _has_data(self):
+        return self._conn.execute("SELECT 1 FROM categories LIMIT 1").fetchone() is not None
+
+    def exists(self):
+        """
+        読み込めるデータが存在するかどうかを返します。
+
+        戻り値:
+          bool: データベースかJSONにデータがある場合はTrue
+        """
+        with self._db_lock:
+            return self._has_data() or os.path.exists(self.json_path)
+
+    def modified_externally(self):
+        """
+        前回の書き出し以降に one_click.json が外部で変更されたかどうかを判定します。
+
+        戻り値:
+          bool: 外部で変更された場合はTrue
+        """
+        with self._db_lock:
+            exported = self._get_meta("json_mtime")
+        current = self._json_mtime()
+        return current is not None and current != exported
+
+    def read_snapshot(self):
+        """
+        データを読み込みます。データベースが空の場合や one_click.json が外部で
+        編集されていた場合は、JSONの内容をそのまま返し、DBへの取り込みを要求します。
+        JSONへ書き出していない編集がデータベースに残っている場合は、置き換える前に
+        データベースの内容を one_click.json.conflict へ退避し、conflict_path に設定します。
+
+        戻り値:
+          object: 新形式の辞書、またはJSONから読み込んだデータ。データが無い場合はNone
+        """
+        self.conflict_path = None
+        with self._db_lock:
+            has_data = self._has_data()
+        if not has_data or self.modified_externally():
+            self.requires_snapshot = True
+            if not os.path.exists(self.json_path):
+                return None
+            if has_data and self.journal_records:
+                conflict_path = self.json_path + CONFLICT_SUFFIX
+                try:
+                    atomic_write_json(conflict_path, self._read_rows(with_text=True))
+                except OSError as e:
+                    # 退避できない場合は、データベースの編集を失わないよう取り込みを見送る
+                    print(f"{conflict_path} の書き込みに失敗したため、外部での編集を取り込みません: {e}")
+                    self.requires_snapshot = False
+                    return self.read_all()
+                self.conflict_path = conflict_path
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        self.requires_snapshot = False
+        return self.read_all()
+
+    def read_all(self):
+        """
+        データベースから全カテゴリとエントリーのタイトルを読み込みます。
+        エントリーは LazyEntry で、本文は参照した時に read_body で読み込みます。
+
+        戻り値:
+          dict: order と entries を持つ辞書
+        """
+        return self._read_rows(with_text=False)
+
+    def _read_rows(self, with_text):
+        """
+        データベースから全カテゴリとエントリーを読み込みます。
+
+        引数:
+          with_text (bool): 本文も読み込むかどうか（Falseの場合は LazyEntry を返します）
+
+        戻り値:
+          dict: order と entries を持つ辞書
+        """
+        column = "text" if with_text else "id"
+        with self._db_lock:
+            categories = self._conn.execute(
+                "SELECT id, name FROM categories ORDER BY position").fetchall()
+            entries = {name: [] for _, name in categories}
+            names = dict(categories)
+            rows = self._conn.execute(f"SELECT category_id, title, {column} FROM entries "
+                                      "ORDER BY category_id, position")
+            for category_id, title, value in rows:
+                if with_text:
+                    entry = {"title": title, "text": value}
+                else:
+                    entry = LazyEntry(title, RowRef(value), self.read_body)
+                entries[names[category_id]].append(entry)
+        return {"order": [name for _, name in categories], "entries": entries}
+
+    def read_body(self, ref):
+        """
+        行IDの索引を使って定型文本文を1件読み込みます。
+
+        引数:
+          ref (RowRef): 本文の行
+
+        戻り値:
+          str: 本文
+
+        例外:
+          KeyError: 行が削除されている場合
+        """
+        with self._db_lock:
+            row = self._conn.execute("SELECT text FROM entries WHERE id = ?",
+                                     (ref.row_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"定型文の行 {ref.row_id} が見つかりません")
+        return row[0]
+
+    def read_bodies(self, refs):
+        """
+        複数の定型文本文をまとめて読み込みます（検索インデックスの構築用）。
+
+        引数:
+          refs (list): RowRef のリスト
+
+        戻り値:
+          list: refs と同じ順の本文のリスト
+
+        例外:
+          KeyError: 行が削除されている場合
+        """
+        ids = [ref.row_id for ref in refs]
+        texts = {}
+        with self._db_lock:
+            # SQLiteのバインド変数の上限を超えないように分割して問い合わせる
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                texts.update(self._conn.execute(
+                    f"SELECT id, text FROM entries WHERE id IN ({placeholders})", chunk))
+        missing = [row_id for row_id in ids if row_id not in texts]
+        if missing:
+            raise KeyError(f"定型文の行 {missing[0]} が見つかりません")
+        return [texts[row_id] for row_id in ids]
+
+    def read_journal(self):
+        """
+        SQLiteは編集をトランザクションで確定させるため、再生すべきジャーナルはありません。
+
+        戻り値:
+          list: 常に空リスト
+        """
+        return []
+
+    def needs_compaction(self):
+        """
+        one_click.json への書き出しが必要かどうかを判定します。
+
+        戻り値:
+          bool: 書き出しが必要な場合はTrue
+        """
+        return self.journal_records >= EXPORT_RECORD_LIMIT
+
+    def _category_id(self, name):
+        row = self._conn.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def _swap_positions(self, sql, args, i, j):
+        """
+        一意制約を保ったまま2つの位置を入れ替えます。
+        sql は "UPDATE ... SET position = ? WHERE ... AND position = ?" 形式の文です。
+        """
+        self._conn.execute(sql, (-1, *args, i))
+        self._conn.execute(sql, (i, *args, j))
+        self._conn.execute(sql, (j, *args, -1))
+
+    def _apply_sql(self, record):
+        """
+        編集レコードを1件、SQLとして実行します（トランザクション内で呼び出すこと）。
+        """
+        op = record.get("op")
+        if op == "update":
+            self._conn.execute(
+                "UPDATE entries SET title = ?, text = ? WHERE category_id = ? AND position = ?",
+                (record["title"], record["text"], self._category_id(
+                    record["category"]), record["index"]))
+        elif op == "swap":
+            self._swap_positions(
+                "UPDATE entries SET position = ? WHERE category_id = ? AND position = ?",
+                (self._category_id(record["category"]),), record["i"], record["j"])
+        elif op == "rename":
+            self._conn.execute("UPDATE categories SET name = ? WHERE name = ?",
+                               (record["new"], record["old"]))
+        elif op == "add_category":
+            position = self._conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM categories").fetchone()[0]
+            cursor = self._conn.execute("INSERT INTO categories(name, position) VALUES (?, ?)",
+                                        (record["category"], position))
+            self._conn.executemany(
+                "INSERT INTO entries(category_id, position) VALUES (?, ?)",
+                [(cursor.lastrowid, i) for i in range(record["count"])])
+        elif op == "add_entries":
+            category_id = self._category_id(record["category"])
+            start = self._conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM entries WHERE category_id = ?",
+                (category_id,)).fetchone()[0]
+            self._conn.executemany("INSERT INTO entries(category_id, position) VALUES (?, ?)",
+                                   [(category_id, start + i) for i in range(record["count"])])
+        elif op == "clear":
+            self._conn.execute(
+                "UPDATE entries SET title = '', text = '' "
+                "WHERE category_id = ? AND position >= ? AND position < ?",
+                (self._category_id(record["category"]), record["start"], record["stop"]))
+        elif op == "move_range":
+            category_id = self._category_id(record["category"])
+            length = self._conn.execute("SELECT COUNT(*) FROM entries WHERE category_id = ?",
+                                        (category_id,)).fetchone()[0]
+            new_order = move_range_order(length, record["start"], record["stop"], record["dest"])
+            # 一意制約を避けるため、いったん負の位置へ移してから確定させる
+            self._conn.executemany(
+                "UPDATE entries SET position = ? WHERE category_id = ? AND position = ?",
+                [(-1 - new, category_id, old) for new, old in enumerate(new_order) if new != old])
+            self._conn.execute(
+                "UPDATE entries SET position = -1 - position "
+                "WHERE category_id = ? AND position < 0",
+                (category_id,))
+        elif op == "copy_category":
+            source_id = self._category_id(record["source"])
+            position = self._conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM categories").fetchone()[0]
+            cursor = self._conn.execute("INSERT INTO categories(name, position) VALUES (?, ?)",
+                                        (record["category"], position))
+            self._conn.execute(
+                "INSERT INTO entries(category_id, position, title, text) "
+                "SELECT ?, position, title, text FROM entries WHERE category_id = ?",
+                (cursor.lastrowid, source_id))
+        elif op == "remove_category":
+            position = self._conn.execute("SELECT position FROM categories WHERE name = ?",
+                                          (record["category"],)).fetchone()[0]
+            self._conn.execute("DELETE FROM categories WHERE name = ?", (record["category"],))
+            self._conn.execute("UPDATE categories SET position = position - 1 WHERE position > ?",
+                               (position,))
+        elif op == "swap_categories":
+            self._swap_positions("UPDATE categories SET position = ? WHERE position = ?", (),
+                                 record["i"], record["j"])
+
+    def append(self, records):
+        """
+        編集レコードを1つのトランザクションでデータベースに反映します。
+
+        引数:
+          records (list): 編集レコードのリスト
+
+        戻り値:
+          int: 反映したレコード数
+        """
+        if not records:
+            return 0
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for record in records:
+                    self._apply_sql(record)
+                self._set_meta("unexported", str(self.journal_records + len(records)))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        self.journal_records += len(records)
+        return len(records)
+
+    def _replace_all(self, json_data):
+        """
+        データベースの内容を新形式データで置き換えます（トランザクション内で呼び出すこと）。
+        """
+        self._conn.execute("DELETE FROM entries")
+        self._conn.execute("DELETE FROM categories")
+        for position, name in enumerate(json_data["order"]):
+            cursor = self._conn.execute("INSERT INTO categories(name, position) VALUES (?, ?)",
+                                        (name, position))
+            self._conn.executemany(
+                "INSERT INTO entries(category_id, position, title, text) VALUES (?, ?, ?, ?)",
+                [(cursor.lastrowid, i, e.get("title", ""), e.get("text", ""))
+                 for i, e in enumerate(json_data["entries"].get(name, []))])
+
+    def write_snapshot(self, json_data, records=()):
+        """
+        データベースを確定させ、one_click.json へ書き出します。
+        JSONからの取り込みが必要な場合は全体を置き換え、そうでなければ保留中の編集のみ反映します。
+        書き出す内容は、未読み込みの本文を含めてデータベースから読み込みます。
+
+        引数:
+          json_data (dict): order と entries を持つ保存用データ
+          records (list): スナップショット以前の未反映の編集レコード
+
+        戻り値:
+          int: one_click.json に書き込んだバイト数
+        """
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.requires_snapshot:
+                    self._replace_all(json_data)
+                else:
+                    for record in records:
+                        self._apply_sql(record)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            written = atomic_write_json(self.json_path, self._read_rows(with_text=True))
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._set_meta("json_mtime", self._json_mtime())
+            self._set_meta("unexported", "0")
+            self._conn.execute("COMMIT")
+        self.requires_snapshot = False
+        self.journal_records = 0
+        return written
+
+    def search(self, query, limit=50):
+        """
+        タイトルと定型文を全文検索します。
+
+        引数:
+          query (str): 検索文字列
+          limit (int): 最大件数
+
+        戻り値:
+          list: (カテゴリ名, 位置, タイトル) のタプルのリスト
+        """
+        query = query.strip()
+        if not query:
+            return []
+        select = ("SELECT c.name, e.position, e.title FROM entries e "
+                  "JOIN categories c ON c.id = e.category_id ")
+        with self._db_lock:
+            if self.fts_enabled and (not self.trigram or len(query) >= TRIGRAM_MIN_LENGTH):
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self._conn.execute(
+                    select + "JOIN entries_fts f ON f.rowid = e.id WHERE entries_fts MATCH ? "
+                    "ORDER BY c.position, e.position LIMIT ?", (phrase, limit)).fetchall()
+            else:
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace(
+                    "_", "\\_") + "%"
+                rows = self._conn.execute(
+                    select + "WHERE e.title LIKE ? ESCAPE '\\' OR e.text LIKE ? ESCAPE '\\' "
+                    "ORDER BY c.position, e.position LIMIT ?", (pattern, pattern, limit)).fetchall()
+        return [tuple(row) for row in rows]
@@ -0,0 +1,765 @@
+"""
+one_click_store.py
+ワンクリックデータの永続化（クラッシュ耐性のある書き込みと編集ジャーナル）を担当するモジュールです。
+スナップショットは一時ファイルへの書き込み・fsync・リネームで原子的に置き換え、
+個々の編集は追記専用のジャーナルに小さなレコードとして記録します。
+ジャーナルの先頭行には世代番号を記録し、索引には統合済みの世代を記録するため、
+スナップショットの置き換え後・ジャーナルの削除前にクラッシュしても、統合済みの編集は再生されません。
+スナップショットと同時にタイトルと定型文の位置だけを持つ索引（one_click.json.idx）を書き出し、
+定型文の本文は必要になった時点でファイルから読み込みます。
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+JOURNAL_SUFFIX = ".journal"
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+BODY_CACHE_SIZE = 64  # 最近使用した定型文本文を保持する件数
+COMPACT_RECORD_LIMIT = 200  # ジャーナルのレコード数がこれを超えたらスナップショットへ統合
+COMPACT_BYTE_LIMIT = 256 * 1024  # ジャーナルのサイズがこれを超えたらスナップショットへ統合
+
+
+class SnapshotChangedError(Exception):
+    """
+    one_click.json が索引の作成後に外部で変更され、索引の位置から定型文本文を読み込めない場合に
+    送出される例外です。再読み込みすると、変更後のファイルから本文を読み込めます。
+    """
+
+
+def _fsync_directory(dir_path):
+    """
+    リネーム結果を確定させるため、ディレクトリをfsyncします（対応OSのみ）。
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(dir_path, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_temp(path, data):
+    """
+    バイト列を一時ファイルへ書き込んでfsyncし、そのパスを返します。
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    return tmp_path
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def atomic_write_bytes(path, data):
+    """
+    バイト列を一時ファイルへ書き込み、fsync後にリネームして原子的に置き換えます。
+    書き込み途中でクラッシュしても元のファイルは破損しません。
+
+    引数:
+      path (str): 書き込み先ファイルのパス
+      data (bytes): 書き込む内容
+
+    戻り値:
+      int: 書き込んだバイト数
+    """
+    tmp_path = _write_temp(path, data)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+    return len(data)
+
+
+def atomic_write_text(path, text):
+    """
+    テキストを原子的にファイルへ書き込みます。
+
+    引数:
+      path (str): 書き込み先ファイルのパス
+      text (str): 書き込む内容
+
+    戻り値:
+      int: 書き込んだバイト数
+    """
+    return atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path, json_data):
+    """
+    JSONデータを原子的にファイルへ書き込みます。
+
+    引数:
+      path (str): 書き込み先ファイルのパス
+      json_data (object): 書き込むJSONデータ
+
+    戻り値:
+      int: 書き込んだバイト数
+    """
+    return atomic_write_text(path, json.dumps(json_data, ensure_ascii=False, indent=4))
+
+
+class BodyRef:
+    """
+    one_click.json 内の定型文本文（JSON文字列リテラル）の位置を表すクラスです。
+    スナップショットを書き直すと、同じ本文を指したまま新しい位置へ付け替えられます。
+
+    引数:
+      offset (int): 先頭のバイト位置
+      length (int): バイト長
+    """
+    __slots__ = ("offset", "length")
+    immutable = True  # 参照先の本文は書き換わらない（複製したエントリーと共有できる）
+
+    def __init__(self, offset, length):
+        """
+        コンストラクタ
+
+        引数:
+          offset (int): 先頭のバイト位置
+          length (int): バイト長
+        """
+        self.offset = offset
+        self.length = length
+
+
+class LazyEntry(MutableMapping):
+    """
+    タイトルだけをメモリに持ち、定型文本文は参照時に読み込むエントリーです。
+    "title" と "text" をキーに持つ辞書として扱え、本文を書き換えると以降はメモリ上の値を使います。
+
+    引数:
+      title (str): タイトル
+      ref (BodyRef): 本文の位置
+      loader (callable): BodyRef から本文を読み込む関数
+    """
+    __slots__ = ("title", "_text", "_ref", "_loader")
+
+    def __init__(self, title, ref, loader):
+        """
+        コンストラクタ
+
+        引数:
+          title (str): タイトル
+          ref (BodyRef): 本文の位置
+          loader (callable): BodyRef から本文を読み込む関数
+        """
+        self.title = title
+        self._text = None
+        self._ref = ref
+        self._loader = loader
+
+    @property
+    def body_ref(self):
+        """
+        本文がまだ読み込まれていない（ファイル上の本文を指している）場合はその位置を返します。
+
+        戻り値:
+          BodyRef または None: 本文が書き換えられている場合はNone
+        """
+        return self._ref
+
+    def __getitem__(self, key):
+        if key == "title":
+            return self.title
+        if key == "text":
+            return self._text if self._ref is None else self._loader(self._ref)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "title":
+            self.title = value
+        elif key == "text":
+            self._text = value
+            self._ref = None
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("LazyEntry のキーは削除できません")
+
+    def __contains__(self, key):
+        # Mapping既定の実装は値を読み込んでしまうため、キーの有無だけで判定する
+        return key in ("title", "text")
+
+    def __iter__(self):
+        return iter(("title", "text"))
+
+    def __len__(self):
+        return 2
+
+    def __repr__(self):
+        return f"LazyEntry(title={self.title!r})"
+
+    def copy(self):
+        """
+        同じ本文を参照するコピーを作成します（本文は読み込みません）。
+
+        戻り値:
+          LazyEntry: コピー
+        """
+        entry = LazyEntry(self.title, self._ref, self._loader)
+        entry._text = self._text
+        return entry
+
+
+def dumps_with_index(json_data, read_literal=None):
+    """
+    新形式のデータを json.dumps(indent=4, ensure_ascii=False) と同じ書式で直列化し、
+    各定型文本文の位置を記録した索引を作成します。
+
+    引数:
+      json_data (dict): order と entries を持つ保存用データ
+      read_literal (callable): BodyRef から本文のJSON文字列リテラル（bytes）を返す関数。
+        未読み込みの LazyEntry の本文は、元のファイルからデコードせずにそのまま複写します
+
+    戻り値:
+      tuple: (直列化したバイト列, 索引の entries, [(BodyRef, 新しい位置, 長さ), ...])
+    """
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False)
+
+    parts = []
+    size = 0
+
+    def emit(data):
+        nonlocal size
+        parts.append(data)
+        size += len(data)
+
+    index_entries = {}
+    rebased = []
+    order = json.dumps(json_data["order"], ensure_ascii=False, indent=4)
+    header = '{\n    "order": ' + order.replace("\n", "\n    ") + ',\n    "entries": '
+    emit(header.encode("utf-8"))
+    entries = json_data["entries"]
+    emit(b"{" if entries else b"{}")
+    for ci, (category, items) in enumerate(entries.items()):
+        key = f'{"," if ci else ""}\n        {dumps(category)}: {"[" if items else "[]"}'
+        emit(key.encode("utf-8"))
+        rows = index_entries[category] = []
+        for ei, entry in enumerate(items):
+            title = entry["title"]
+            emit(f'{"," if ei else ""}\n            {{\n                "title": {dumps(title)},'
+                 f'\n                "text": '.encode("utf-8"))
+            ref = getattr(entry, "body_ref", None)
+            if ref is not None and read_literal is not None:
+                literal = read_literal(ref)
+                rebased.append((ref, size, len(literal)))
+            else:
+                literal = dumps(entry["text"]).encode("utf-8")
+            rows.append([title, size, len(literal)])
+            emit(literal)
+            emit(b"\n            }")
+        if items:
+            emit(b"\n        ]")
+    if entries:
+        emit(b"\n    }")
+    emit(b"\n}")
+    return b"".join(parts), index_entries, rebased
+
+
+def copy_entry(entry):
+    """
+    カテゴリの複製用にエントリーを複製します。
+    本文の参照先が後から書き換わる場合（SQLiteの行など）は、参照を共有せずに本文を読み込みます。
+
+    引数:
+      entry (dict または LazyEntry): 複製元のエントリー
+
+    戻り値:
+      dict または LazyEntry: 複製したエントリー
+    """
+    ref = getattr(entry, "body_ref", None)
+    if ref is not None and not ref.immutable:
+        return {"title": entry["title"], "text": entry["text"]}
+    return entry.copy()
+
+
+def move_range_order(length, start, stop, dest):
+    """
+    範囲 [start, stop) を取り出して dest の位置へ挿入した後の並びを計算します。
+    dest は範囲を取り除いた後のリストにおける挿入位置です。
+
+    引数:
+      length (int): 要素数
+      start (int): 移動する範囲の先頭
+      stop (int): 移動する範囲の末尾（この位置は含まない）
+      dest (int): 挿入位置
+
+    戻り値:
+      list: 移動後の各位置に来る元のインデックスのリスト
+    """
+    positions = list(range(length))
+    block = positions[start:stop]
+    del positions[start:stop]
+    dest = min(max(0, dest), len(positions))
+    positions[dest:dest] = block
+    return positions
+
+
+def apply_record(order, entries, record):
+    """
+    編集レコードを1件、カテゴリ順序とエントリー辞書に適用します。
+    OneClickManagerの変更操作とジャーナルの再生はどちらもこの関数を通ります。
+
+    引数:
+      order (list): カテゴリ順序のリスト（直接更新されます）
+      entries (dict): カテゴリごとのエントリーリスト（直接更新されます）
+      record (dict): 編集レコード（"op"キーで種類を表す）
+
+    戻り値:
+      bool: レコードを適用できた場合はTrue
+    """
+    op = record.get("op")
+    if op == "update":
+        items = entries.get(record["category"])
+        index = record["index"]
+        if items is None or not 0 <= index < len(items):
+            return False
+        items[index]["title"] = record["title"]
+        items[index]["text"] = record["text"]
+    elif op == "swap":
+        items = entries.get(record["category"])
+        i, j = record["i"], record["j"]
+        if items is None or not (0 <= i < len(items) and 0 <= j < len(items)):
+            return False
+        items[i], items[j] = items[j], items[i]
+    elif op == "rename":
+        old, new = record["old"], record["new"]
+        if old not in entries or (new in entries and new != old):
+            return False
+        entries[new] = entries.pop(old)
+        order[order.index(old)] = new
+    elif op == "add_category":
+        category = record["category"]
+        if category in entries:
+            return False
+        order.append(category)
+        entries[category] = [{"title": "", "text": ""} for _ in range(record["count"])]
+    elif op == "add_entries":
+        items = entries.get(record["category"])
+        if items is None:
+            return False
+        items.extend({"title": "", "text": ""} for _ in range(record["count"]))
+    elif op == "clear":
+        items = entries.get(record["category"])
+        if items is None:
+            return False
+        for entry in items[record["start"]:record["stop"]]:
+            entry["title"] = ""
+            entry["text"] = ""
+    elif op == "move_range":
+        items = entries.get(record["category"])
+        start, stop = record["start"], record["stop"]
+        if items is None or not 0 <= start < stop <= len(items):
+            return False
+        items[:] = [items[i] for i in move_range_order(len(items), start, stop, record["dest"])]
+    elif op == "copy_category":
+        source, category = record["source"], record["category"]
+        if source not in entries or category in entries:
+            return False
+        order.append(category)
+        entries[category] = [copy_entry(entry) for entry in entries[source]]
+    elif op == "remove_category":
+        category = record["category"]
+        if category not in order:
+            return False
+        order.remove(category)
+        entries.pop(category, None)
+    elif op == "swap_categories":
+        i, j = record["i"], record["j"]
+        if not (0 <= i < len(order) and 0 <= j < len(order)):
+            return False
+        order[i], order[j] = order[j], order[i]
+    else:
+        return False
+    return True
+
+
+class JsonOneClickStore:
+    """
+    one_click.json と追記専用ジャーナル（one_click.json.journal）、
+    タイトル索引（one_click.json.idx）を管理するクラスです。
+    索引が one_click.json と一致していれば、本文を読まずにタイトルだけで読み込みを終えます。
+
+    引数:
+      json_path (str): one_click.json のパス
+    """
+
+    def __init__(self, json_path):
+        """
+        コンストラクタ
+
+        引数:
+          json_path (str): one_click.json のパス
+        """
+        self.json_path = json_path
+        self.journal_path = json_path + JOURNAL_SUFFIX
+        self.index_path = json_path + INDEX_SUFFIX
+        self.journal_records = 0
+        self.journal_bytes = 0
+        # 現在のジャーナルの世代と、スナップショットに統合済みの世代（索引から読み込む）
+        self.journal_generation = 0
+        self._compacted_generation = None
+        self.requires_snapshot = False
+        self._written_mtime = None
+        # 索引が指している one_click.json の (サイズ, 更新時刻ns)
+        self._indexed_stat = None
+        # 本文の読み込みとスナップショットの置き換えを排他するロックと、本文のLRUキャッシュ
+        self._body_lock = threading.Lock()
+        self._body_cache = OrderedDict()
+
+    def exists(self):
+        """
+        読み込めるデータが存在するかどうかを返します。
+
+        戻り値:
+          bool: one_click.json が存在する場合はTrue
+        """
+        return os.path.exists(self.json_path)
+
+    def close(self):
+        """
+        ストアを閉じます（JSONストアでは何もしません）。
+        """
+
+    def read_snapshot(self):
+        """
+        スナップショット（one_click.json）を読み込みます。
+        索引が有効な場合はタイトルと本文の位置だけを読み込み、エントリーを LazyEntry で返します。
+        索引が無いか古い場合はJSON全体を読み込み、索引を作り直すためにスナップショットの書き込みを要求します。
+
+        戻り値:
+          object: 読み込んだJSONデータ。ファイルが無い場合はNone
+        """
+        with self._body_lock:
+            self._body_cache.clear()
+            self._indexed_stat = None
+        self._compacted_generation = None
+        if not os.path.exists(self.json_path):
+            return None
+        json_data = self._read_index()
+        if json_data is None:
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                json_data = json.load(f)
+            self.requires_snapshot = True
+        self._written_mtime = os.path.getmtime(self.json_path)
+        return json_data
+
+    def _file_stat(self):
+        stat = os.stat(self.json_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _read_index(self):
+        """
+        索引を読み込み、one_click.json と一致していればタイトルのみのデータを返します。
+
+        戻り値:
+          dict または None: order と entries（LazyEntryのリスト）を持つ辞書。索引が使えない場合はNone
+        """
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            stat = self._file_stat()
+        except (OSError, ValueError):
+            return None
+        if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+            return None
+        if index.get("stat") != stat:
+            return None
+        entries = {
+            category: [LazyEntry(title, BodyRef(offset, length), self.read_body)
+                       for title, offset, length in rows]
+            for category, rows in index["entries"].items()
+        }
+        self._indexed_stat = stat
+        self._compacted_generation = index.get("journal")
+        return {"order": index["order"], "entries": entries}
+
+    def _read_literal(self, f, ref):
+        f.seek(ref.offset)
+        literal = f.read(ref.length)
+        if len(literal) != ref.length:
+            raise ValueError("定型文の位置がファイルの範囲外です")
+        return literal
+
+    def _open_indexed(self):
+        """
+        索引と一致している one_click.json をバイナリで開きます。
+
+        戻り値:
+          file または None: 索引が無いか、ファイルが外部で変更されている場合はNone
+        """
+        if self._indexed_stat is None:
+            return None
+        try:
+            f = open(self.json_path, "rb")
+        except OSError:
+            return None
+        stat = os.fstat(f.fileno())
+        if [stat.st_size, stat.st_mtime_ns] != self._indexed_stat:
+            f.close()
+            return None
+        return f
+
+    def _copy_literal(self, f, ref):
+        if f is None:
+            raise ValueError("one_click.json が外部で変更されたため、定型文を複写できません")
+        return self._read_literal(f, ref)
+
+    def read_body(self, ref):
+        """
+        索引の位置から定型文本文を読み込みます。最近使用した本文はキャッシュから返します。
+
+        引数:
+          ref (BodyRef): 本文の位置
+
+        戻り値:
+          str: 本文
+
+        例外:
+          SnapshotChangedError: ファイルが外部で変更され、索引の位置から読み込めない場合
+        """
+        with self._body_lock:
+            text = self._body_cache.get(ref)
+            if text is not None:
+                self._body_cache.move_to_end(ref)
+                return text
+            f = self._open_indexed()
+            if f is None:
+                raise SnapshotChangedError("one_click.json が外部で変更されています")
+            try:
+                with f:
+                    text = json.loads(self._read_literal(f, ref).decode("utf-8"))
+            except (OSError, ValueError) as e:
+                raise SnapshotChangedError(f"定型文を読み込めません: {e}") from e
+            self._body_cache[ref] = text
+            if len(self._body_cache) > BODY_CACHE_SIZE:
+                self._body_cache.popitem(last=False)
+            return text
+
+    def read_bodies(self, refs):
+        """
+        複数の定型文本文をファイルの先頭から順にまとめて読み込みます（検索インデックスの構築用）。
+        読み込んだ本文はキャッシュに追加しません。
+
+        引数:
+          refs (list): BodyRef のリスト
+
+        戻り値:
+          list: refs と同じ順の本文のリスト
+
+        例外:
+          SnapshotChangedError: ファイルが外部で変更され、索引の位置から読み込めない場合
+        """
+        texts = [None] * len(refs)
+        with self._body_lock:
+            missing = []
+            for i, ref in enumerate(refs):
+                texts[i] = self._body_cache.get(ref)
+                if texts[i] is None:
+                    missing.append(i)
+            if not missing:
+                return texts
+            f = self._open_indexed()
+            if f is None:
+                raise SnapshotChangedError("one_click.json が外部で変更されています")
+            try:
+                with f:
+                    for i in sorted(missing, key=lambda i: refs[i].offset):
+                        texts[i] = json.loads(self._read_literal(f, refs[i]).decode("utf-8"))
+            except (OSError, ValueError) as e:
+                raise SnapshotChangedError(f"定型文を読み込めません: {e}") from e
+        return texts
+
+    def read_journal(self):
+        """
+        ジャーナルから編集レコードを読み込みます。
+        クラッシュで末尾が途切れている場合は、壊れた行以降を無視して切り詰めます。
+        ジャーナルの世代が索引に記録された統合済みの世代以下の場合（スナップショットの置き換え後、
+        ジャーナルの削除前にクラッシュした場合）は、レコードを再生せずにジャーナルを削除します。
+
+        戻り値:
+          list: 編集レコードのリスト
+        """
+        records = []
+        compacted = self._compacted_generation
+        self.journal_generation = 0 if compacted is None else compacted + 1
+        self.journal_records = 0
+        self.journal_bytes = 0
+        if not os.path.exists(self.journal_path):
+            return records
+        generation = None
+        valid = 0  # 正しく読み込めた行までのバイト数
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                if not isinstance(record, dict):
+                    break
+                if valid == 0 and "op" not in record and isinstance(record.get("journal"), int):
+                    generation = record["journal"]
+                else:
+                    records.append(record)
+                valid += len(line)
+        if generation is not None and compacted is not None and generation <= compacted:
+            print("統合済みのジャーナルが残っていたため削除しました")
+            os.remove(self.journal_path)
+            return []
+        if valid < os.path.getsize(self.journal_path):
+            # 途切れた末尾の後ろに追記すると、追記したレコードも読み込めなくなるため切り詰める
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valid)
+        if generation is not None:
+            self.journal_generation = generation
+        self.journal_records = len(records)
+        self.journal_bytes = valid
+        return records
+
+    def append(self, records):
+        """
+        編集レコードをジャーナルに追記し、fsyncで確定させます。
+
+        引数:
+          records (list): 追記する編集レコードのリスト
+
+        戻り値:
+          int: 追記したバイト数
+        """
+        if not records:
+            return 0
+        lines = [json.dumps(r, ensure_ascii=False) + "\n" for r in records]
+        if not self.journal_bytes:
+            # 新しいジャーナルの先頭には世代を記録する（統合後に削除できずに残っていた場合は置き換える）
+            lines.insert(0, json.dumps({"journal": self.journal_generation}) + "\n")
+        data = "".join(lines).encode("utf-8")
+        with open(self.journal_path, "ab" if self.journal_bytes else "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_records += len(records)
+        self.journal_bytes += len(data)
+        return len(data)
+
+    def write_snapshot(self, json_data, records=()):
+        """
+        スナップショットと索引を原子的に書き込み、ジャーナルを空にします（コンパクション）。
+        未読み込みの本文は元のファイルから複写し、その参照は新しいファイル上の位置へ付け替えます。
+        索引（統合したジャーナルの世代を含む）はスナップショットを置き換える前に書き込みます。
+        索引は新しいスナップショットのサイズと更新時刻を記録しているため、置き換え前に
+        クラッシュした場合は使われず、置き換え後にクラッシュした場合は残ったジャーナルを破棄できます。
+
+        引数:
+          json_data (dict): order と entries を持つ保存用データ
+          records (list): 未追記の編集レコード（スナップショットに含まれるため使用しません）
+
+        戻り値:
+          int: 書き込んだバイト数
+        """
+        old = self._open_indexed()
+        try:
+            data, index_entries, rebased = dumps_with_index(
+                json_data, lambda ref: self._copy_literal(old, ref))
+        finally:
+            if old is not None:
+                old.close()
+        generation = self.journal_generation
+        tmp_path = _write_temp(self.json_path, data)
+        try:
+            tmp_stat = os.stat(tmp_path)
+            # リネームではサイズと更新時刻は変わらないため、置き換え後のファイルと一致する
+            stat = [tmp_stat.st_size, tmp_stat.st_mtime_ns]
+            self._write_index(stat, generation, json_data["order"], index_entries)
+            # 置き換えと参照の付け替えが終わるまで本文を読み込ませない
+            with self._body_lock:
+                os.replace(tmp_path, self.json_path)
+                for ref, offset, length in rebased:
+                    ref.offset = offset
+                    ref.length = length
+                self._indexed_stat = self._file_stat()
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+        _fsync_directory(os.path.dirname(os.path.abspath(self.json_path)))
+        if self._indexed_stat != stat:
+            self._write_index(self._indexed_stat, generation, json_data["order"], index_entries)
+        written = len(data)
+        self._written_mtime = os.path.getmtime(self.json_path)
+        self.requires_snapshot = False
+        self._compacted_generation = generation
+        self.journal_generation = generation + 1
+        self.journal_records = 0
+        self.journal_bytes = 0
+        # 統合済みのジャーナルを削除する（削除できずに残っても、世代により再生されない）
+        _remove_quietly(self.journal_path)
+        return written
+
+    def _write_index(self, stat, generation, order, index_entries):
+        """
+        索引を原子的に書き込みます。
+
+        引数:
+          stat (list): 索引が指す one_click.json の [サイズ, 更新時刻ns]
+          generation (int): スナップショットに統合済みのジャーナルの世代
+          order (list): カテゴリ順序
+          index_entries (dict): カテゴリごとの [タイトル, 位置, 長さ] のリスト
+
+        戻り値:
+          なし
+        """
+        atomic_write_text(
+            self.index_path,
+            json.dumps({
+                "version": INDEX_VERSION,
+                "stat": stat,
+                "journal": generation,
+                "order": order,
+                "entries": index_entries
+            }, ensure_ascii=False))
+
+    def needs_compaction(self):
+        """
+        ジャーナルをスナップショットへ統合すべきかどうかを判定します。
+
+        戻り値:
+          bool: 統合が必要な場合はTrue
+        """
+        return (self.journal_records >= COMPACT_RECORD_LIMIT or
+                self.journal_bytes >= COMPACT_BYTE_LIMIT)
+
+    def modified_externally(self):
+        """
+        最後の読み書き以降に one_click.json が外部で変更されたかどうかを判定します。
+
+        戻り値:
+          bool: 外部で変更された場合はTrue
+        """
+        if self._written_mtime is None or not os.path.exists(self.json_path):
+            return False
+        return os.path.getmtime(self.json_path) != self._written_mtime
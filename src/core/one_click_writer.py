@@ -0,0 +1,189 @@
+"""
+one_click_writer.py
+ワンクリックデータの書き込みを遅延・集約して行うバックグラウンドライターです。
+変更はメモリ上で記録され、一定時間変更が途絶えた時点（アイドル時）か
+最大待ち時間を超えた時点でまとめて書き込まれます。
+"""
+import atexit
+import threading
+import time
+import weakref
+
+DEFAULT_SAVE_DELAY = 0.5  # 最後の変更から書き込みまでの待ち時間（秒）
+DEFAULT_MAX_DELAY = 3.0  # 変更が続いても書き込みを待つ最大時間（秒）
+
+# 終了時に未書き込みの変更をフラッシュするため、生存中のライターを保持する
+_live_writers = weakref.WeakSet()
+
+
+class DebouncedWriter:
+    """
+    書き込み要求をデバウンスし、バックグラウンドスレッドで実行するクラスです。
+    Tkのイベントループをブロックしないよう、書き込み処理は専用スレッドで行います。
+
+    引数:
+      write_func (callable): 実際の書き込みを行う関数（引数なし）
+      delay (float): 最後の変更から書き込みまでの待ち時間（秒）
+      max_delay (float): 変更が続いた場合でも書き込みを行うまでの最大待ち時間（秒）
+    """
+
+    def __init__(self, write_func, delay=DEFAULT_SAVE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+        """
+        コンストラクタ
+
+        引数:
+          write_func (callable): 実際の書き込みを行う関数（引数なし）
+          delay (float): 最後の変更から書き込みまでの待ち時間（秒）
+          max_delay (float): 変更が続いた場合でも書き込みを行うまでの最大待ち時間（秒）
+        """
+        self._write_func = write_func
+        self.delay = delay
+        self.max_delay = max(delay, max_delay)
+        self._cond = threading.Condition()
+        self._requested = 0  # 書き込み要求の世代番号
+        self._written = 0  # 書き込み済みの世代番号
+        self._first_dirty_at = None
+        self._last_dirty_at = None
+        self._force = False
+        self._closed = False
+        self._thread = None
+        _live_writers.add(self)
+
+    @property
+    def pending(self):
+        """
+        未書き込みの変更があるかどうかを返します。
+
+        戻り値:
+          bool: 未書き込みの変更がある場合はTrue
+        """
+        with self._cond:
+            return self._written < self._requested
+
+    def mark_dirty(self):
+        """
+        データが変更されたことを記録し、遅延書き込みをスケジュールします。
+        呼び出し側は即座に戻り、書き込みはバックグラウンドで行われます。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                return
+            if self._written == self._requested:
+                self._first_dirty_at = now
+            self._last_dirty_at = now
+            self._requested += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        未書き込みの変更を直ちに書き込み、完了するまで待機します。
+
+        引数:
+          timeout (float): 最大待機時間（秒）。Noneの場合は無制限
+
+        戻り値:
+          bool: タイムアウトせずに書き込みが完了した場合はTrue
+        """
+        with self._cond:
+            target = self._requested
+            if self._written >= target:
+                return True
+            if self._thread is None or not self._thread.is_alive():
+                # ライタースレッドが無い場合（終了処理中など）は呼び出し元で書き込む
+                self._written = target
+                run_inline = True
+            else:
+                run_inline = False
+                self._force = True
+                self._cond.notify_all()
+                finished = self._cond.wait_for(lambda: self._written >= target, timeout)
+        if run_inline:
+            self._run_write()
+            return True
+        return finished
+
+    def close(self, timeout=None):
+        """
+        未書き込みの変更をフラッシュし、ライタースレッドを停止します。
+
+        引数:
+          timeout (float): フラッシュの最大待機時間（秒）
+
+        戻り値:
+          なし
+        """
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        _live_writers.discard(self)
+
+    def _ensure_thread(self):
+        """
+        ライタースレッドが起動していなければ起動します（ロック取得済みで呼び出すこと）。
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run,
+                                            name="OneClickWriter",
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """
+        ライタースレッドのメインループです。
+        変更が一定時間途絶えるか、最大待ち時間を超えたら書き込みを行います。
+        """
+        while True:
+            with self._cond:
+                while not self._closed and self._written >= self._requested:
+                    self._cond.wait()
+                if self._closed and self._written >= self._requested:
+                    return
+                while not self._force and not self._closed:
+                    now = time.monotonic()
+                    wait = min(self._last_dirty_at + self.delay,
+                               self._first_dirty_at + self.max_delay) - now
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                self._force = False
+                target = self._requested
+            self._run_write()
+            with self._cond:
+                self._written = max(self._written, target)
+                self._cond.notify_all()
+
+    def _run_write(self):
+        """
+        書き込み関数を実行します。例外はログ出力のみ行い、スレッドを継続させます。
+        """
+        try:
+            self._write_func()
+        except Exception as e:
+            print(f"バックグラウンド書き込みに失敗しました: {e}")
+
+
+def flush_all_writers():
+    """
+    生存中の全ライターの未書き込みの変更をフラッシュします。
+    アプリケーション終了時に呼び出されます。
+
+    引数:
+      なし
+
+    戻り値:
+      なし
+    """
+    for writer in list(_live_writers):
+        writer.flush(timeout=10.0)
+
+
+atexit.register(flush_all_writers)
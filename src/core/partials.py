@@ -0,0 +1,233 @@
+"""
+partials.py
+テンプレートから別のテンプレートを名前で読み込む部品（例: {>lighting_soft}）を管理するモジュールです。
+部品を読み込んだテンプレートは、読み込み先の構文木を埋め込んだ1つの変換済みテンプレートにしておきます。
+部品どうしの参照関係を依存グラフとして保持し、部品が変更された時は、その部品に依存する
+テンプレートだけを変換し直します。循環している参照は展開せず、元の表記のまま残します。
+"""
+import re
+from collections import OrderedDict
+
+from src.core.template_compiler import CompiledTemplate, parse
+
+INCLUDE_PATTERN = re.compile(r"\{>\s*([^{}]+?)\s*\}")
+TEXT_CACHE_SIZE = 512
+
+
+class PartialRegistry:
+    """
+    PartialRegistry クラスは、名前付きの部品の原文・依存グラフ・変換済みテンプレートを保持します。
+
+    引数:
+      sources (dict): 部品名 -> テンプレート文字列（省略可）
+    """
+
+    def __init__(self, sources=None):
+        """
+        コンストラクタ
+
+        引数:
+          sources (dict): 部品名 -> テンプレート文字列（省略可）
+        """
+        self._sources = {}
+        self._deps = {}  # 部品名 -> 直接読み込んでいる部品名の集合（存在しない名前も含む）
+        self._dependents = {}  # 部品名 -> その部品を直接読み込んでいる部品名の集合
+        self._component = {}  # 部品名 -> 循環している部品の集合の番号（循環していなければNone）
+        self._compiled = {}
+        self._text_cache = OrderedDict()  # テンプレート文字列 -> (変換済みテンプレート, 依存する部品名)
+        self.cycles = []  # 循環している部品名の組のリスト
+        if sources:
+            self.update(sources)
+
+    def update(self, sources):
+        """
+        部品の一覧を更新し、変更された部品とそれに依存する部品だけを変換し直します。
+
+        引数:
+          sources (dict): 部品名 -> テンプレート文字列（この一覧に無い部品は削除されます）
+
+        戻り値:
+          set: 変換し直した（または削除した）部品名の集合
+        """
+        changed = {name for name in self._sources if name not in sources}
+        changed.update(name for name, text in sources.items() if self._sources.get(name) != text)
+        if not changed:
+            return set()
+        self._sources = dict(sources)
+        for name in changed:
+            if name in self._sources:
+                self._deps[name] = set(INCLUDE_PATTERN.findall(self._sources[name]))
+            else:
+                self._deps.pop(name, None)
+        self._dependents = {}
+        for name, deps in self._deps.items():
+            for dep in deps:
+                self._dependents.setdefault(dep, set()).add(name)
+        self._find_cycles()
+
+        affected = self._with_dependents(changed)
+        for name in affected:
+            self._compiled.pop(name, None)
+        for text in [t for t, (_, deps) in self._text_cache.items() if deps & affected]:
+            del self._text_cache[text]
+        # 読み込み時に変換しておき、描画時には展開済みの構文木を使う
+        for name in affected:
+            if name in self._sources:
+                self.get(name)
+        return affected
+
+    def _with_dependents(self, names):
+        """
+        指定した部品と、それらに直接・間接に依存する部品の名前の集合を返します。
+        """
+        result = set(names)
+        pending = list(names)
+        while pending:
+            for dependent in self._dependents.get(pending.pop(), ()):
+                if dependent not in result:
+                    result.add(dependent)
+                    pending.append(dependent)
+        return result
+
+    def _find_cycles(self):
+        """
+        依存グラフの強連結成分（Tarjan の方法）を求め、循環している部品の組を記録します。
+        """
+        index_of = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        self._component = {}
+        self.cycles = []
+        counter = [0]
+
+        def visit(name):
+            index_of[name] = low[name] = counter[0]
+            counter[0] += 1
+            stack.append(name)
+            on_stack.add(name)
+            for dep in self._deps.get(name, ()):
+                if dep not in self._sources:
+                    continue
+                if dep not in index_of:
+                    visit(dep)
+                    low[name] = min(low[name], low[dep])
+                elif dep in on_stack:
+                    low[name] = min(low[name], index_of[dep])
+            if low[name] == index_of[name]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    members.append(member)
+                    if member == name:
+                        break
+                if len(members) > 1 or name in self._deps.get(name, ()):
+                    for member in members:
+                        self._component[member] = len(self.cycles)
+                    self.cycles.append(sorted(members))
+                    print(f"テンプレートの部品が循環しています: {', '.join(sorted(members))}")
+
+        for name in self._sources:
+            if name not in index_of:
+                visit(name)
+
+    def _expander(self, owner):
+        """
+        {>部品名} のタグを、部品の構文木に置き換える関数を作成します。
+
+        引数:
+          owner (str): 展開中の部品名（部品以外のテンプレートの場合はNone）
+        """
+        component = self._component.get(owner)
+
+        def expand(tag, raw):
+            if not tag.startswith(">"):
+                return None
+            name = tag[1:].strip()
+            if name not in self._sources:
+                return [raw]
+            if component is not None and self._component.get(name) == component:
+                return [raw]
+            return list(self.get(name).nodes)
+
+        return expand
+
+    def get(self, name):
+        """
+        部品の変換済みテンプレートを返します（読み込んでいる部品は展開済みです）。
+
+        引数:
+          name (str): 部品名
+
+        戻り値:
+          CompiledTemplate: 変換済みテンプレート（部品が無い場合はNone）
+        """
+        compiled = self._compiled.get(name)
+        if compiled is None and name in self._sources:
+            text = self._sources[name]
+            compiled = CompiledTemplate(text, parse(text, self._expander(name)))
+            self._compiled[name] = compiled
+        return compiled
+
+    def compile(self, text):
+        """
+        任意のテンプレートを、部品を展開して変換します。同じテンプレートは変換結果を再利用し、
+        依存する部品が変更された時だけ変換し直します。
+
+        引数:
+          text (str): テンプレート文字列
+
+        戻り値:
+          CompiledTemplate: 変換済みテンプレート
+        """
+        cached = self._text_cache.get(text)
+        if cached is not None:
+            self._text_cache.move_to_end(text)
+            return cached[0]
+        deps = set(INCLUDE_PATTERN.findall(text))
+        compiled = CompiledTemplate(text, parse(text, self._expander(None)))
+        self._text_cache[text] = (compiled, self._with_reachable(deps))
+        if len(self._text_cache) > TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+        return compiled
+
+    def _with_reachable(self, names):
+        """
+        指定した部品と、それらが直接・間接に読み込んでいる部品の名前の集合を返します。
+        """
+        result = set(names)
+        pending = list(names)
+        while pending:
+            for dep in self._deps.get(pending.pop(), ()):
+                if dep not in result:
+                    result.add(dep)
+                    pending.append(dep)
+        return result
+
+    def includes(self, text):
+        """
+        テンプレートが直接・間接に読み込んでいる部品の原文を返します（存在しない部品は含みません）。
+
+        引数:
+          text (str): テンプレート文字列
+
+        戻り値:
+          dict: 部品名 -> テンプレート文字列
+        """
+        if "{>" not in text:
+            return {}
+        names = self._with_reachable(set(INCLUDE_PATTERN.findall(text)))
+        return {name: self._sources[name] for name in sorted(names) if name in self._sources}
+
+    def dependents(self, name):
+        """
+        指定した部品に直接・間接に依存する部品名の集合を返します（自身は含みません）。
+
+        引数:
+          name (str): 部品名
+
+        戻り値:
+          set: 部品名の集合
+        """
+        return self._with_dependents({name}) - {name}
@@ -0,0 +1,174 @@
+"""
+prompt_composer.py
+基本プロンプト・変数・選択した追加プロンプト・主語から完成プロンプトを組み立てるコンポーネントです。
+Tkのウィジェットに依存しないため、画面・一括生成・ベンチマークのいずれからも同じ処理で利用できます。
+"""
+import random
+
+from src.core.template_compiler import compile_template
+from src.core.template_renderer import TemplateRenderer
+
+ELEMENT_VARIABLE = "character"  # 追加プロンプト中で主語に置き換える変数名
+ELEMENT_CACHE_SIZE = 1024
+
+
+class PromptComposer:
+    """
+    PromptComposer クラスは、完成プロンプトを段階ごとに組み立て、各段階の結果を再利用します。
+    段階は「基本プロンプトの展開」「追加プロンプトの展開」「結合（とワイルドカードの置換・後処理）」の
+    3つで、入力の変わらない段階は前回の結果をそのまま使います。
+
+    引数:
+      element_variable (str): 追加プロンプト中で主語に置き換える変数名
+      pipeline (PostProcessPipeline): 結合後に適用する後処理（省略時は後処理なし）
+      wildcards (WildcardLibrary): ワイルドカードの候補（省略時はワイルドカードを置き換えない）
+      compiler (callable): テンプレートを変換する関数（部品を展開する場合は PartialRegistry.compile）
+    """
+
+    def __init__(self,
+                 element_variable=ELEMENT_VARIABLE,
+                 pipeline=None,
+                 wildcards=None,
+                 compiler=compile_template):
+        """
+        コンストラクタ
+
+        引数:
+          element_variable (str): 追加プロンプト中で主語に置き換える変数名
+          pipeline (PostProcessPipeline): 結合後に適用する後処理（省略時は後処理なし）
+          wildcards (WildcardLibrary): ワイルドカードの候補（省略時はワイルドカードを置き換えない）
+          compiler (callable): テンプレートを変換する関数
+        """
+        self.element_variable = element_variable
+        self.pipeline = pipeline
+        self.wildcards = wildcards
+        self.compiler = compiler
+        self._basic = None  # 基本プロンプトの TemplateRenderer（テンプレートが変わるまで使い回す）
+        self._element_key = None
+        self._element_text = ""
+        self._element_cache = {}  # (変換済みの追加プロンプト, 主語) -> 展開結果
+        self._result_key = None
+        self._result = ""
+        self.stats = {"basic": [0, 0], "element": [0, 0], "join": [0, 0]}  # 段階 -> [再利用, 計算]
+
+    def set_pipeline(self, pipeline):
+        """
+        結合後に適用する後処理を設定します。次回の compose では結合結果を組み立て直します。
+
+        引数:
+          pipeline (PostProcessPipeline): 後処理（Noneの場合は後処理なし）
+
+        戻り値:
+          なし
+        """
+        self.pipeline = pipeline
+        self._result_key = None
+
+    def _count(self, stage, hit):
+        self.stats[stage][0 if hit else 1] += 1
+
+    def render_basic(self, template, variables):
+        """
+        基本プロンプトのテンプレートを変数で展開します。
+        テンプレートが前回と同じなら、値の変わった変数の箇所だけを書き換えます。
+
+        引数:
+          template (str): 基本プロンプトのテンプレート
+          variables (dict): 変数名と値の辞書
+
+        戻り値:
+          str: 展開したテキスト
+        """
+        # 部品が更新されると同じテンプレートでも変換結果が変わるため、変換結果の同一性で判定する
+        if self._basic is None or self._basic.compiled is not self.compiler(template):
+            self._basic = TemplateRenderer(template, variables, self.compiler)
+            self._count("basic", False)
+        else:
+            self._count("basic", not self._basic.update(variables))
+        return self._basic.text
+
+    def set_variable(self, name, value):
+        """
+        基本プロンプトの変数を1つだけ更新します。
+
+        引数:
+          name (str): 変数名
+          value (str): 新しい値
+
+        戻り値:
+          bool: 展開結果が変わる場合はTrue（基本プロンプトが未設定の場合もTrue）
+        """
+        if self._basic is None:
+            return True
+        return self._basic.set_variable(name, value)
+
+    def render_elements(self, element_prompts, subject):
+        """
+        選択された追加プロンプトの主語を置き換え、改行で結合します。
+
+        引数:
+          element_prompts (list): 追加プロンプトのテンプレートのリスト（選択順）
+          subject (str): 主語
+
+        戻り値:
+          str: 展開したテキスト（選択が無い場合は空文字）
+        """
+        key = (tuple(self.compiler(prompt) for prompt in element_prompts), subject)
+        if key == self._element_key:
+            self._count("element", True)
+            return self._element_text
+        self._count("element", False)
+        if len(self._element_cache) > ELEMENT_CACHE_SIZE:
+            self._element_cache.clear()
+        rendered = []
+        for compiled in key[0]:
+            text = self._element_cache.get((compiled, subject))
+            if text is None:
+                text = compiled.render({self.element_variable: subject})
+                self._element_cache[(compiled, subject)] = text
+            rendered.append(text)
+        self._element_key = key
+        self._element_text = "\n".join(rendered)
+        return self._element_text
+
+    def compose(self, template, variables, element_prompts=(), subject="", seed=None):
+        """
+        完成プロンプトを組み立てます（後処理が設定されている場合は適用後のテキストを返します）。
+
+        引数:
+          template (str): 基本プロンプトのテンプレート
+          variables (dict): 基本プロンプトの変数名と値の辞書
+          element_prompts (list): 選択された追加プロンプトのテンプレートのリスト
+          subject (str): 追加プロンプトの主語
+          seed (int): ワイルドカードを選ぶ乱数のシード（同じシードなら同じ結果になります）
+
+        戻り値:
+          str: 完成プロンプト
+        """
+        basic_text = self.render_basic(template, variables)
+        element_text = self.render_elements(element_prompts, subject)
+        key = (basic_text, element_text, seed)
+        # シードを指定しないワイルドカードの置換は毎回結果が変わるため再利用しない
+        if key == self._result_key and (seed is not None or self.wildcards is None):
+            self._count("join", True)
+            return self._result
+        self._count("join", False)
+        self._result_key = key
+        text = basic_text + "\n" + element_text if element_text else basic_text
+        if self.wildcards is not None:
+            text = self.wildcards.resolve(text, random.Random(seed))
+        self._result = self.pipeline.run(text) if self.pipeline else text
+        return self._result
+
+    def compose_batch(self, jobs):
+        """
+        複数の組み合わせをまとめて組み立てます。
+        同じテンプレートや追加プロンプトを共有する組み合わせが続くほど、途中の結果を多く再利用できます。
+
+        引数:
+          jobs (iterable): compose の引数 (template, variables, element_prompts, subject[, seed]) の組
+
+        戻り値:
+          list: 完成プロンプトのリスト
+        """
+        return [self.compose(*job) for job in jobs]
@@ -0,0 +1,266 @@
+"""
+prompt_pipeline.py
+組み立てた完成プロンプトに後処理（重複文の削除・句読点の正規化・文字数の上限など）を
+順番に適用するパイプラインを提供するモジュールです。
+各段階の出力は入力のハッシュ値をキーに記憶しておき、入力の変わらない段階は再計算しません。
+"""
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
+STAGE_CACHE_SIZE = 128
+
+SENTENCE_PATTERN = re.compile(r"[^。！？!?]+[。！？!?]*|[。！？!?]+")
+SUBJECT_PREFIX_PATTERN = re.compile(r"^その[^、。\n]{1,20}?は、")
+REPEATED_PUNCTUATION = re.compile(r"([、。，．！？!?])\1+")
+COMMA_BEFORE_PERIOD = re.compile(r"[、，]+([。．])")
+BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def dedupe_sentences(text):
+    """
+    既に出てきた文と同じ文を削除します（複数の追加プロンプトで同じ文が繰り返される場合など）。
+
+    引数:
+      text (str): 対象のテキスト
+
+    戻り値:
+      str: 重複した文を除いたテキスト
+    """
+    seen = set()
+    lines = []
+    for line in text.split("\n"):
+        kept = []
+        for sentence in SENTENCE_PATTERN.findall(line):
+            key = sentence.strip()
+            if key in seen:
+                continue
+            if key:
+                seen.add(key)
+            kept.append(sentence)
+        # 文がすべて重複していた行は行ごと取り除く（元から空の行は残す）
+        if kept or not line.strip():
+            lines.append("".join(kept))
+    return "\n".join(lines)
+
+
+def normalize_punctuation(text):
+    """
+    句読点の連続や「、。」のような並びを整え、行末の空白と連続する空行を取り除きます。
+
+    引数:
+      text (str): 対象のテキスト
+
+    戻り値:
+      str: 正規化したテキスト
+    """
+    text = REPEATED_PUNCTUATION.sub(r"\1", text)
+    text = COMMA_BEFORE_PERIOD.sub(r"\1", text)
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return BLANK_LINES.sub("\n\n", text)
+
+
+def collapse_subject(text):
+    """
+    「その人物は、」のような主語の書き出しが続く行で、2行目以降の書き出しを省略します。
+
+    引数:
+      text (str): 対象のテキスト
+
+    戻り値:
+      str: 主語の繰り返しを省いたテキスト
+    """
+    previous = None
+    lines = []
+    for line in text.split("\n"):
+        match = SUBJECT_PREFIX_PATTERN.match(line)
+        prefix = match.group(0) if match else None
+        if prefix is not None and prefix == previous and len(line) > len(prefix):
+            line = line[len(prefix):]
+        previous = prefix
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def make_length_cap(max_chars):
+    """
+    文字数の上限を超えた部分を、なるべく文の区切りで切り詰める関数を作成します。
+
+    引数:
+      max_chars (int): 上限の文字数
+
+    戻り値:
+      function: テキストを受け取り切り詰めたテキストを返す関数
+    """
+
+    def cap_length(text):
+        if len(text) <= max_chars:
+            return text
+        head = text[:max_chars]
+        cut = max(head.rfind(mark) for mark in "。！？!?\n")
+        return (head[:cut + 1] if cut > 0 else head).rstrip()
+
+    cap_length.max_chars = max_chars  # 描画結果のキャッシュで上限の違いを区別するため
+    return cap_length
+
+
+class PostProcessStage:
+    """
+    PostProcessStage クラスは、後処理の1段階と、その入出力の記憶を保持します。
+
+    引数:
+      name (str): 段階の名前
+      func (function): テキストを受け取り処理後のテキストを返す関数
+    """
+
+    def __init__(self, name, func):
+        """
+        コンストラクタ
+
+        引数:
+          name (str): 段階の名前
+          func (function): テキストを受け取り処理後のテキストを返す関数
+        """
+        self.name = name
+        self.func = func
+        self._cache = OrderedDict()  # 入力のハッシュ値 -> 出力
+        self.runs = 0
+        self.hits = 0
+        self.last_time = 0.0
+        self.total_time = 0.0
+
+    def process(self, text):
+        """
+        テキストを処理します。同じ入力を処理したことがあれば記憶している出力を返します。
+
+        引数:
+          text (str): 入力テキスト
+
+        戻り値:
+          str: 出力テキスト
+        """
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        output = self._cache.get(key)
+        if output is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            self.last_time = 0.0
+            return output
+        start = time.perf_counter()
+        output = self.func(text)
+        self.last_time = time.perf_counter() - start
+        self.total_time += self.last_time
+        self.runs += 1
+        self._cache[key] = output
+        if len(self._cache) > STAGE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return output
+
+
+class PostProcessPipeline:
+    """
+    PostProcessPipeline クラスは、後処理の段階を順番に適用します。
+    段階ごとに入力のハッシュ値で出力を記憶しているため、上流の出力が変わらない段階は再計算されず、
+    変更のあった段階より下流だけが実行されます。
+
+    引数:
+      stages (list): (名前, 関数) の組のリスト（省略時は空）
+    """
+
+    def __init__(self, stages=None):
+        """
+        コンストラクタ
+
+        引数:
+          stages (list): (名前, 関数) の組のリスト（省略時は空）
+        """
+        self.stages = []
+        for name, func in stages or []:
+            self.add_stage(name, func)
+
+    @classmethod
+    def default(cls, max_chars=None):
+        """
+        標準の後処理（重複文の削除・主語の省略・句読点の正規化・必要なら文字数の上限）を持つ
+        パイプラインを作成します。
+
+        引数:
+          max_chars (int): 文字数の上限（Noneの場合は制限しない）
+
+        戻り値:
+          PostProcessPipeline: 作成したパイプライン
+        """
+        pipeline = cls([("dedupe", dedupe_sentences), ("collapse_subject", collapse_subject),
+                        ("punctuation", normalize_punctuation)])
+        if max_chars:
+            pipeline.add_stage("length_cap", make_length_cap(max_chars))
+        return pipeline
+
+    def add_stage(self, name, func, index=None):
+        """
+        段階を追加します。同じ名前の段階がある場合は置き換えます（下流の記憶はそのまま使えます）。
+
+        引数:
+          name (str): 段階の名前
+          func (function): テキストを受け取り処理後のテキストを返す関数
+          index (int): 挿入位置（省略時は末尾、置き換えの場合は元の位置）
+
+        戻り値:
+          なし
+        """
+        stage = PostProcessStage(name, func)
+        for i, existing in enumerate(self.stages):
+            if existing.name == name:
+                self.stages[i] = stage
+                return
+        self.stages.insert(len(self.stages) if index is None else index, stage)
+
+    def remove_stage(self, name):
+        """
+        指定した名前の段階を取り除きます。
+
+        引数:
+          name (str): 段階の名前
+
+        戻り値:
+          bool: 取り除いた場合はTrue
+        """
+        for i, stage in enumerate(self.stages):
+            if stage.name == name:
+                del self.stages[i]
+                return True
+        return False
+
+    def run(self, text):
+        """
+        すべての段階を順番に適用します。
+
+        引数:
+          text (str): 入力テキスト
+
+        戻り値:
+          str: 後処理したテキスト
+        """
+        for stage in self.stages:
+            text = stage.process(text)
+        return text
+
+    def timings(self):
+        """
+        段階ごとの処理時間と記憶の利用状況を返します。
+
+        引数:
+          なし
+
+        戻り値:
+          dict: 段階の名前 -> {"last", "total", "runs", "hits"}（時間は秒）
+        """
+        return {
+            stage.name: {
+                "last": stage.last_time,
+                "total": stage.total_time,
+                "runs": stage.runs,
+                "hits": stage.hits
+            } for stage in self.stages
+        }
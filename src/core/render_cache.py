@@ -0,0 +1,365 @@
+"""
+render_cache.py
+完成プロンプトとその翻訳を、入力の内容から求めたハッシュ値をキーとしてディスクに保存するキャッシュです。
+一括生成では、テンプレート・変数の値・選択した追加プロンプト・描画処理のバージョンなどからキーを求めるため、
+テンプレートを1つ編集して同じ一括生成をやり直しても、描画と翻訳をやり直すのは影響を受けた行だけです。
+容量の上限を超えた場合は、最も長く使われていない項目から削除します。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+# 描画結果が変わる変更（構文・後処理の追加など）をした時に上げ、古い描画結果を使わないようにする
+RENDERER_VERSION = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+EVICT_RATIO = 0.9  # 上限を超えた時に、この割合まで削除する
+RENDER_KIND = "render"
+TRANSLATION_KIND = "translation"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed);
+"""
+
+
+def content_key(*parts):
+    """
+    値の組から、内容が同じなら同じになるキーを求めます。
+
+    引数:
+      *parts: JSONに変換できる値（辞書はキーの順に関係なく同じキーになります）
+
+    戻り値:
+      str: 16進数のハッシュ値
+    """
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def translation_key(text, target_lang):
+    """
+    翻訳結果のキーを求めます。翻訳は翻訳元のテキストだけで決まるため、どの組み合わせから
+    描画されたテキストでも同じ翻訳を共有します。
+    """
+    return content_key(TRANSLATION_KIND, target_lang, text)
+
+
+class RenderCache:
+    """
+    RenderCache クラスは、キーと文字列の組をSQLiteのファイルに保存し、容量の上限を保ちます。
+    種類（描画結果・翻訳）ごとのヒット数とミス数を記録します。
+
+    引数:
+      path (str): キャッシュファイルのパス（":memory:" の場合はメモリ上に作成します）
+      max_bytes (int): 保存する値の合計サイズの上限（バイト）
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        コンストラクタ
+
+        引数:
+          path (str): キャッシュファイルのパス
+          max_bytes (int): 保存する値の合計サイズの上限（バイト）
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._bytes, self._clock = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(accessed), 0) FROM cache").fetchone()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, kind, key):
+        """
+        保存されている値を取得します。取得した項目は最近使われたものとして記録します。
+
+        引数:
+          kind (str): 種類（統計の集計に使います）
+          key (str): キー
+
+        戻り値:
+          str: 保存されている値（無い場合はNone）
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key, )).fetchone()
+            if row is None:
+                self.misses[kind] += 1
+                return None
+            self.hits[kind] += 1
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (self._tick(), key))
+            return row[0]
+
+    def put(self, kind, key, value):
+        """
+        値を保存します。容量の上限を超えた場合は、最も長く使われていない項目から削除します。
+
+        引数:
+          kind (str): 種類
+          key (str): キー
+          value (str): 保存する値
+
+        戻り値:
+          なし
+        """
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key, )).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                               (key, kind, value, size, self._tick()))
+            self._bytes += size - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * EVICT_RATIO))
+
+    def _evict(self, target):
+        """
+        合計サイズが target 以下になるまで、最も長く使われていない項目から削除します。
+        """
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            if self._bytes <= target:
+                break
+            victims.append((key, ))
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def get_translation(self, text, target_lang):
+        """
+        テキストの翻訳結果を取得します。
+
+        引数:
+          text (str): 翻訳元のテキスト
+          target_lang (str): 翻訳先の言語
+
+        戻り値:
+          str: 保存されている翻訳結果（無い場合はNone）
+        """
+        return self.get(TRANSLATION_KIND, translation_key(text, target_lang))
+
+    def put_translation(self, text, target_lang, translated):
+        """
+        テキストの翻訳結果を保存します。
+
+        引数:
+          text (str): 翻訳元のテキスト
+          target_lang (str): 翻訳先の言語
+          translated (str): 翻訳結果
+
+        戻り値:
+          なし
+        """
+        self.put(TRANSLATION_KIND, translation_key(text, target_lang), translated)
+
+    def flush(self):
+        """
+        未確定の変更（保存・削除・使用の記録）をファイルに書き込みます。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            self._conn.commit()
+
+    def clear(self):
+        """
+        すべての項目を削除し、統計を初期化します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self._bytes = 0
+            self.hits.clear()
+            self.misses.clear()
+            self.evictions = 0
+
+    def stats(self):
+        """
+        キャッシュの利用状況を返します。
+
+        引数:
+          なし
+
+        戻り値:
+          dict: "entries"（項目数）, "bytes"（合計サイズ）, "evictions"（削除した項目数）と、
+            種類ごとの {"hits", "misses", "hit_rate"}
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        result = {"entries": entries, "bytes": self._bytes, "evictions": self.evictions}
+        for kind in sorted(set(self.hits) | set(self.misses)):
+            total = self.hits[kind] + self.misses[kind]
+            result[kind] = {"hits": self.hits[kind], "misses": self.misses[kind],
+                            "hit_rate": self.hits[kind] / total if total else 0.0}
+        return result
+
+    def close(self):
+        """
+        変更を書き込んでファイルを閉じます。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+class BatchRenderer:
+    """
+    BatchRenderer クラスは、組み合わせの一覧をまとめて描画・翻訳し、結果を RenderCache に保存します。
+    各行のキーには、描画結果に影響するすべての入力（テンプレート・変数・追加プロンプト・主語・シード・
+    読み込んでいる部品の内容・後処理の構成・描画処理のバージョン）を含めます。
+    シードを指定せずにワイルドカードを使う行は、結果が毎回変わるため保存しません。
+
+    引数:
+      composer (PromptComposer): 完成プロンプトを組み立てるコンポーネント
+      cache (RenderCache): 保存先のキャッシュ
+      translate (callable): テキストを受け取り翻訳結果を返す関数（省略時は翻訳しない）
+      partials (PartialRegistry): 部品の一覧（部品を展開する場合に指定します）
+      target_lang (str): 翻訳先の言語（翻訳結果のキーに含めます）
+    """
+
+    def __init__(self, composer, cache, translate=None, partials=None, target_lang="EN"):
+        """
+        コンストラクタ
+
+        引数:
+          composer (PromptComposer): 完成プロンプトを組み立てるコンポーネント
+          cache (RenderCache): 保存先のキャッシュ
+          translate (callable): テキストを受け取り翻訳結果を返す関数（省略可）
+          partials (PartialRegistry): 部品の一覧（省略可）
+          target_lang (str): 翻訳先の言語
+        """
+        self.composer = composer
+        self.cache = cache
+        self.translate = translate
+        self.partials = partials
+        self.target_lang = target_lang
+        self.last_run = {}
+
+    def _environment(self):
+        """
+        一括生成の間は変わらない、描画結果に影響する設定を返します。
+        """
+        pipeline = self.composer.pipeline
+        stages = []
+        if pipeline is not None:
+            stages = [[stage.name, getattr(stage.func, "max_chars", None)]
+                      for stage in pipeline.stages]
+        return [RENDERER_VERSION, self.composer.element_variable, stages]
+
+    def render_key(self, template, variables, element_prompts=(), subject="", seed=None,
+                   environment=None, wildcard_state=None):
+        """
+        1行分の描画結果のキーを求めます。
+
+        引数:
+          template (str): 基本プロンプトのテンプレート
+          variables (dict): 変数名と値の辞書
+          element_prompts (list): 選択された追加プロンプトのテンプレートのリスト
+          subject (str): 主語
+          seed (int): ワイルドカードのシード
+          environment (list): _environment の結果（省略時は求め直します）
+          wildcard_state (list): ワイルドカードの候補ファイルの状態（省略時は求め直します）
+
+        戻り値:
+          str: キー（保存できない行の場合はNone）
+        """
+        texts = [template, *element_prompts, *(str(v) for v in variables.values())]
+        included = {}
+        if self.partials is not None:
+            for text in texts[:1 + len(element_prompts)]:
+                included.update(self.partials.includes(text))
+        wildcards = None
+        if self.composer.wildcards is not None and any(
+                "{__" in text for text in texts + list(included.values())):
+            if seed is None:
+                return None
+            wildcards = wildcard_state
+            if wildcards is None:
+                wildcards = self.composer.wildcards.fingerprint()
+        return content_key(RENDER_KIND, environment or self._environment(), template,
+                           {k: str(v) for k, v in variables.items()}, list(element_prompts),
+                           subject, seed, included, wildcards)
+
+    def run(self, jobs):
+        """
+        組み合わせを順に描画・翻訳します。キャッシュに結果がある行は描画・翻訳しません。
+        翻訳が途中で失敗した場合も、それまでの結果は保存されています。
+
+        引数:
+          jobs (iterable): PromptComposer.compose の引数 (template, variables, element_prompts,
+            subject[, seed]) の組
+
+        戻り値:
+          list: (完成プロンプト, 翻訳結果) の組のリスト（翻訳しない場合、翻訳結果はNone）
+        """
+        counts = Counter()
+        self.last_run = counts
+        environment = self._environment()
+        wildcards = self.composer.wildcards
+        wildcard_state = wildcards.fingerprint() if wildcards is not None else None
+        results = []
+        try:
+            for job in jobs:
+                key = self.render_key(*job, environment=environment,
+                                      wildcard_state=wildcard_state)
+                text = self.cache.get(RENDER_KIND, key) if key else None
+                if text is None:
+                    text = self.composer.compose(*job)
+                    counts["rendered"] += 1
+                    if key:
+                        self.cache.put(RENDER_KIND, key, text)
+                else:
+                    counts["reused"] += 1
+                results.append((text, self._translate(text, counts)))
+        finally:
+            self.cache.flush()
+        return results
+
+    def _translate(self, text, counts):
+        """
+        テキストを翻訳します（同じテキストの翻訳がキャッシュにあればそれを使います）。
+        """
+        if self.translate is None or not text:
+            return None
+        translated = self.cache.get_translation(text, self.target_lang)
+        if translated is None:
+            translated = self.translate(text)
+            counts["translated"] += 1
+            if translated:
+                self.cache.put_translation(text, self.target_lang, translated)
+        else:
+            counts["translation_reused"] += 1
+        return translated
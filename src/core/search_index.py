@@ -0,0 +1,527 @@
+"""
+search_index.py
+基本プロンプト・追加プロンプト・定型文を横断して検索する転置インデックスを提供するモジュールです。
+日本語は単語で区切れないため、文字のユニグラムとバイグラムを索引語として扱い、
+候補を絞り込んだ後に部分文字列の一致を確認します。
+定型文の索引は件数が多いとUIを止めてしまうため、バックグラウンドのスレッドで構築できます。
+"""
+import threading
+import unicodedata
+
+KIND_BASIC = "basic"
+KIND_ELEMENT = "element"
+KIND_ONE_CLICK = "one_click"
+DEFAULT_SEARCH_LIMIT = 50
+BUILD_CHUNK_SIZE = 500  # バックグラウンドでの構築時に、ロックを保持したまま索引へ追加する文書数
+
+
+def normalize(text):
+    """
+    検索用に文字列を正規化します（全角・半角の統一と大文字・小文字の同一視）。
+
+    引数:
+      text (str): 文字列
+
+    戻り値:
+      str: 正規化した文字列
+    """
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _grams(text):
+    """
+    文字列に含まれるユニグラムとバイグラムの集合を返します（空白を含むものは除きます）。
+    """
+    grams = {ch for ch in text if not ch.isspace()}
+    grams.update(text[i:i + 2] for i in range(len(text) - 1)
+                 if not (text[i].isspace() or text[i + 1].isspace()))
+    return grams
+
+
+def _query_grams(term):
+    """
+    検索語の候補絞り込みに使う索引語を返します（1文字の場合はユニグラム、それ以外はバイグラム）。
+    """
+    if len(term) == 1:
+        return {term}
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+
+class SearchHit:
+    """
+    検索結果の1件を表すクラスです。
+
+    引数:
+      kind (str): 種類（KIND_BASIC / KIND_ELEMENT / KIND_ONE_CLICK）
+      key (tuple): 種類ごとの位置（基本プロンプトは (インデックス,)、
+        追加プロンプトは (カテゴリ位置, プロンプト位置)、定型文は (カテゴリ名, インデックス)）
+      label (str): 表示名
+      group (str): 表示用の分類名
+    """
+    __slots__ = ("kind", "key", "label", "group")
+
+    def __init__(self, kind, key, label, group):
+        """
+        コンストラクタ
+
+        引数:
+          kind (str): 種類
+          key (tuple): 種類ごとの位置
+          label (str): 表示名
+          group (str): 表示用の分類名
+        """
+        self.kind = kind
+        self.key = key
+        self.label = label
+        self.group = group
+
+    def __repr__(self):
+        return f"SearchHit({self.kind!r}, {self.key!r}, {self.label!r})"
+
+
+class SearchIndex:
+    """
+    文字n-gramによる転置インデックスです。文書の追加・更新・削除を個別に行えます。
+    文書IDは同じキーであれば更新後も変わらないため、検索結果の並びは登録順に安定します。
+    """
+
+    def __init__(self):
+        """
+        コンストラクタ
+        """
+        self._postings = {}  # 索引語 -> 文書IDの集合（タイトルと本文）
+        self._title_postings = {}  # 索引語 -> 文書IDの集合（タイトルのみ）
+        self._ids = {}  # 文書キー -> 文書ID
+        self._keys = []  # 文書ID -> 文書キー（削除済みはNone）
+        self._titles = []  # 文書ID -> 正規化したタイトル
+        self._texts = []  # 文書ID -> 正規化したタイトルと本文
+        self._labels = []  # 文書ID -> (表示名, 分類名)
+        # 文書キーの末尾を除いた部分（定型文ならカテゴリ）-> 文書キー（カテゴリ単位の更新用）
+        self._groups = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, key):
+        return key in self._ids
+
+    def upsert(self, key, title, text, group=""):
+        """
+        文書を追加または更新します。内容が変わっていない場合は何もしません。
+
+        引数:
+          key (tuple): 文書キー（種類と位置）
+          title (str): タイトル
+          text (str): 本文
+          group (str): 表示用の分類名
+
+        戻り値:
+          bool: 索引を変更した場合はTrue
+        """
+        norm_title = normalize(title)
+        norm_text = norm_title + "\n" + normalize(text)
+        doc_id = self._ids.get(key)
+        if doc_id is not None:
+            if self._texts[doc_id] == norm_text:
+                self._labels[doc_id] = (title, group)
+                return False
+            self._unindex(doc_id)
+        else:
+            doc_id = len(self._keys)
+            self._ids[key] = doc_id
+            self._keys.append(key)
+            self._groups.setdefault(key[:-1], {})[key] = None
+            self._titles.append("")
+            self._texts.append("")
+            self._labels.append(None)
+        self._titles[doc_id] = norm_title
+        self._texts[doc_id] = norm_text
+        self._labels[doc_id] = (title, group)
+        for gram in _grams(norm_text):
+            self._postings.setdefault(gram, set()).add(doc_id)
+        for gram in _grams(norm_title):
+            self._title_postings.setdefault(gram, set()).add(doc_id)
+        return True
+
+    def remove(self, key):
+        """
+        文書を削除します。
+
+        引数:
+          key (tuple): 文書キー
+
+        戻り値:
+          bool: 削除した場合はTrue
+        """
+        doc_id = self._ids.pop(key, None)
+        if doc_id is None:
+            return False
+        group = self._groups[key[:-1]]
+        del group[key]
+        if not group:
+            del self._groups[key[:-1]]
+        self._unindex(doc_id)
+        self._keys[doc_id] = None
+        self._titles[doc_id] = ""
+        self._texts[doc_id] = ""
+        self._labels[doc_id] = None
+        return True
+
+    def _unindex(self, doc_id):
+        for postings, text in ((self._postings, self._texts[doc_id]),
+                               (self._title_postings, self._titles[doc_id])):
+            for gram in _grams(text):
+                docs = postings.get(gram)
+                if docs is not None:
+                    docs.discard(doc_id)
+                    if not docs:
+                        del postings[gram]
+
+    def _candidates(self, postings, grams):
+        """
+        索引語を含む文書IDの候補集合を返します（出現文書の少ない索引語から積集合を取る）。
+        候補が十分に多い場合は、大きな集合どうしの積集合を取らずに打ち切ります。
+        候補は最終的に部分文字列の一致で確認し、登録順に走査して件数に達した時点で止めるため、
+        多数の文書に一致する場合はその方が速くなります。
+        """
+        candidates = None
+        dense = len(self._keys) // 8
+        for gram in sorted(grams, key=lambda g: len(postings.get(g, ()))):
+            docs = postings.get(gram)
+            if not docs:
+                return set()
+            if candidates is not None and len(candidates) > dense:
+                break
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return set()
+        return candidates
+
+    def _in_order(self, candidates):
+        """
+        候補の文書IDを登録順に返します。候補が多い場合は全IDを順に走査して並べ替えを省きます。
+        """
+        if len(candidates) * 8 > len(self._keys):
+            return (doc_id for doc_id in range(len(self._keys)) if doc_id in candidates)
+        return iter(sorted(candidates))
+
+    def groups(self, prefix=()):
+        """
+        登録されている文書キーの、末尾を除いた部分（定型文ならカテゴリ）の一覧を返します。
+
+        引数:
+          prefix (tuple): キーの先頭要素による絞り込み
+
+        戻り値:
+          list: 末尾を除いた文書キーのリスト
+        """
+        n = len(prefix)
+        return [group for group in self._groups if group[:n] == prefix]
+
+    def keys(self, prefix=()):
+        """
+        登録されている文書キーを返します。文書の総数ではなく、該当する文書の数に比例した時間で求めます。
+
+        引数:
+          prefix (tuple): キーの先頭要素による絞り込み
+
+        戻り値:
+          list: 文書キーのリスト
+        """
+        return [key for group in self.groups(prefix) for key in self._groups[group]]
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        空白区切りの全ての語を含む文書を検索します。
+        タイトルに一致した文書を先に、それぞれ登録順に返します。
+
+        引数:
+          query (str): 検索文字列
+          limit (int): 最大件数
+
+        戻り値:
+          list: (文書キー, 表示名, 分類名) のタプルのリスト
+        """
+        terms = normalize(query).split()
+        if not terms:
+            return []
+        grams = set().union(*map(_query_grams, terms))
+        titles = self._titles
+        title_hits = []
+        for doc_id in self._in_order(self._candidates(self._title_postings, grams)):
+            if all(term in titles[doc_id] for term in terms):
+                title_hits.append(doc_id)
+                if len(title_hits) >= limit:
+                    break
+        text_hits = []
+        if len(title_hits) < limit:
+            skip = set(title_hits)
+            texts = self._texts
+            for doc_id in self._in_order(self._candidates(self._postings, grams)):
+                if doc_id not in skip and all(term in texts[doc_id] for term in terms):
+                    text_hits.append(doc_id)
+                    if len(title_hits) + len(text_hits) >= limit:
+                        break
+        return [(self._keys[doc_id], *self._labels[doc_id])
+                for doc_id in title_hits + text_hits]
+
+
+class LibrarySearch:
+    """
+    基本プロンプト・追加プロンプト・定型文の検索インデックスを構築し、最新の状態に保つクラスです。
+    テンプレートの再読み込み時は変化した文書のみ、定型文は編集レコードごとに該当カテゴリのみを更新します。
+    定型文の本文はカテゴリごとにまとめて読み込み、本文のキャッシュには残しません。
+    background を指定すると定型文全体の索引はバックグラウンドのスレッドで構築し、構築中の検索は
+    構築済みの範囲から結果を返します。構築中に編集されたカテゴリは、最新の内容で構築し直します。
+
+    引数:
+      template_manager (TemplateManager): 基本・追加プロンプトの提供元
+      one_click_manager (OneClickManager): 定型文の提供元（省略可）
+      background (bool): 定型文全体の索引をバックグラウンドで構築するかどうか
+    """
+
+    def __init__(self, template_manager, one_click_manager=None, background=False):
+        """
+        コンストラクタ
+
+        引数:
+          template_manager (TemplateManager): 基本・追加プロンプトの提供元
+          one_click_manager (OneClickManager): 定型文の提供元（省略可）
+          background (bool): 定型文全体の索引をバックグラウンドで構築するかどうか
+        """
+        self.template_manager = template_manager
+        self.one_click_manager = one_click_manager
+        self.background = background
+        self.index = SearchIndex()
+        # 索引はUIスレッドと構築スレッドの双方から更新するため、ロックで保護する
+        self._lock = threading.RLock()
+        self._epoch = 0  # 定型文全体の構築を要求した回数（古い構築を打ち切るため）
+        self._versions = {}  # カテゴリ名 -> 変更を反映した回数（構築中の編集を検出するため）
+        self._closed = False
+        self._thread = None
+        self._ready = threading.Event()
+        self._ready.set()
+        self.refresh_templates()
+        if one_click_manager is not None:
+            one_click_manager.add_change_listener(self.on_one_click_change)
+            self.refresh_one_click()
+
+    @property
+    def building(self):
+        """
+        定型文の索引をバックグラウンドで構築中かどうか
+        """
+        return not self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """
+        バックグラウンドでの構築が終わるまで待機します。
+
+        引数:
+          timeout (float): 最大待機時間（秒）。Noneの場合は無制限
+
+        戻り値:
+          bool: 構築が終わっている場合はTrue
+        """
+        return self._ready.wait(timeout)
+
+    def close(self):
+        """
+        定型文の変更通知の登録を解除し、構築中のスレッドを打ち切ります。
+        """
+        if self.one_click_manager is not None:
+            self.one_click_manager.remove_change_listener(self.on_one_click_change)
+        with self._lock:
+            self._closed = True
+
+    def _put(self, key, title, text, group):
+        if title or text:
+            self.index.upsert(key, title, text, group)
+        else:
+            self.index.remove(key)
+
+    def _sync(self, prefix, documents):
+        """
+        指定された種類の文書を documents と一致させます（ロックを取得して呼び出すこと）。
+
+        引数:
+          prefix (tuple): 文書キーの先頭要素
+          documents (iterable): (文書キー, タイトル, 本文, 分類名) のタプル
+        """
+        stale = set(self.index.keys(prefix))
+        for key, title, text, group in documents:
+            stale.discard(key)
+            self._put(key, title, text, group)
+        for key in stale:
+            self.index.remove(key)
+
+    def refresh_templates(self):
+        """
+        基本プロンプトと追加プロンプトの索引を最新の内容に合わせます。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        basic_prompts = self.template_manager.get_basic_prompts() or []
+        element_prompts = self.template_manager.get_element_prompts() or {}
+        with self._lock:
+            self._sync((KIND_BASIC,), (((KIND_BASIC, i), p.get("name", ""), p.get("prompt", ""),
+                                        "基本プロンプト") for i, p in enumerate(basic_prompts)))
+            self._sync((KIND_ELEMENT,),
+                       (((KIND_ELEMENT, ci, pi), p.get("title", ""), p.get("prompt", ""),
+                         c.get("category", ""))
+                        for ci, c in enumerate(element_prompts.get("categories", []))
+                        for pi, p in enumerate(c.get("prompt_lists", []))))
+
+    def _one_click_documents(self, category, indices=None):
+        """
+        定型文のカテゴリの文書を返します。本文は OneClickManager.read_entries でまとめて読み込みます。
+        """
+        return [((KIND_ONE_CLICK, category, index), title, text, category)
+                for index, title, text in self.one_click_manager.read_entries(category, indices)]
+
+    def refresh_one_click(self, category=None):
+        """
+        定型文の索引を最新の内容に合わせます。
+        全カテゴリを更新する場合、background が指定されていればバックグラウンドで構築します。
+
+        引数:
+          category (str): 更新するカテゴリ。省略時は全カテゴリ
+
+        戻り値:
+          なし
+        """
+        if category is not None:
+            with self._lock:
+                self._versions[category] = self._versions.get(category, 0) + 1
+                self._sync((KIND_ONE_CLICK, category), self._one_click_documents(category))
+        elif self.background:
+            self._start_build()
+        else:
+            with self._lock:
+                self._epoch += 1
+                categories = list(self.one_click_manager.category_order)
+                self._sync((KIND_ONE_CLICK,),
+                           (document for cat in categories
+                            for document in self._one_click_documents(cat)))
+
+    def _start_build(self):
+        """
+        定型文全体の索引の構築をバックグラウンドで開始します（構築中の場合は最初からやり直します）。
+        """
+        with self._lock:
+            self._epoch += 1
+            self._ready.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._build_worker,
+                                                name="LibrarySearch",
+                                                daemon=True)
+                self._thread.start()
+
+    def _build_worker(self):
+        """
+        構築用のスレッドで実行され、カテゴリごとに定型文の索引を構築します。
+        構築中に全体の構築が再度要求された場合は、最初からやり直します。
+        """
+        while True:
+            with self._lock:
+                epoch = self._epoch
+                if self._closed:
+                    break
+                # 無くなったカテゴリの文書を削除する
+                categories = list(self.one_click_manager.category_order)
+                existing = set(categories)
+                for group in self.index.groups((KIND_ONE_CLICK,)):
+                    if group[1] not in existing:
+                        for key in self.index.keys(group):
+                            self.index.remove(key)
+            if all(self._build_category(category, epoch) for category in categories):
+                with self._lock:
+                    if epoch == self._epoch or self._closed:
+                        break
+        with self._lock:
+            self._thread = None
+            self._ready.set()
+
+    def _build_category(self, category, epoch):
+        """
+        1つのカテゴリの索引を構築します。索引への追加は一定数ごとにロックを解放して行い、
+        その間にカテゴリが編集された場合は読み込みからやり直します。
+
+        戻り値:
+          bool: 構築を続ける場合はTrue（全体の構築がやり直しになった場合はFalse）
+        """
+        prefix = (KIND_ONE_CLICK, category)
+        while True:
+            with self._lock:
+                if self._closed or epoch != self._epoch:
+                    return False
+                version = self._versions.get(category, 0)
+            try:
+                documents = self._one_click_documents(category)
+            except Exception as e:
+                with self._lock:
+                    if self._versions.get(category, 0) != version:
+                        continue
+                print(f"定型文の検索インデックスの作成に失敗しました: {e}")
+                return True
+            keys = set()
+            for start in range(0, len(documents) or 1, BUILD_CHUNK_SIZE):
+                with self._lock:
+                    if self._closed or epoch != self._epoch:
+                        return False
+                    if self._versions.get(category, 0) != version:
+                        break
+                    for document in documents[start:start + BUILD_CHUNK_SIZE]:
+                        keys.add(document[0])
+                        self._put(*document)
+                    if start + BUILD_CHUNK_SIZE >= len(documents):
+                        for key in self.index.keys(prefix):
+                            if key not in keys:
+                                self.index.remove(key)
+                        return True
+
+    def on_one_click_change(self, record):
+        """
+        OneClickManagerの変更通知を受け取り、影響を受けたカテゴリの索引を更新します。
+
+        引数:
+          record (dict): 適用された編集レコード（"reload" は全体の再読み込み）
+
+        戻り値:
+          なし
+        """
+        op = record.get("op")
+        if op in ("update", "swap"):
+            category = record["category"]
+            indices = [record["index"]] if op == "update" else [record["i"], record["j"]]
+            with self._lock:
+                self._versions[category] = self._versions.get(category, 0) + 1
+                for document in self._one_click_documents(category, indices):
+                    self._put(*document)
+        elif op == "rename":
+            self.refresh_one_click(record["old"])
+            self.refresh_one_click(record["new"])
+        elif op in ("add_category", "add_entries", "clear", "move_range", "copy_category",
+                    "remove_category"):
+            self.refresh_one_click(record["category"])
+        elif op != "swap_categories":
+            self.refresh_one_click()
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        全てのライブラリを横断して検索します。
+
+        引数:
+          query (str): 検索文字列
+          limit (int): 最大件数
+
+        戻り値:
+          list: SearchHit のリスト
+        """
+        with self._lock:
+            results = self.index.search(query, limit)
+        return [SearchHit(key[0], key[1:], label, group) for key, label, group in results]
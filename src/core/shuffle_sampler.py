@@ -0,0 +1,213 @@
+"""
+shuffle_sampler.py
+基本プロンプト・変数の値・追加プロンプトを重み付きでランダムに選ぶ「シャッフル」機能のコンポーネントです。
+重みはエイリアス法の表にあらかじめ変換しておくため、ライブラリの大きさに関係なく1回の抽選は定数時間です。
+シードを指定すれば同じ結果を再現でき、データセット作成用に大量のサンプルを順に生成することもできます。
+"""
+import random
+from collections import namedtuple
+
+from src.core.derived_variables import DerivedVariables
+
+DEFAULT_ELEMENT_COUNT = 2
+MAX_DRAW_ATTEMPTS = 8  # 追加プロンプトの重複を避けるための1件あたりの抽選回数の上限
+
+ShuffleSample = namedtuple(
+    "ShuffleSample",
+    ["basic_index", "template", "variables", "element_keys", "element_prompts", "subject"])
+
+
+class AliasTable:
+    """
+    AliasTable クラスは、重み付きの抽選をエイリアス法（Vose の方法）で定数時間で行います。
+
+    引数:
+      weights (list): 各項目の重み（0以上、合計は正）
+
+    例外:
+      ValueError: 重みが空、負の値を含む、または合計が0の場合
+    """
+
+    def __init__(self, weights):
+        """
+        コンストラクタ
+
+        引数:
+          weights (list): 各項目の重み（0以上、合計は正）
+        """
+        weights = [float(w) for w in weights]
+        total = sum(weights)
+        if not weights or total <= 0 or min(weights) < 0:
+            raise ValueError("重みには正の値を1つ以上含めてください。")
+        n = len(weights)
+        self.size = n
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        scaled = [w * n / total for w in weights]
+        small = [i for i, w in enumerate(scaled) if w < 1.0]
+        large = [i for i, w in enumerate(scaled) if w >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        """
+        重みに比例した確率で項目の番号を1つ選びます。
+
+        引数:
+          rng (random.Random): 乱数生成器
+
+        戻り値:
+          int: 選ばれた項目の番号
+        """
+        u = rng.random() * self.size
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+
+class _WeightedChoice:
+    """
+    値のリストと、その重みから作ったエイリアス表の組です。
+    """
+
+    def __init__(self, values, weights):
+        self.values = values
+        self.table = AliasTable(weights)
+
+    def draw(self, rng):
+        return self.values[self.table.draw(rng)]
+
+
+def _weighted(candidates):
+    """
+    候補のリスト（値のみ）または辞書（値 -> 重み）から _WeightedChoice を作成します。
+    """
+    if isinstance(candidates, dict):
+        values = list(candidates)
+        return _WeightedChoice(values, [candidates[v] for v in values])
+    values = list(candidates)
+    return _WeightedChoice(values, [1] * len(values))
+
+
+class ShuffleSampler:
+    """
+    ShuffleSampler クラスは、基本プロンプト・変数の値・追加プロンプトをランダムに組み合わせます。
+    基本プロンプトと追加プロンプトは "weight" キーがあればその値で、無ければ均等に選ばれます。
+    変数の候補を指定しない変数は、すべての基本プロンプトの既定値のうち同じ変数名のものから選ばれます。
+    派生変数（"derived_variables"）は選ばれた値から計算されます。
+
+    引数:
+      basic_prompts (list): 基本プロンプトのデータ
+      element_prompts (dict): 追加プロンプトのデータ（"categories" と "default_subject" を含む）
+      candidates (dict): 変数名 -> 候補のリスト、または 値 -> 重み の辞書（省略可）
+      category_weights (dict): 追加プロンプトのカテゴリ名 -> 重み（省略時は均等）
+      element_count (int): 1回に選ぶ追加プロンプトの数
+    """
+
+    def __init__(self,
+                 basic_prompts,
+                 element_prompts,
+                 candidates=None,
+                 category_weights=None,
+                 element_count=DEFAULT_ELEMENT_COUNT):
+        """
+        コンストラクタ
+
+        引数:
+          basic_prompts (list): 基本プロンプトのデータ
+          element_prompts (dict): 追加プロンプトのデータ
+          candidates (dict): 変数名 -> 候補のリスト、または 値 -> 重み の辞書（省略可）
+          category_weights (dict): 追加プロンプトのカテゴリ名 -> 重み（省略時は均等）
+          element_count (int): 1回に選ぶ追加プロンプトの数
+
+        例外:
+          ValueError: 基本プロンプトが無い場合、または重みが不正な場合
+        """
+        if not basic_prompts:
+            raise ValueError("基本プロンプトがありません。")
+        self.basic_prompts = basic_prompts
+        self.subject = element_prompts.get("default_subject", "")
+        self.element_count = element_count
+        self._basic = AliasTable([p.get("weight", 1) for p in basic_prompts])
+        self._derived = [DerivedVariables(p.get("derived_variables")) for p in basic_prompts]
+
+        # 変数名ごとの候補。指定が無い変数は、全基本プロンプトの既定値を集めて候補にする
+        pooled = {}
+        for prompt in basic_prompts:
+            for name, value in prompt.get("default_variables", {}).items():
+                values = pooled.setdefault(name, [])
+                if str(value) not in values:
+                    values.append(str(value))
+        pooled.update(candidates or {})
+        self._candidates = {name: _weighted(values) for name, values in pooled.items() if values}
+
+        # 追加プロンプトはカテゴリを選んでからカテゴリ内のプロンプトを選ぶ
+        category_weights = category_weights or {}
+        self.categories = element_prompts.get("categories", [])
+        self._category_indexes = []
+        weights = []
+        self._prompt_tables = {}
+        for i, category in enumerate(self.categories):
+            prompts = category.get("prompt_lists", [])
+            weight = category_weights.get(category.get("category", ""), 1)
+            if prompts and weight > 0:
+                self._category_indexes.append(i)
+                weights.append(weight)
+                self._prompt_tables[i] = AliasTable([p.get("weight", 1) for p in prompts])
+        self._categories = AliasTable(weights) if weights else None
+
+    def draw(self, rng):
+        """
+        ランダムな組み合わせを1件作成します。
+
+        引数:
+          rng (random.Random): 乱数生成器
+
+        戻り値:
+          ShuffleSample: 選ばれた基本プロンプトの番号・テンプレート・変数の値・
+            追加プロンプトの (カテゴリ番号, プロンプト番号) とテンプレート・主語
+        """
+        basic_index = self._basic.draw(rng)
+        prompt = self.basic_prompts[basic_index]
+        variables = {}
+        for name in prompt.get("default_variables", {}):
+            choice = self._candidates.get(name)
+            variables[name] = choice.draw(rng) if choice else ""
+        if self._derived[basic_index].definitions:
+            variables.update(self._derived[basic_index].evaluate(variables))
+
+        keys = []
+        if self._categories is not None:
+            for _ in range(self.element_count * MAX_DRAW_ATTEMPTS):
+                if len(keys) >= self.element_count:
+                    break
+                category_index = self._category_indexes[self._categories.draw(rng)]
+                key = (category_index, self._prompt_tables[category_index].draw(rng))
+                if key not in keys:
+                    keys.append(key)
+            keys.sort()
+        element_prompts = [self.categories[c]["prompt_lists"][p]["prompt"] for c, p in keys]
+        return ShuffleSample(basic_index, prompt["prompt"], variables, keys, element_prompts,
+                             self.subject)
+
+    def stream(self, count=None, seed=None):
+        """
+        ランダムな組み合わせを順に生成します。
+
+        引数:
+          count (int): 生成する件数（Noneの場合は無限に生成します）
+          seed (int): 乱数のシード（同じシードなら同じ結果になります）
+
+        戻り値:
+          iterator: ShuffleSample を順に返すイテレーター
+        """
+        rng = random.Random(seed)
+        produced = 0
+        while count is None or produced < count:
+            yield self.draw(rng)
+            produced += 1
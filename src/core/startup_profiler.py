@@ -0,0 +1,214 @@
+"""
+startup_profiler.py
+アプリケーションの起動時間を段階ごとに計測するコンポーネントです（app.py の --profile-startup で使用）。
+段階ごとの経過時間に加えて、cProfile による関数ごとの処理時間と、モジュールごとの読み込み時間
+（python -X importtime の結果）をファイルに書き出します。
+cProfile と subprocess は計測する場合にだけ読み込み、通常の起動を遅くしないようにしています。
+"""
+import json
+import os
+import re
+import sys
+import time
+
+from src.core.instrumentation import instrumentation
+
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+REPORT_FILE = "startup_profile.json"
+PROFILE_FILE = "startup.prof"
+IMPORT_REPORT_LIMIT = 30  # 書き出すモジュールの数（読み込み時間の長い順）
+
+
+def measure_import_times(module="app", cwd=None, limit=IMPORT_REPORT_LIMIT):
+    """
+    新しいプロセスで python -X importtime を実行し、モジュールごとの読み込み時間を求めます。
+    計測中のプロセスでは既に読み込み済みのため、読み込みを伴わない初回起動の値を得るために別プロセスで計測します。
+
+    引数:
+      module (str): 読み込むモジュール名
+      cwd (str): 実行するディレクトリ（省略時は現在のディレクトリ）
+      limit (int): 返すモジュールの数
+
+    戻り値:
+      list: {"module", "self_ms", "cumulative_ms", "depth"} の辞書のリスト（累計時間の長い順）
+    """
+    import subprocess
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd,
+                            capture_output=True,
+                            text=True,
+                            timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else
+                           f"終了コード {result.returncode}")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            modules.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2,
+            })
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return modules[:limit]
+
+
+class _Phase:
+    """
+    with 文の範囲を起動の1段階として計測します（トレース中はトレースにも記録します）。
+    """
+    __slots__ = ("profiler", "name", "start", "timer")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.timer = instrumentation.timer(f"startup.{name}")
+
+    def __enter__(self):
+        self.timer.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_phase(self.name, time.perf_counter() - self.start)
+        return self.timer.__exit__(*exc)
+
+
+class StartupProfiler:
+    """
+    StartupProfiler クラスは、起動の段階ごとの経過時間と cProfile の結果を記録し、書き出します。
+    無効な場合の phase は、計測が無効な instrumentation の timer と同じく何もしません。
+
+    引数:
+      enabled (bool): 計測するかどうか
+      use_cprofile (bool): cProfile による計測も行うかどうか
+    """
+
+    def __init__(self, enabled=True, use_cprofile=True):
+        """
+        コンストラクタ
+
+        引数:
+          enabled (bool): 計測するかどうか
+          use_cprofile (bool): cProfile による計測も行うかどうか
+        """
+        self.enabled = enabled
+        self.phases = []  # (段階名, 経過時間（秒）) のリスト（計測順）
+        self.profile = None
+        if enabled and use_cprofile:
+            import cProfile
+            self.profile = cProfile.Profile()
+        self._profiling = False
+
+    def phase(self, name):
+        """
+        起動の1段階を計測する with 文用のオブジェクトを返します。
+
+        引数:
+          name (str): 段階名
+
+        戻り値:
+          with 文で使うオブジェクト
+        """
+        if not self.enabled:
+            return instrumentation.timer(f"startup.{name}")
+        return _Phase(self, name)
+
+    def add_phase(self, name, seconds):
+        """
+        計測済みの段階（モジュールの読み込みなど）を追加します。
+
+        引数:
+          name (str): 段階名
+          seconds (float): 経過時間（秒）
+
+        戻り値:
+          なし
+        """
+        if self.enabled:
+            self.phases.append((name, seconds))
+
+    def start_profile(self):
+        """
+        cProfile による計測を開始します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        if self.profile is not None and not self._profiling:
+            self.profile.enable()
+            self._profiling = True
+
+    def stop_profile(self):
+        """
+        cProfile による計測を終了します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        if self._profiling:
+            self.profile.disable()
+            self._profiling = False
+
+    def total(self):
+        """
+        すべての段階の経過時間の合計（秒）を返します。
+        """
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self):
+        """
+        段階ごとの経過時間を、コンソールに出力する文字列にします。
+
+        引数:
+          なし
+
+        戻り値:
+          str: 段階ごとの経過時間と合計
+        """
+        lines = ["起動時間の内訳:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<18}{seconds * 1000:9.1f} ms")
+        lines.append(f"  {'合計':<16}{self.total() * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+    def write(self, output_dir, import_times=True, import_cwd=None):
+        """
+        計測結果を output_dir に書き出します（startup_profile.json と startup.prof）。
+
+        引数:
+          output_dir (str): 書き出し先のフォルダ
+          import_times (bool): モジュールごとの読み込み時間も計測して含めるかどうか
+          import_cwd (str): 読み込み時間を計測するプロセスを実行するディレクトリ
+
+        戻り値:
+          dict: 書き出した内容
+        """
+        self.stop_profile()
+        os.makedirs(output_dir, exist_ok=True)
+        data = {
+            "phases": [{"name": name, "ms": seconds * 1000} for name, seconds in self.phases],
+            "total_ms": self.total() * 1000,
+        }
+        if self.profile is not None:
+            profile_path = os.path.join(output_dir, PROFILE_FILE)
+            self.profile.dump_stats(profile_path)
+            data["cprofile"] = profile_path
+        if import_times:
+            import subprocess
+            try:
+                data["imports"] = measure_import_times(cwd=import_cwd)
+            except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+                data["imports_error"] = str(e)
+        with open(os.path.join(output_dir, REPORT_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return data
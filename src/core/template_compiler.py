@@ -0,0 +1,302 @@
+"""
+template_compiler.py
+テンプレートの書式（変数・フィルター・条件分岐）を解析し、描画用の構文木に変換するモジュールです。
+変換結果はテンプレート文字列ごとにキャッシュし、描画は構文木を1回たどるだけで行います（eval は使いません）。
+
+書式:
+  {var}                     変数の値（値が無い場合は元の表記のまま残ります）
+  {var|filter|filter:引数}  フィルターを順に適用（例: {age|int}、{wear|default:"コート"}）
+  {?var}...{/}              var が空でない場合だけ ... を出力
+  {?!var}...{/}             var が空の場合だけ ... を出力
+  {?var=値}...{:}...{/}     var が値と等しい場合は前半、そうでない場合は {:} より後を出力（!= も可）
+  {?age<20}...{/}           数値として比較（< <= > >= が使えます。数値でない場合は偽）
+閉じていない条件や不明なフィルターは、書きかけの入力でも表示が崩れないよう元の表記のまま扱います。
+"""
+import re
+from functools import lru_cache
+
+TAG_PATTERN = re.compile(r"\{([^{}]+)\}")
+FILTER_PATTERN = re.compile(r'\|\s*([A-Za-z_]\w*)\s*(?::\s*("(?:[^"\\]|\\.)*"|[^|]*))?')
+CONDITION_PATTERN = re.compile(r"^\?\s*(!)?\s*([^=!<>]+?)\s*(?:(!?=|[<>]=?)\s*(.*?))?\s*$")
+INT_PATTERN = re.compile(r"-?\d+")
+NUMERIC_OPERATORS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+COMPILE_CACHE_SIZE = 512
+
+
+def _unquote(text):
+    """
+    フィルターや条件の引数の前後の空白と引用符を取り除きます。
+    """
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', text[1:-1])
+    return text
+
+
+def _default(value, arg):
+    return arg if value is None or value == "" else value
+
+
+def _int(value, _):
+    match = INT_PATTERN.search(value)
+    return match.group(0) if match else value
+
+
+def _truncate(value, arg):
+    try:
+        return value[:int(arg)]
+    except ValueError:
+        return value
+
+
+# フィルター名 -> (関数, 値が無い場合にも呼ぶか)
+FILTERS = {
+    "default": (_default, True),
+    "int": (_int, False),
+    "upper": (lambda value, _: value.upper(), False),
+    "lower": (lambda value, _: value.lower(), False),
+    "strip": (lambda value, _: value.strip(), False),
+    "truncate": (_truncate, False),
+}
+
+
+class Variable:
+    """
+    変数（フィルター付きを含む）を表す構文木の節です。
+    """
+    __slots__ = ("name", "filters", "raw", "names")
+
+    def __init__(self, name, filters, raw):
+        self.name = name
+        self.filters = filters  # (関数, 値が無い場合にも呼ぶか, 引数) のリスト
+        self.raw = raw
+        self.names = (name,)
+
+    def render(self, values):
+        value = values.get(self.name)
+        if value is not None:
+            value = str(value)
+        for func, accepts_missing, arg in self.filters:
+            if value is not None or accepts_missing:
+                value = func(value, arg)
+        return self.raw if value is None else value
+
+
+class Condition:
+    """
+    条件分岐（{?var}...{:}...{/}）を表す構文木の節です。
+    """
+    __slots__ = ("name", "negate", "op", "operand", "body", "orelse", "has_else", "raw", "names")
+
+    def __init__(self, name, negate, op, operand, raw):
+        self.name = name
+        self.negate = negate
+        self.op = op
+        self.operand = operand
+        self.body = []
+        self.orelse = []
+        self.has_else = False
+        self.raw = raw
+        self.names = ()
+
+    def test(self, values):
+        value = values.get(self.name)
+        value = "" if value is None else str(value)
+        if self.op == "=":
+            result = value == self.operand
+        elif self.op == "!=":
+            result = value != self.operand
+        elif self.op in NUMERIC_OPERATORS:
+            try:
+                result = NUMERIC_OPERATORS[self.op](float(value), float(self.operand))
+            except ValueError:
+                result = False
+        else:
+            result = bool(value.strip())
+        return result != self.negate
+
+    def render(self, values):
+        return render_nodes(self.body if self.test(values) else self.orelse, values)
+
+
+def render_nodes(nodes, values):
+    """
+    構文木の節のリストを描画します。
+
+    引数:
+      nodes (list): 文字列または節のリスト
+      values (dict): 変数名と値の辞書
+
+    戻り値:
+      str: 描画したテキスト
+    """
+    return "".join(node if node.__class__ is str else node.render(values) for node in nodes)
+
+
+def _parse_variable(tag, raw):
+    """
+    変数のタグを解析します。解析できない場合（不明なフィルターなど）はNoneを返します。
+    """
+    name, sep, rest = tag.partition("|")
+    if not sep:
+        # フィルターの無い変数は、従来どおりタグの中身をそのまま変数名とする
+        return Variable(tag, [], raw)
+    name = name.strip()
+    if not name:
+        return None
+    filters = []
+    rest = "|" + rest
+    pos = 0
+    for match in FILTER_PATTERN.finditer(rest):
+        if match.start() != pos or match.group(1) not in FILTERS:
+            return None
+        func, accepts_missing = FILTERS[match.group(1)]
+        arg = _unquote(match.group(2)) if match.group(2) is not None else ""
+        filters.append((func, accepts_missing, arg))
+        pos = match.end()
+    if pos != len(rest):
+        return None
+    return Variable(name, filters, raw)
+
+
+def _unwrap(parent, condition):
+    """
+    閉じられていない条件分岐の節を、タグを元の表記の文字列に戻して中身を親に展開します。
+    """
+    parent.pop()
+    parent.append(condition.raw)
+    parent.extend(condition.body)
+    if condition.has_else:
+        parent.append("{:}")
+        parent.extend(condition.orelse)
+
+
+def _finish(nodes):
+    """
+    隣り合う文字列を結合し、各節が参照する変数名を出現順に求めます。
+
+    戻り値:
+      tuple: nodes 全体が参照する変数名（重複なし）
+    """
+    merged = []
+    names = {}
+    for node in nodes:
+        if node.__class__ is str:
+            if merged and merged[-1].__class__ is str:
+                merged[-1] += node
+            elif node:
+                merged.append(node)
+            continue
+        if isinstance(node, Condition):
+            node.names = tuple(dict.fromkeys((node.name, ) + _finish(node.body) +
+                                             _finish(node.orelse)))
+        names.update(dict.fromkeys(node.names))
+        merged.append(node)
+    nodes[:] = merged
+    return tuple(names)
+
+
+def parse(template, expand_tag=None):
+    """
+    テンプレートを構文木の節のリストに変換します。
+
+    引数:
+      template (str): テンプレート文字列
+      expand_tag (callable): 変数・条件以外のタグを処理する関数（タグの中身と元の表記を受け取り、
+        節のリストまたはNoneを返す）。省略可
+
+    戻り値:
+      list: 文字列または節（Variable / Condition）のリスト
+    """
+    root = []
+    current = root
+    stack = []  # (条件の節, 親のリスト)
+    pos = 0
+    for match in TAG_PATTERN.finditer(template):
+        if match.start() > pos:
+            current.append(template[pos:match.start()])
+        pos = match.end()
+        raw = match.group(0)
+        tag = match.group(1)
+        if tag.startswith("?"):
+            parsed = CONDITION_PATTERN.match(tag)
+            if not parsed:
+                current.append(raw)
+                continue
+            negate, name, op, operand = parsed.groups()
+            condition = Condition(name, bool(negate), op, _unquote(operand or ""), raw)
+            current.append(condition)
+            stack.append((condition, current))
+            current = condition.body
+        elif tag.strip() == ":" and stack and not stack[-1][0].has_else:
+            stack[-1][0].has_else = True
+            current = stack[-1][0].orelse
+        elif tag.strip() == "/" and stack:
+            condition, current = stack.pop()
+        else:
+            nodes = expand_tag(tag, raw) if expand_tag else None
+            if nodes is not None:
+                current.extend(nodes)
+                continue
+            variable = _parse_variable(tag, raw)
+            current.append(variable if variable is not None else raw)
+    if pos < len(template):
+        current.append(template[pos:])
+    while stack:
+        condition, parent = stack.pop()
+        _unwrap(parent, condition)
+    _finish(root)
+    return root
+
+
+class CompiledTemplate:
+    """
+    CompiledTemplate クラスは、変換済みのテンプレートを保持し、変数の値から描画します。
+
+    引数:
+      template (str): テンプレート文字列
+      nodes (list): 構文木の節のリスト
+    """
+
+    def __init__(self, template, nodes):
+        """
+        コンストラクタ
+
+        引数:
+          template (str): テンプレート文字列
+          nodes (list): 構文木の節のリスト
+        """
+        self.template = template
+        self.nodes = nodes
+        self.variables = frozenset().union(*(n.names for n in nodes if n.__class__ is not str))
+
+    def render(self, values):
+        """
+        変数の値からテキストを描画します。
+
+        引数:
+          values (dict): 変数名と値の辞書
+
+        戻り値:
+          str: 描画したテキスト
+        """
+        return render_nodes(self.nodes, values)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_template(template):
+    """
+    テンプレートを変換します。同じテンプレートは変換結果を再利用します。
+
+    引数:
+      template (str): テンプレート文字列
+
+    戻り値:
+      CompiledTemplate: 変換済みのテンプレート
+    """
+    return CompiledTemplate(template, parse(template))
@@ -4,12 +4,18 @@ template_manager.py
 """
 import json
 import os
+import random
 import sys
 import tkinter as tk
 from tkinter import messagebox
 
+from src.core.instrumentation import instrumentation, instrumented
+from src.core.partials import PartialRegistry
+from src.core.wildcards import WildcardLibrary
+
 # 定数（出力メッセージなど）の定義
 FILE_NOT_FOUND_MSG = "jsonファイルをsettingsフォルダに用意してください。"
+WILDCARD_DIR_NAME = "wildcards"
 
 
 class TemplateManager:
@@ -37,9 +43,19 @@ class TemplateManager:
         """
         self.basic_prompt_file = basic_prompt_file
         self.element_prompt_file = element_prompt_file
-        self.basic_prompts = self.load_prompts(basic_prompt_file)
-        self.element_prompts = self.load_prompts(element_prompt_file)
+        with instrumentation.timer("template_manager.load"):
+            self.basic_prompts = self.load_prompts(basic_prompt_file)
+            self.element_prompts = self.load_prompts(element_prompt_file)
+            # {>部品名} で読み込む部品（基本プロンプトの名前・追加プロンプトのタイトル・partials）
+            self.partials = PartialRegistry(self.partial_sources())
+        # ワイルドカードの候補ファイルは基本プロンプトと同じフォルダの wildcards に置く
+        if os.path.exists(basic_prompt_file):
+            settings_dir = os.path.dirname(os.path.abspath(basic_prompt_file))
+        else:
+            settings_dir = os.path.join(os.getcwd(), "settings")
+        self.wildcards = WildcardLibrary(os.path.join(settings_dir, WILDCARD_DIR_NAME))
 
+    @instrumented("json.load")
     def load_prompts(self, filename):
         """
         指定されたJSONファイルからプロンプトを読み込みます。
@@ -111,9 +127,12 @@ class TemplateManager:
         """
         return self.element_prompts
 
+    @instrumented("template.replace_variables")
     def replace_variables(self, text, variables):
         """
         テキスト中のプレースホルダ（例: {subject}）を、変数辞書の値に置換します。
+        フィルター（例: {age|int}）、条件分岐（例: {?background}...{/}）、部品の読み込み（例: {>name}）
+        にも対応します。
         
         引数:
           text (str): 置換対象のテキスト
@@ -122,10 +141,23 @@ class TemplateManager:
         戻り値:
           str: 変数が置換されたテキスト
         """
-        for var, value in variables.items():
-            text = text.replace(f"{{{var}}}", value)
-        return text
+        return self.partials.compile(text).render(variables)
 
+    def render(self, text, variables, seed=None):
+        """
+        変数を置換した後、ワイルドカード（例: {__hair__}）を候補ファイルのランダムな1行に置き換えます。
+        
+        引数:
+          text (str): 置換対象のテキスト
+          variables (dict): 変数名と置換値の辞書
+          seed (int): 乱数のシード（同じシードなら同じ結果になります。Noneの場合は毎回変わります）
+          
+        戻り値:
+          str: 変数とワイルドカードが置換されたテキスト
+        """
+        return self.wildcards.resolve(self.replace_variables(text, variables), random.Random(seed))
+
+    @instrumented("template_manager.reload")
     def reload_templates(self):
         """
         基本プロンプトと要素プロンプトの両方を再読み込みします。
@@ -138,6 +170,32 @@ class TemplateManager:
         """
         self.basic_prompts = self.load_prompts(self.basic_prompt_file)
         self.element_prompts = self.load_prompts(self.element_prompt_file)
+        # 変更された部品と、それを読み込んでいるテンプレートだけが変換し直される
+        self.partials.update(self.partial_sources())
+
+    def partial_sources(self):
+        """
+        {>部品名} で読み込める部品の一覧を作成します。
+        基本プロンプトは名前、追加プロンプトはタイトルで参照でき、element_prompts.json の
+        "partials"（部品名 -> テンプレート）で定義した部品はそれらより優先されます。
+        
+        引数:
+          なし
+          
+        戻り値:
+          dict: 部品名 -> テンプレート文字列
+        """
+        sources = {}
+        for prompt in self.basic_prompts or []:
+            if "name" in prompt and "prompt" in prompt:
+                sources[prompt["name"]] = prompt["prompt"]
+        element_prompts = self.element_prompts if isinstance(self.element_prompts, dict) else {}
+        for category in element_prompts.get("categories", []):
+            for prompt in category.get("prompt_lists", []):
+                if "title" in prompt and "prompt" in prompt:
+                    sources[prompt["title"]] = prompt["prompt"]
+        sources.update(element_prompts.get("partials", {}))
+        return sources
 
 
 if __name__ == "__main__":
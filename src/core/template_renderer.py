@@ -0,0 +1,108 @@
+"""
+template_renderer.py
+プレースホルダ（例: {subject}）を含むテンプレートを差分更新しながら展開するコンポーネントです。
+テンプレートを固定文字列と、変数・条件分岐の区間に分割しておき、変数が1つ変わった時は
+その変数を参照する区間だけを書き換えます。
+"""
+from src.core.template_compiler import compile_template
+
+
+class TemplateRenderer:
+    """
+    TemplateRenderer クラスは、テンプレートを区間に分割して保持し、変数の変更を差分で反映します。
+    値が与えられていないプレースホルダは TemplateManager.replace_variables と同じく元の表記のまま残ります。
+    書式（フィルター・条件分岐）は template_compiler を参照してください。
+
+    引数:
+      template (str): テンプレート文字列
+      variables (dict): 変数名と値の辞書（省略可）
+      compiler (callable): テンプレートを変換する関数（省略時は compile_template。
+        部品を展開する場合は PartialRegistry.compile を渡します）
+    """
+
+    def __init__(self, template, variables=None, compiler=compile_template):
+        """
+        コンストラクタ
+
+        引数:
+          template (str): テンプレート文字列
+          variables (dict): 変数名と値の辞書（省略可）
+          compiler (callable): テンプレートを変換する関数
+        """
+        self.template = template
+        self.compiled = compiler(template)
+        self._nodes = self.compiled.nodes
+        self._values = {}
+        self._segments = []  # 展開済みの区間（固定文字列、または変数・条件分岐の描画結果）
+        self._slots = {}  # 変数名 -> その変数を参照する区間のインデックスのリスト
+        for index, node in enumerate(self._nodes):
+            if node.__class__ is str:
+                self._segments.append(node)
+                continue
+            self._segments.append(node.render(self._values))
+            for name in node.names:
+                self._slots.setdefault(name, []).append(index)
+        self._text = None
+        if variables:
+            self.update(variables)
+
+    @property
+    def placeholders(self):
+        """
+        テンプレートが参照する変数名のリストを出現順に返します。
+
+        戻り値:
+          list: 変数名のリスト
+        """
+        return list(self._slots)
+
+    def set_variable(self, name, value):
+        """
+        変数の値を設定し、その変数を参照する区間だけを書き換えます。
+
+        引数:
+          name (str): 変数名
+          value (str): 値
+
+        戻り値:
+          bool: 展開結果が変わった場合はTrue
+        """
+        if name in self._values and self._values[name] == value:
+            return False
+        self._values[name] = value
+        changed = False
+        for index in self._slots.get(name, ()):
+            rendered = self._nodes[index].render(self._values)
+            if rendered != self._segments[index]:
+                self._segments[index] = rendered
+                changed = True
+        if changed:
+            self._text = None
+        return changed
+
+    def update(self, variables):
+        """
+        複数の変数をまとめて設定します。値が変わっていない変数は無視します。
+
+        引数:
+          variables (dict): 変数名と値の辞書
+
+        戻り値:
+          bool: 展開結果が変わった場合はTrue
+        """
+        changed = False
+        for name, value in variables.items():
+            changed = self.set_variable(name, value) or changed
+        return changed
+
+    @property
+    def text(self):
+        """
+        展開結果を返します（変更が無い間は前回の結果を再利用します）。
+
+        戻り値:
+          str: 展開したテキスト
+        """
+        if self._text is None:
+            self._text = "".join(self._segments)
+        return self._text
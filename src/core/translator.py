@@ -0,0 +1,68 @@
+"""
+translator.py
+DeePL API を利用してプロンプトを翻訳するコンポーネントです。
+Tkのウィジェットに依存しないため、画面の英訳ボタンと一括生成の両方から利用できます。
+requests は読み込みに時間がかかり、翻訳を使わない場合は不要なため、初めて翻訳する時に読み込みます。
+"""
+from src.core.instrumentation import instrumented
+
+DEEPL_API_URL = "https://api-free.deepl.com/v2/translate"
+DEFAULT_TARGET_LANG = "EN"
+
+
+class TranslationError(Exception):
+    """
+    翻訳リクエストが失敗した場合に送出される例外です。
+    """
+
+
+class DeepLTranslator:
+    """
+    DeepLTranslator クラスは、DeePL API にテキストを送信して翻訳結果を取得します。
+
+    引数:
+      api_key (str): DeePL の APIキー
+      target_lang (str): 翻訳先の言語（省略時は英語）
+      url (str): APIのURL
+    """
+
+    def __init__(self, api_key, target_lang=DEFAULT_TARGET_LANG, url=DEEPL_API_URL):
+        """
+        コンストラクタ
+
+        引数:
+          api_key (str): DeePL の APIキー
+          target_lang (str): 翻訳先の言語
+          url (str): APIのURL
+        """
+        self.api_key = api_key
+        self.target_lang = target_lang
+        self.url = url
+
+    @instrumented("translation.request")
+    def translate(self, text):
+        """
+        テキストを翻訳します。
+
+        引数:
+          text (str): 翻訳するテキスト
+
+        戻り値:
+          str: 翻訳結果（結果が空の場合は空文字）
+
+        例外:
+          TranslationError: リクエストが失敗した場合
+        """
+        import requests  # DeePL APIへのアクセスに利用（初回のみ読み込み）
+
+        params = {"auth_key": self.api_key, "text": text, "target_lang": self.target_lang}
+        try:
+            response = requests.post(self.url, data=params)
+            response.raise_for_status()  # HTTPエラーがあれば例外を送出
+            translations = response.json().get("translations", [])
+        except requests.exceptions.RequestException as e:
+            raise TranslationError(str(e)) from e
+        return translations[0].get("text", "") if translations else ""
+
+    def __call__(self, text):
+        return self.translate(text)
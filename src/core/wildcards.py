@@ -0,0 +1,199 @@
+"""
+wildcards.py
+テンプレート中のワイルドカード（例: {__hair__}）を、settings/wildcards/hair.txt の
+ランダムな1行に置き換えるコンポーネントです。
+ファイルは初めて使われた時に各行の開始位置だけを索引として読み込み、選ばれた行だけをファイルから読み出します。
+ファイルの更新日時またはサイズが変わった場合は索引を作り直します。
+"""
+import os
+import re
+import threading
+from array import array
+
+WILDCARD_PATTERN = re.compile(r"\{__([^{}/\\]+?)__\}")
+WILDCARD_SUFFIX = ".txt"
+MAX_WILDCARD_DEPTH = 5  # 選ばれた行に含まれるワイルドカードを展開する深さの上限
+
+
+class WildcardFile:
+    """
+    WildcardFile クラスは、ワイルドカードの候補ファイル1つの行の開始位置を保持します。
+    空行と # で始まる行は候補に含めません。
+
+    引数:
+      path (str): 候補ファイルのパス
+      stat (tuple): 索引を作成した時のファイルの (サイズ, 更新日時)
+    """
+
+    def __init__(self, path, stat):
+        """
+        コンストラクタ（ファイルを1行ずつ読み、候補となる行の開始位置を記録します）
+
+        引数:
+          path (str): 候補ファイルのパス
+          stat (tuple): 索引を作成した時のファイルの (サイズ, 更新日時)
+        """
+        self.path = path
+        self.stat = stat
+        self.offsets = array("q")
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                text = line.strip()
+                if offset == 0 and text.startswith(b"\xef\xbb\xbf"):
+                    text = text[3:].strip()
+                if text and not text.startswith(b"#"):
+                    self.offsets.append(offset)
+                offset += len(line)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def line(self, index):
+        """
+        指定した番号の候補を読み出します。
+
+        引数:
+          index (int): 候補の番号
+
+        戻り値:
+          str: 候補の文字列（前後の空白を除きます）
+        """
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[index])
+            return f.readline().decode("utf-8-sig").strip()
+
+
+class WildcardLibrary:
+    """
+    WildcardLibrary クラスは、ワイルドカードのフォルダにある候補ファイルを必要になった時に読み込み、
+    テンプレート中のワイルドカードを置き換えます。
+
+    引数:
+      directory (str): 候補ファイルを置くフォルダのパス
+    """
+
+    def __init__(self, directory):
+        """
+        コンストラクタ
+
+        引数:
+          directory (str): 候補ファイルを置くフォルダのパス
+        """
+        self.directory = directory
+        self._files = {}  # ワイルドカード名 -> WildcardFile
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+        ワイルドカードの候補ファイルの索引を返します。
+        初回、またはファイルが更新されていた場合は索引を作り直します。
+
+        引数:
+          name (str): ワイルドカード名（例: "hair"）
+
+        戻り値:
+          WildcardFile: 候補ファイルの索引（ファイルが無い場合はNone）
+        """
+        path = os.path.join(self.directory, name + WILDCARD_SUFFIX)
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._files.pop(name, None)
+            return None
+        stat = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._files.get(name)
+            if cached is not None and cached.stat == stat:
+                return cached
+        try:
+            wildcard_file = WildcardFile(path, stat)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"ワイルドカード '{name}' の読み込みに失敗しました: {e}")
+            return None
+        with self._lock:
+            self._files[name] = wildcard_file
+        return wildcard_file
+
+    def names(self):
+        """
+        フォルダにあるワイルドカード名の一覧を返します。
+
+        引数:
+          なし
+
+        戻り値:
+          list: ワイルドカード名のリスト（名前順）
+        """
+        try:
+            files = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(f[:-len(WILDCARD_SUFFIX)] for f in files if f.endswith(WILDCARD_SUFFIX))
+
+    def fingerprint(self):
+        """
+        フォルダにある候補ファイルの状態（名前・サイズ・更新日時）を返します。
+        候補ファイルが変更されると値が変わるため、描画結果のキャッシュのキーに使えます。
+
+        引数:
+          なし
+
+        戻り値:
+          list: [ワイルドカード名, サイズ, 更新日時] のリスト（名前順）
+        """
+        state = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(WILDCARD_SUFFIX) and entry.is_file():
+                        st = entry.stat()
+                        state.append([entry.name[:-len(WILDCARD_SUFFIX)], st.st_size,
+                                      st.st_mtime_ns])
+        except OSError:
+            return []
+        return sorted(state)
+
+    def choose(self, name, rng):
+        """
+        ワイルドカードの候補からランダムに1つ選びます。
+
+        引数:
+          name (str): ワイルドカード名
+          rng (random.Random): 乱数生成器
+
+        戻り値:
+          str: 選ばれた候補（ファイルが無い、または候補が空の場合はNone）
+        """
+        wildcard_file = self.get(name)
+        if not wildcard_file:
+            return None
+        return wildcard_file.line(rng.randrange(len(wildcard_file)))
+
+    def resolve(self, text, rng):
+        """
+        テキスト中のワイルドカードを候補からランダムに選んだ文字列に置き換えます。
+        同じワイルドカードが複数あっても、それぞれ別に選びます。
+        候補ファイルが無いワイルドカードは元の表記のまま残します。
+
+        引数:
+          text (str): 対象のテキスト
+          rng (random.Random): 乱数生成器（シードを固定すれば同じ結果を再現できます）
+
+        戻り値:
+          str: ワイルドカードを置き換えたテキスト
+        """
+
+        def replace(match):
+            value = self.choose(match.group(1), rng)
+            return match.group(0) if value is None else value
+
+        for _ in range(MAX_WILDCARD_DEPTH):
+            if "{__" not in text:
+                break
+            resolved = WILDCARD_PATTERN.sub(replace, text)
+            if resolved == text:
+                break
+            text = resolved
+        return text
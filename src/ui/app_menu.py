@@ -3,10 +3,11 @@ app_menu.py
 アプリケーションのメニューバーを管理するクラスです。
 """
 import os
-import subprocess
 import tkinter as tk
 from tkinter import messagebox
 
+from src.ui.performance_hud import PerformanceHud
+
 
 class AppMenu:
     """
@@ -36,6 +37,9 @@ class AppMenu:
         self.ui_manager = ui_manager
         self.api_key_callback = api_key_callback
         self.settings_dir = settings_dir
+        self.performance_hud = None
+        self.hud_var = tk.BooleanVar(self.master, value=False)
+        self.post_process_var = tk.BooleanVar(self.master, value=False)
         self.create_menu()
 
     def create_menu(self):
@@ -68,9 +72,52 @@ class AppMenu:
         menubar.add_cascade(label="ファイル", menu=file_menu)
         setting_menu = tk.Menu(menubar, tearoff=0)
         setting_menu.add_command(label="APIキー設定", command=self.api_key_callback)
+        setting_menu.add_separator()
+        setting_menu.add_checkbutton(label="完成プロンプトの整形（重複文の削除など）",
+                                     variable=self.post_process_var,
+                                     command=self.toggle_post_processing)
+        setting_menu.add_checkbutton(label="パフォーマンス表示",
+                                     variable=self.hud_var,
+                                     command=self.toggle_performance_hud)
         menubar.add_cascade(label="設定", menu=setting_menu)
         self.master.config(menu=menubar)
 
+    def toggle_performance_hud(self):
+        """
+        メニューのチェック状態に合わせて、パフォーマンス表示を開くか閉じます。
+        計測は表示している間だけ有効になります。
+        
+        引数:
+          なし
+          
+        戻り値:
+          なし
+        """
+        is_open = self.performance_hud is not None and self.performance_hud.winfo_exists()
+        if self.hud_var.get() and not is_open:
+            self.performance_hud = PerformanceHud(self.master, on_close=self.on_hud_closed)
+        elif not self.hud_var.get() and is_open:
+            self.performance_hud.close()
+
+    def toggle_post_processing(self):
+        """
+        メニューのチェック状態に合わせて、完成プロンプトの後処理を切り替えます。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        self.ui_manager.set_post_processing(self.post_process_var.get())
+
+    def on_hud_closed(self):
+        """
+        パフォーマンス表示が閉じられた時に、メニューのチェックを外します。
+        """
+        self.performance_hud = None
+        self.hud_var.set(False)
+
     def open_json_editor(self, file_path):
         """
         指定されたJSONファイルをエディタで開きます。
@@ -81,6 +128,7 @@ class AppMenu:
         戻り値:
           なし
         """
+        import subprocess  # エディタを開く時にだけ使うため、起動時には読み込まない
         try:
             subprocess.Popen(["notepad", file_path])
         except Exception as e:
@@ -3,9 +3,15 @@ app_ui_manager.py
 アプリケーションのUIコンポーネント管理クラス
 """
 import os
+import random
 import tkinter as tk
-from tkinter import ttk
+from tkinter import messagebox, ttk
 
+from src.core.instrumentation import instrumentation, instrumented
+from src.core.one_click_manager import OneClickManager
+from src.core.search_index import KIND_BASIC, KIND_ELEMENT, KIND_ONE_CLICK, LibrarySearch
+from src.core.shuffle_sampler import ShuffleSampler
+from src.ui.command_palette import CommandPalette
 # 相対インポートに修正
 from src.ui.frames.basic_prompt_frame import BasicPromptFrame
 from src.ui.frames.element_prompt_frame import ElementPromptFrame
@@ -37,10 +43,25 @@ class AppUIManager:
         self.basic_prompts = template_manager.get_basic_prompts()
         self.element_prompts = template_manager.get_element_prompts()
 
+        # 各タブのフレームは初めて表示される時に生成する
+        self.basic_frame = None
+        self.element_frame = None
+        self.final_frame = None
+        self.one_click_frame = None
+        self.post_processing = False  # 完成プロンプトの後処理の有無（設定メニューで切り替える）
+        self.variable_entries = {}
+        # 定型文の管理クラスと横断検索インデックスは必要になった時に生成する
+        self.one_click_manager = None
+        self.library_search = None
+        self.palette = None
+        # シャッフル用の抽選表はプロンプトデータが変わるまで使い回す
+        self.shuffle_sampler = None
+        self.shuffle_rng = random.Random()
+
         # UIコンポーネント初期化
         self.create_notebook()
         self.create_ui_components()
-        self.basic_frame.set_basic_prompt(0)
+        self.bind_palette_shortcut()
 
     def create_notebook(self):
         """
@@ -58,10 +79,57 @@ class AppUIManager:
         self.notebook.add(self.prompt_tab, text="プロンプト作成")
         self.one_click_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.one_click_tab, text="定型文簡単コピー")
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
     def create_ui_components(self):
         """
-        UIコンポーネントを生成・配置します。
+        UIコンポーネントの生成処理を各タブに登録し、表示中のタブのみ生成します。
+        その他のタブは初めて選択された時（<<NotebookTabChanged>>）に生成されます。
+        
+        引数:
+          なし
+          
+        戻り値:
+          なし
+        """
+        self._tab_builders = {
+            str(self.prompt_tab): self.create_prompt_tab_components,
+            str(self.one_click_tab): self.create_one_click_tab_components,
+        }
+        self.ensure_tab_built(self.notebook.select())
+
+    def on_tab_changed(self, _):
+        """
+        Notebookのタブ切り替え時に、未生成のタブを生成します。
+        
+        引数:
+          _ : イベント引数
+          
+        戻り値:
+          なし
+        """
+        self.ensure_tab_built(self.notebook.select())
+
+    def ensure_tab_built(self, tab_id):
+        """
+        指定されたタブのUIコンポーネントが未生成であれば生成します。
+        
+        引数:
+          tab_id (str): タブのウィジェット名
+          
+        戻り値:
+          bool: このタブを新たに生成した場合はTrue
+        """
+        builder = self._tab_builders.pop(str(tab_id), None)
+        if builder is None:
+            return False
+        builder()
+        return True
+
+    @instrumented("ui.build_prompt_tab")
+    def create_prompt_tab_components(self):
+        """
+        プロンプト作成タブのUIコンポーネントを生成・配置します。
         
         引数:
           なし
@@ -69,17 +137,23 @@ class AppUIManager:
         戻り値:
           なし
         """
-        self.basic_frame = BasicPromptFrame(self.prompt_tab, self.basic_prompts,
-                                            self.on_basic_select, self.on_text_change)
+        with instrumentation.timer("ui.create_basic_frame"):
+            self.basic_frame = BasicPromptFrame(self.prompt_tab, self.basic_prompts,
+                                                self.on_basic_select, self.on_text_change,
+                                                self.on_variable_change, self.shuffle_prompt)
         self.basic_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
         self.prompt_tab.columnconfigure(0, weight=1)
 
-        self.element_frame = ElementPromptFrame(self.prompt_tab, self.element_prompts,
-                                                self.on_element_select, self.on_text_change)
+        with instrumentation.timer("ui.create_element_frame"):
+            self.element_frame = ElementPromptFrame(self.prompt_tab, self.element_prompts,
+                                                    self.on_element_select, self.on_text_change)
         self.element_frame.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
         self.prompt_tab.columnconfigure(1, weight=1)
 
-        self.final_frame = FinalPromptFrame(self.prompt_tab)
+        with instrumentation.timer("ui.create_final_frame"):
+            self.final_frame = FinalPromptFrame(self.prompt_tab)
+            if self.post_processing:
+                self.final_frame.set_post_processing(True)
         self.final_frame.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
 
         # FinalPromptFrameに入力ソースを設定
@@ -88,9 +162,141 @@ class AppUIManager:
         self.prompt_tab.rowconfigure(1, weight=1)
 
         self.variable_entries = self.basic_frame.variable_entries
-        self.one_click_frame = OneClickFrame(self.one_click_tab)
+        self.basic_frame.set_basic_prompt(0)
+
+    @instrumented("ui.build_one_click_tab")
+    def create_one_click_tab_components(self):
+        """
+        定型文簡単コピータブのUIコンポーネントを生成・配置します。
+        
+        引数:
+          なし
+          
+        戻り値:
+          なし
+        """
+        manager = self.get_one_click_manager()
+        with instrumentation.timer("ui.create_one_click_frame"):
+            self.one_click_frame = OneClickFrame(self.one_click_tab, manager)
         self.one_click_frame.pack(expand=1, fill="both", padx=10, pady=10)
 
+    def bind_palette_shortcut(self):
+        """
+        Ctrl+K でコマンドパレットを開くようにキーを割り当てます。
+        入力欄では Ctrl+K の既定動作（行末まで削除）より優先させます。
+        
+        引数:
+          なし
+          
+        戻り値:
+          なし
+        """
+        for sequence in ("<Control-k>", "<Control-K>"):
+            self.master.bind_all(sequence, self.open_command_palette)
+            for widget_class in ("Text", "Entry", "TEntry"):
+                self.master.bind_class(widget_class, sequence, self.open_command_palette)
+
+    def get_one_click_manager(self):
+        """
+        定型文の管理クラスを返します（初回呼び出し時に生成します）。
+        
+        引数:
+          なし
+          
+        戻り値:
+          OneClickManager: 定型文の管理クラス
+        """
+        if self.one_click_manager is None:
+            self.one_click_manager = OneClickManager()
+        return self.one_click_manager
+
+    def open_command_palette(self, _=None):
+        """
+        全ライブラリを横断して検索するコマンドパレットを開きます。
+        検索インデックスは初めて開いた時に構築し、以降は変更に合わせて差分更新します。
+        
+        引数:
+          _ : イベント引数
+          
+        戻り値:
+          str: 既定のキー処理を抑止するための "break"
+        """
+        if self.palette is not None and self.palette.winfo_exists():
+            self.palette.lift()
+            self.palette.entry.focus_set()
+            return "break"
+        if self.library_search is None:
+            # 定型文の索引は件数が多いとUIを止めるため、バックグラウンドで作成する
+            self.library_search = LibrarySearch(self.template_manager,
+                                                self.get_one_click_manager(),
+                                                background=True)
+        library_search = self.library_search
+        self.palette = CommandPalette(self.master, library_search.search, self.apply_search_hit,
+                                      busy=lambda: library_search.building)
+        return "break"
+
+    def apply_search_hit(self, hit):
+        """
+        検索結果の項目へ移動して適用します。
+        基本プロンプトはコンボボックスで選択、追加プロンプトはツリーで選択し、
+        定型文はボタンをクリックした時と同じくコピーします。
+        
+        引数:
+          hit (SearchHit): 検索結果
+          
+        戻り値:
+          なし
+        """
+        if hit.kind in (KIND_BASIC, KIND_ELEMENT):
+            self.notebook.select(self.prompt_tab)
+            self.ensure_tab_built(self.prompt_tab)
+            if hit.kind == KIND_BASIC:
+                self.basic_frame.set_basic_prompt(hit.key[0])
+            else:
+                self.element_frame.select_prompt(*hit.key)
+        elif hit.kind == KIND_ONE_CLICK:
+            self.notebook.select(self.one_click_tab)
+            self.ensure_tab_built(self.one_click_tab)
+            self.one_click_frame.show_entry(*hit.key)
+
+    def shuffle_prompt(self):
+        """
+        基本プロンプト・変数の値・追加プロンプトをランダムに選んで画面に反映します。
+        
+        引数:
+          なし
+          
+        戻り値:
+          bool: 反映できた場合はTrue
+        """
+        if not self.basic_prompts:
+            messagebox.showinfo("情報", "シャッフルできる基本プロンプトがありません。")
+            return False
+        if self.shuffle_sampler is None:
+            self.shuffle_sampler = ShuffleSampler(self.basic_prompts, self.element_prompts)
+        sample = self.shuffle_sampler.draw(self.shuffle_rng)
+        self.basic_frame.set_basic_prompt(sample.basic_index)
+        self.basic_frame.set_variable_values(sample.variables)
+        self.element_frame.select_prompts(sample.element_keys)
+        self.final_frame.reroll_wildcards(self.shuffle_rng.randrange(2**32))
+        return True
+
+    def set_post_processing(self, enabled):
+        """
+        完成プロンプトの後処理（重複文の削除など）の有無を切り替えます。
+        完成プロンプトの表示がまだ生成されていない場合は、生成時に反映します。
+
+        引数:
+          enabled (bool): 後処理を行うかどうか
+
+        戻り値:
+          なし
+        """
+        self.post_processing = enabled
+        if self.final_frame is not None:
+            self.final_frame.set_post_processing(enabled)
+
+    @instrumented("ui.refresh")
     def refresh_ui_components(self):
         """
         UIコンポーネントのデータを最新の状態に更新します。
@@ -104,14 +310,39 @@ class AppUIManager:
         # 最新のプロンプトデータを取得
         self.basic_prompts = self.template_manager.get_basic_prompts()
         self.element_prompts = self.template_manager.get_element_prompts()
+        self.shuffle_sampler = None
 
-        # 各フレームの更新
-        self.basic_frame.update_basic_prompts(self.basic_prompts)
-        self.basic_frame.set_basic_prompt(0)
-        self.element_frame.update_element_prompts(self.element_prompts)
+        # 各フレームの更新（未生成のタブは生成時に最新データを読み込む）
+        if self.basic_frame is not None:
+            self.basic_frame.update_basic_prompts(self.basic_prompts)
+            self.basic_frame.set_basic_prompt(0)
+            self.element_frame.update_element_prompts(self.element_prompts)
 
         # one_click_frame の更新
-        self.one_click_frame.refresh_entries()
+        if self.one_click_frame is not None:
+            self.one_click_frame.refresh_entries()
+        elif self.one_click_manager is not None:
+            self.one_click_manager.reload()
+
+        # 検索インデックスは変化した項目のみ更新（定型文は変更通知で更新済み）
+        if self.library_search is not None:
+            self.library_search.refresh_templates()
+
+    def shutdown(self):
+        """
+        アプリケーション終了時の後処理を行います。
+        保留中の定型文データを書き込みます。
+        
+        引数:
+          なし
+          
+        戻り値:
+          なし
+        """
+        if self.library_search is not None:
+            self.library_search.close()
+        if self.one_click_manager is not None:
+            self.one_click_manager.close()
 
     def on_basic_select(self, _):
         """
@@ -149,6 +380,19 @@ class AppUIManager:
         """
         self.final_frame.schedule_update()
 
+    def on_variable_change(self, name, value):
+        """
+        基本プロンプトの変数が変わった時の処理を実行します。
+        
+        引数:
+          name (str): 変数名
+          value (str): 新しい値
+          
+        戻り値:
+          なし
+        """
+        self.final_frame.update_variable(name, value)
+
     def set_icon(self):
         """
         アプリのアイコンを設定します。
@@ -0,0 +1,182 @@
+"""
+command_palette.py
+Ctrl+K で開くコマンドパレットを提供するコンポーネントです。
+基本プロンプト・追加プロンプト・定型文を横断して検索し、選択した項目へ移動して適用します。
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from src.core.search_index import KIND_BASIC, KIND_ELEMENT, KIND_ONE_CLICK
+
+RESULT_LIMIT = 50
+RESULT_ROWS = 15
+SEARCH_DELAY_MS = 30  # 入力が途切れてから検索するまでの待ち時間
+BUSY_POLL_MS = 200  # 索引の作成が終わったかを確認する間隔
+TITLE = "検索 (Ctrl+K)"
+KIND_LABELS = {KIND_BASIC: "基本", KIND_ELEMENT: "追加", KIND_ONE_CLICK: "定型文"}
+
+
+class CommandPalette(tk.Toplevel):
+    """
+    CommandPalette クラスは、検索文字列の入力欄と結果一覧を持つ小さなウィンドウです。
+    Enterキーまたはダブルクリックで選択中の結果を on_select に渡して閉じます。
+    索引の作成中は作成済みの範囲から検索し、作成が終わった時点で結果を更新します。
+
+    引数:
+      master (tk.Widget): 親ウィジェット
+      search (callable): 検索文字列と件数を受け取り SearchHit のリストを返す関数
+      on_select (callable): 選択された SearchHit を受け取る関数
+      busy (callable): 索引を作成中かどうかを返す関数（省略可）
+    """
+
+    def __init__(self, master, search, on_select, busy=None):
+        """
+        コンストラクタ
+
+        引数:
+          master (tk.Widget): 親ウィジェット
+          search (callable): 検索文字列と件数を受け取り SearchHit のリストを返す関数
+          on_select (callable): 選択された SearchHit を受け取る関数
+          busy (callable): 索引を作成中かどうかを返す関数（省略可）
+        """
+        super().__init__(master)
+        self.search = search
+        self.on_select = on_select
+        self.busy = busy
+        self.hits = []
+        self._after_id = None
+        self._poll_id = None
+
+        self.title(TITLE)
+        self.transient(master)
+        self.resizable(False, False)
+
+        self.query_var = tk.StringVar()
+        self.entry = ttk.Entry(self, textvariable=self.query_var, width=60)
+        self.entry.pack(fill="x", padx=8, pady=(8, 4))
+        self.listbox = tk.Listbox(self, height=RESULT_ROWS, width=80, activestyle="dotbox")
+        self.listbox.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+
+        self.query_var.trace_add("write", self.on_query_change)
+        self.entry.bind("<Return>", self.apply_selection)
+        self.entry.bind("<Down>", lambda _: self.move_selection(1))
+        self.entry.bind("<Up>", lambda _: self.move_selection(-1))
+        self.listbox.bind("<Double-Button-1>", self.apply_selection)
+        self.listbox.bind("<Return>", self.apply_selection)
+        self.bind("<Escape>", lambda _: self.destroy())
+
+        self.place_over(master)
+        self.entry.focus_set()
+        self.poll_busy()
+
+    def place_over(self, master):
+        """
+        親ウィンドウの上部中央にパレットを配置します。
+
+        引数:
+          master (tk.Widget): 親ウィジェット
+
+        戻り値:
+          なし
+        """
+        self.update_idletasks()
+        x = master.winfo_rootx() + (master.winfo_width() - self.winfo_reqwidth()) // 2
+        y = master.winfo_rooty() + 40
+        self.geometry(f"+{max(0, x)}+{max(0, y)}")
+
+    def poll_busy(self):
+        """
+        索引の作成中はタイトルに表示し、作成が終わったら現在の入力で検索し直します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        self._poll_id = None
+        if self.busy is not None and self.busy():
+            self.title(f"{TITLE} - 索引を作成中…")
+            self._poll_id = self.after(BUSY_POLL_MS, self.poll_busy)
+        elif self.title() != TITLE:
+            self.title(TITLE)
+            if self.query_var.get():
+                self.update_results()
+
+    def destroy(self):
+        """
+        索引の作成待ちを取り消してからパレットを閉じます。
+        """
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        super().destroy()
+
+    def on_query_change(self, *_):
+        """
+        入力が変わった時に、少し待ってから検索を実行します（連続入力をまとめる）。
+        """
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self._after_id = self.after(SEARCH_DELAY_MS, self.update_results)
+
+    def update_results(self):
+        """
+        現在の入力で検索し、結果一覧を更新します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        self._after_id = None
+        self.hits = self.search(self.query_var.get(), RESULT_LIMIT)
+        self.listbox.delete(0, tk.END)
+        for hit in self.hits:
+            kind = KIND_LABELS.get(hit.kind, hit.kind)
+            self.listbox.insert(tk.END, f"[{kind}] {hit.group} / {hit.label or '（タイトルなし）'}")
+        if self.hits:
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+    def move_selection(self, step):
+        """
+        結果一覧の選択を上下に移動します。
+
+        引数:
+          step (int): 移動量
+
+        戻り値:
+          str: 既定のキー処理を抑止するための "break"
+        """
+        if not self.hits:
+            return "break"
+        current = self.listbox.curselection()
+        index = min(max(0, (current[0] if current else -1) + step), len(self.hits) - 1)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.activate(index)
+        self.listbox.see(index)
+        return "break"
+
+    def apply_selection(self, _=None):
+        """
+        選択中の結果を適用してパレットを閉じます。
+
+        引数:
+          _ : イベント引数
+
+        戻り値:
+          str: 既定のキー処理を抑止するための "break"
+        """
+        if self._after_id is not None:
+            # 入力直後にEnterが押された場合は、最新の入力で検索してから適用する
+            self.after_cancel(self._after_id)
+            self.update_results()
+        current = self.listbox.curselection()
+        if current and current[0] < len(self.hits):
+            hit = self.hits[current[0]]
+            self.destroy()
+            self.on_select(hit)
+        return "break"
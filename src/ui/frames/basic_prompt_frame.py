@@ -6,6 +6,8 @@ basic_prompt_frame.py
 import tkinter as tk
 from tkinter import ttk
 
+from src.core.derived_variables import DerivedVariables
+
 
 class BasicPromptFrame(ttk.LabelFrame):
     """
@@ -16,13 +18,23 @@ class BasicPromptFrame(ttk.LabelFrame):
       basic_prompts (list): 基本プロンプトのデータリスト
       on_basic_select (function): コンボボックス選択時のコールバック関数
       on_text_change (function): テキスト変更時のコールバック関数
+      on_variable_change (function): 変数の値が変わった時に (変数名, 新しい値) で呼ばれる関数（省略可）
+      on_shuffle (function): シャッフルボタンが押された時に呼ばれる関数（省略時はボタンを表示しない）
       *args, **kwargs: その他
      
     戻り値:
       なし
     """
 
-    def __init__(self, master, basic_prompts, on_basic_select, on_text_change, *args, **kwargs):
+    def __init__(self,
+                 master,
+                 basic_prompts,
+                 on_basic_select,
+                 on_text_change,
+                 on_variable_change=None,
+                 on_shuffle=None,
+                 *args,
+                 **kwargs):
         """
         コンストラクタ
         
@@ -31,6 +43,9 @@ class BasicPromptFrame(ttk.LabelFrame):
           basic_prompts (list): 基本プロンプトのデータリスト
           on_basic_select (function): コンボボックス選択時のコールバック関数
           on_text_change (function): テキスト変更時のコールバック関数
+          on_variable_change (function): 変数の値が変わった時に (変数名, 新しい値) で呼ばれる関数。
+            省略時は on_text_change を呼び出します
+          on_shuffle (function): シャッフルボタンが押された時に呼ばれる関数（省略時はボタンを表示しない）
           *args, **kwargs: その他
           
         戻り値:
@@ -40,6 +55,8 @@ class BasicPromptFrame(ttk.LabelFrame):
         self.basic_prompts = basic_prompts
         self.on_select_callback = on_basic_select
         self.on_text_change_callback = on_text_change
+        self.on_variable_change_callback = on_variable_change
+        self.on_shuffle_callback = on_shuffle
         self.variable_entries = {}
         self.create_widgets()
 
@@ -74,6 +91,10 @@ class BasicPromptFrame(ttk.LabelFrame):
                                            width=48)
         self.basic_combobox.grid(row=0, column=0, padx=5, pady=5)
         self.basic_combobox.bind("<<ComboboxSelected>>", self.on_basic_select)
+        if self.on_shuffle_callback:
+            shuffle_button = ttk.Button(basic_select_frame, text="シャッフル",
+                                        command=self.on_shuffle_callback)
+            shuffle_button.grid(row=0, column=1, padx=5, pady=5)
 
     def create_template_frame(self):
         """
@@ -88,30 +109,15 @@ class BasicPromptFrame(ttk.LabelFrame):
 
     def create_variable_frame(self):
         """
-        変数設定部分のウィジェットを生成します。
+        変数設定部分のウィジェット（スクロール用のCanvas・Scrollbar・内部Frame）を生成します。
+        変数ごとのラベルと入力欄は update_variable_entries で再利用しながら配置します。
         """
         self.variable_frame = ttk.LabelFrame(self, text="変数設定")
         # 幅をさらに広げる（例: width=520）
         self.variable_frame.grid(row=2, column=0, padx=5, pady=5, sticky="nsew")
         self.variable_frame.config(width=520)  # 幅を大きめに設定
-        self._variable_canvas = None
-        self._variable_inner_frame = None
-        self._variable_scrollbar = None
 
-    def update_variable_entries(self, variables):
-        """
-        変数入力欄を更新します。
-        Args:
-            variables (dict): プロンプトに含まれる変数とその初期値の辞書
-        Returns:
-            なし
-        """
-        # 既存ウィジェットの削除
-        for widget in self.variable_frame.winfo_children():
-            widget.destroy()
-        self.variable_entries.clear()
-
-        # 常にスクロールバー＋Canvas＋Frame構成で表示
+        # 常にスクロールバー＋Canvas＋Frame構成で表示（選択のたびに作り直さない）
         canvas = tk.Canvas(self.variable_frame, height=180, borderwidth=0, highlightthickness=0)
         scrollbar = ttk.Scrollbar(self.variable_frame, orient="vertical", command=canvas.yview)
         scrollable_frame = ttk.Frame(canvas)
@@ -136,19 +142,131 @@ class BasicPromptFrame(ttk.LabelFrame):
             scrollable_frame.columnconfigure(col,
                                              weight=1 if col != 1 else 0,
                                              minsize=20 if col == 1 else 0)
-        for i, (var, default_value) in enumerate(variables.items()):
+        self._variable_canvas = canvas
+        self._variable_inner_frame = scrollable_frame
+        self._variable_scrollbar = scrollbar
+        # 再利用する (ラベル, 入力欄, StringVar) の組。これまでに表示した最大の変数数だけ保持する
+        self._variable_pool = []
+        self._slot_names = []  # 各組に現在割り当てている変数名
+        self._slot_values = []  # 各組の最後に通知した値（変化の無い書き込みを捨てるため）
+        self._suppress_trace = False
+        self._slot_of = {}  # 変数名 -> 組の番号
+        self.derived = DerivedVariables({})  # 表示中の基本プロンプトの派生変数
+
+    def _ensure_variable_pool(self, count):
+        """
+        ラベルと入力欄の組が count 個以上になるようにプールを拡張します。
+
+        引数:
+          count (int): 必要な組の数
+
+        戻り値:
+          なし
+        """
+        for i in range(len(self._variable_pool), count):
             row, col = divmod(i, 2)
             use_col = 0 if col == 0 else 2
-            label = ttk.Label(scrollable_frame, text=var)
+            label = ttk.Label(self._variable_inner_frame)
             label.grid(row=row * 2, column=use_col, padx=3, pady=(2, 0), sticky="w")
-            entry = ttk.Entry(scrollable_frame)
+            value_var = tk.StringVar(self)
+            entry = ttk.Entry(self._variable_inner_frame, textvariable=value_var)
             entry.grid(row=row * 2 + 1, column=use_col, padx=3, pady=(0, 4), sticky="ew")
-            entry.insert(0, default_value)
-            entry.bind("<KeyRelease>", self.on_text_change)
-            self.variable_entries[var] = entry
-        self._variable_canvas = canvas
-        self._variable_inner_frame = scrollable_frame
-        self._variable_scrollbar = scrollbar
+            # キー操作ではなく値の書き込みを監視する（矢印キーやIME変換中の操作では通知しない）
+            value_var.trace_add("write", lambda *_, slot=i: self.on_variable_write(slot))
+            self._variable_pool.append((label, entry, value_var))
+            self._slot_names.append(None)
+            self._slot_values.append("")
+
+    def on_variable_write(self, slot):
+        """
+        変数入力欄の値が書き込まれた時の処理を行います。
+        値が実際に変わった場合のみ、変数名と新しい値を通知します。
+
+        引数:
+          slot (int): 入力欄の組の番号
+
+        戻り値:
+          なし
+        """
+        if self._suppress_trace:
+            return
+        name = self._slot_names[slot]
+        value = self._variable_pool[slot][2].get()
+        if name is None or value == self._slot_values[slot]:
+            return
+        self._slot_values[slot] = value
+        self.notify_variable_change(name, value)
+        # この変数に依存する派生変数だけを計算し直し、表示と通知を更新する
+        for derived_name, derived_value in self.derived.update(name, value).items():
+            derived_slot = self._slot_of.get(derived_name)
+            if derived_slot is not None:
+                self._suppress_trace = True
+                try:
+                    self._variable_pool[derived_slot][2].set(derived_value)
+                finally:
+                    self._suppress_trace = False
+                self._slot_values[derived_slot] = derived_value
+            self.notify_variable_change(derived_name, derived_value)
+
+    def notify_variable_change(self, name, value):
+        """
+        変数の値が変わったことを通知します。
+
+        引数:
+          name (str): 変数名
+          value (str): 新しい値
+
+        戻り値:
+          なし
+        """
+        if self.on_variable_change_callback:
+            self.on_variable_change_callback(name, value)
+        else:
+            self.on_text_change(None)
+
+    def update_variable_entries(self, variables, derived=None):
+        """
+        変数入力欄を更新します。
+        ウィジェットは破棄せず、プール済みのラベルと入力欄の表示内容を差し替えて再利用します。
+        派生変数は他の変数から計算した値を読み取り専用で表示します。
+        Args:
+            variables (dict): プロンプトに含まれる変数とその初期値の辞書
+            derived (dict): 派生変数名と式の辞書（省略可）
+        Returns:
+            なし
+        """
+        self.variable_entries.clear()
+        self._slot_of.clear()
+        self.derived = DerivedVariables(derived or {})
+        values = {var: str(value) for var, value in variables.items()}
+        derived_values = self.derived.evaluate(values)
+        items = [(var, value, False) for var, value in values.items() if var not in derived_values]
+        items.extend((var, value, True) for var, value in derived_values.items())
+        self._ensure_variable_pool(len(items))
+        # 選択時の初期値の設定は変更通知しない（選択時は全体を再生成するため）
+        self._suppress_trace = True
+        try:
+            for i, (label, entry, value_var) in enumerate(self._variable_pool):
+                if i < len(items):
+                    var, default_value, is_derived = items[i]
+                    label.config(text=f"{var}（自動）" if is_derived else var)
+                    value_var.set(default_value)
+                    entry.state(["readonly"] if is_derived else ["!readonly"])
+                    label.grid()
+                    entry.grid()
+                    self.variable_entries[var] = entry
+                    self._slot_of[var] = i
+                    self._slot_names[i] = var
+                    self._slot_values[i] = default_value
+                else:
+                    # 使わない組は配置情報を残したまま非表示にする
+                    label.grid_remove()
+                    entry.grid_remove()
+                    self._slot_names[i] = None
+        finally:
+            self._suppress_trace = False
+        # 新しいテンプレートは先頭から表示する
+        self._variable_canvas.yview_moveto(0)
 
     def on_basic_select(self, event):
         """
@@ -165,7 +283,8 @@ class BasicPromptFrame(ttk.LabelFrame):
             prompt_obj = self.basic_prompts[selection]
             self.basic_text.delete(1.0, tk.END)
             self.basic_text.insert(tk.END, prompt_obj["prompt"])
-            self.update_variable_entries(prompt_obj["default_variables"])
+            self.update_variable_entries(prompt_obj["default_variables"],
+                                         prompt_obj.get("derived_variables"))
             if self.on_select_callback:
                 self.on_select_callback(event)
 
@@ -196,6 +315,21 @@ class BasicPromptFrame(ttk.LabelFrame):
             self.basic_combobox.current(index)
             self.on_basic_select(None)
 
+    def set_variable_values(self, values):
+        """
+        表示中の変数入力欄に値を設定します（表示されていない変数と派生変数は無視します）。
+        
+        引数:
+          values (dict): 変数名と値の辞書
+          
+        戻り値:
+          なし
+        """
+        for var, value in values.items():
+            slot = self._slot_of.get(var)
+            if slot is not None and var not in self.derived:
+                self._variable_pool[slot][2].set(value)
+
     def update_basic_prompts(self, prompts):
         """
         基本プロンプトの一覧を更新します。
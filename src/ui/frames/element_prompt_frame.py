@@ -6,6 +6,8 @@ element_prompt_frame.py
 import tkinter as tk
 from tkinter import ttk
 
+from src.core.instrumentation import instrumented
+
 
 class ElementPromptFrame(ttk.LabelFrame):
     """
@@ -48,6 +50,7 @@ class ElementPromptFrame(ttk.LabelFrame):
         self.columnconfigure(0, weight=1)
         self.rowconfigure(0, weight=1)
         self.element_prompt_content = ""
+        self.selected_prompts = []  # 選択中の追加プロンプト（テンプレート）のリスト
 
     def create_widgets(self):
         """
@@ -81,11 +84,13 @@ class ElementPromptFrame(ttk.LabelFrame):
         subject_frame.grid(row=0, column=0, padx=5, pady=5, sticky="w")
         subject_label = ttk.Label(subject_frame, text="主語:")
         subject_label.pack(side=tk.LEFT, padx=(0, 8))
-        self.subject_entry = ttk.Entry(subject_frame, width=24)
-        self.subject_entry.pack(side=tk.LEFT)
         # element_prompts.json から読み込んだ default_subject をセット
-        self.subject_entry.insert(0, self.default_subject)
-        self.subject_entry.bind("<KeyRelease>", self.on_text_change)
+        self.subject_var = tk.StringVar(self, value=self.default_subject)
+        self._last_subject = self.default_subject
+        self.subject_entry = ttk.Entry(subject_frame, width=24, textvariable=self.subject_var)
+        self.subject_entry.pack(side=tk.LEFT)
+        # キー操作ではなく値の書き込みを監視し、値が変わった時だけ通知する
+        self.subject_var.trace_add("write", self.on_subject_write)
 
         # select_frame の右側に「選択解除」ボタンを配置
         deselect_btn = ttk.Button(select_frame, text="選択解除", command=self.clear_selection)
@@ -96,10 +101,7 @@ class ElementPromptFrame(ttk.LabelFrame):
         self.tree.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
         self.tree.column("#0", width=350)
         self.tree.bind("<<TreeviewSelect>>", self.on_element_select)
-        for category in self.categories:
-            parent = self.tree.insert("", tk.END, text=category.get("category", ""))
-            for prompt in category.get("prompt_lists", []):
-                self.tree.insert(parent, tk.END, text=prompt.get("title", ""))
+        self.populate_tree()
         # ツリー部分を拡大するため、select_frame の row 1 に weight を設定
         select_frame.rowconfigure(1, weight=1)
 
@@ -115,6 +117,7 @@ class ElementPromptFrame(ttk.LabelFrame):
         """
         self.tree.selection_remove(self.tree.selection())
         self.element_prompt_content = ""
+        self.selected_prompts = []
         if self.on_text_change_callback:
             self.on_text_change_callback(None)
 
@@ -155,11 +158,60 @@ class ElementPromptFrame(ttk.LabelFrame):
 
         # template_manager がインスタンス変数として存在しないので、クラスを呼び出し側から利用してもらう
         self.element_prompt_content = element_prompt_raw
+        self.selected_prompts = selected_texts
         self.subject_value = subject_val
 
         if self.on_select_callback:
             self.on_select_callback(event)
 
+    def select_prompt(self, category_index, prompt_index):
+        """
+        指定された追加プロンプトをツリービューで選択し、表示位置までスクロールします。
+        
+        引数:
+          category_index (int): カテゴリの位置
+          prompt_index (int): カテゴリ内のプロンプトの位置
+          
+        戻り値:
+          bool: 選択できた場合はTrue
+        """
+        parents = self.tree.get_children("")
+        if not 0 <= category_index < len(parents):
+            return False
+        items = self.tree.get_children(parents[category_index])
+        if not 0 <= prompt_index < len(items):
+            return False
+        self.tree.item(parents[category_index], open=True)
+        # 選択変更により <<TreeviewSelect>> が発生し、最終プロンプトに反映される
+        self.tree.selection_set(items[prompt_index])
+        self.tree.see(items[prompt_index])
+        return True
+
+    def select_prompts(self, keys):
+        """
+        指定された複数の追加プロンプトをツリービューでまとめて選択します（これまでの選択は解除します）。
+        
+        引数:
+          keys (list): (カテゴリの位置, カテゴリ内のプロンプトの位置) のタプルのリスト
+          
+        戻り値:
+          int: 選択できた追加プロンプトの数
+        """
+        parents = self.tree.get_children("")
+        items = []
+        for category_index, prompt_index in keys:
+            if not 0 <= category_index < len(parents):
+                continue
+            children = self.tree.get_children(parents[category_index])
+            if 0 <= prompt_index < len(children):
+                self.tree.item(parents[category_index], open=True)
+                items.append(children[prompt_index])
+        # 選択変更により <<TreeviewSelect>> が発生し、最終プロンプトに反映される
+        self.tree.selection_set(items)
+        if items:
+            self.tree.see(items[0])
+        return len(items)
+
     def on_text_change(self, event):
         """
         テキスト変更時の処理を実行します。
@@ -173,6 +225,23 @@ class ElementPromptFrame(ttk.LabelFrame):
         if self.on_text_change_callback:
             self.on_text_change_callback(event)
 
+    def on_subject_write(self, *_):
+        """
+        主語の入力欄の値が書き込まれた時の処理を行います。
+        値が実際に変わった場合のみ、テキスト変更として通知します。
+
+        引数:
+          *_ : StringVar のトレース引数（未使用）
+
+        戻り値:
+          なし
+        """
+        value = self.subject_var.get()
+        if value == self._last_subject:
+            return
+        self._last_subject = value
+        self.on_text_change(None)
+
     def update_element_prompts(self, element_prompts):
         """
         追加プロンプトの一覧を更新します。
@@ -187,20 +256,30 @@ class ElementPromptFrame(ttk.LabelFrame):
         self.default_subject = element_prompts.get("default_subject", "被写体")
         self.categories = element_prompts.get("categories", [])
 
-        # ツリービューをクリア
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.populate_tree()
+
+        # 主語を更新
+        self.subject_var.set(self.default_subject)
 
-        # ツリービューを再構築
+    @instrumented("element_tree.rebuild")
+    def populate_tree(self):
+        """
+        ツリービューの項目を削除し、現在のカテゴリから作り直します。
+        
+        引数:
+          なし
+          
+        戻り値:
+          なし
+        """
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
         for category in self.categories:
             parent = self.tree.insert("", tk.END, text=category.get("category", ""))
             for prompt in category.get("prompt_lists", []):
                 self.tree.insert(parent, tk.END, text=prompt.get("title", ""))
 
-        # 主語を更新
-        self.subject_entry.delete(0, tk.END)
-        self.subject_entry.insert(0, self.default_subject)
-
     def get_prompt_content(self):
         """
         現在選択されている追加プロンプトの内容と主語を取得します。
@@ -212,3 +291,15 @@ class ElementPromptFrame(ttk.LabelFrame):
           tuple: (追加プロンプト内容, 主語)
         """
         return self.element_prompt_content, self.subject_entry.get().strip()
+
+    def get_selection(self):
+        """
+        現在選択されている追加プロンプトのリストと主語を取得します。
+        
+        引数:
+          なし
+          
+        戻り値:
+          tuple: (追加プロンプトのリスト, 主語)
+        """
+        return list(self.selected_prompts), self.subject_var.get().strip()
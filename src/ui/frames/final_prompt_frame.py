@@ -5,12 +5,17 @@ final_prompt_frame.py
 
 import json
 import os
+import random
 import tkinter as tk
 from tkinter import messagebox, ttk
 
-import requests  # DeePL APIへのアクセスに利用
-
+from src.core.instrumentation import instrumentation, instrumented
+from src.core.prompt_composer import PromptComposer
+from src.core.prompt_pipeline import PostProcessPipeline
 from src.core.template_manager import TemplateManager
+from src.core.translator import DeepLTranslator, TranslationError
+
+RENDER_CACHE_FILE = os.path.join("cache", "render_cache.db")
 
 
 class FinalPromptFrame(ttk.LabelFrame):
@@ -43,6 +48,12 @@ class FinalPromptFrame(ttk.LabelFrame):
         self.update_timer = None
         self.basic_frame = None
         self.element_frame = None
+        # 後処理（重複文の削除など）は入力した文章を書き換えるため、設定で有効にした場合のみ行う
+        self.composer = PromptComposer()
+        self.post_process_pipeline = None  # 初めて後処理を有効にする時に作成する
+        # ワイルドカードは同じシードで選ぶため、入力中に候補が入れ替わることはない（シャッフルで変更する）
+        self.wildcard_seed = random.randrange(2**32)
+        self.translation_cache = None  # 初めて翻訳する時に開く
         self.create_widgets()
 
     def create_widgets(self):
@@ -200,21 +211,69 @@ class FinalPromptFrame(ttk.LabelFrame):
             messagebox.showwarning("警告", "翻訳するプロンプトがありません。")
             return
 
-        url = "https://api-free.deepl.com/v2/translate"
-        params = {"auth_key": api_key, "text": jp_text, "target_lang": "EN"}
-        try:
-            response = requests.post(url, data=params)
-            response.raise_for_status()  # HTTPエラーがあれば例外を送出
-            result = response.json()
-            translations = result.get("translations", [])
-            if translations:
-                en_text = translations[0].get("text", "")
-                self.english_text.delete(1.0, tk.END)  # 既存のテキストをクリア
-                self.english_text.insert(tk.END, en_text)
-            else:
+        translator = DeepLTranslator(api_key)
+        # 同じプロンプトを翻訳したことがあれば、APIを呼ばずに前回の翻訳結果を使う
+        cache = self.get_translation_cache()
+        en_text = cache.get_translation(jp_text, translator.target_lang) if cache else None
+        instrumentation.count("translation.cache_miss" if en_text is None else
+                              "translation.cache_hit")
+        if en_text is None:
+            try:
+                en_text = translator.translate(jp_text)
+            except TranslationError as e:
+                messagebox.showerror("エラー", f"翻訳リクエストに失敗しました: {e}")
+                return
+            if not en_text:
                 messagebox.showerror("エラー", "翻訳結果が取得できませんでした。")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("エラー", f"翻訳リクエストに失敗しました: {e}")
+                return
+            if cache:
+                cache.put_translation(jp_text, translator.target_lang, en_text)
+                cache.flush()
+        self.english_text.delete(1.0, tk.END)  # 既存のテキストをクリア
+        self.english_text.insert(tk.END, en_text)
+
+    def get_translation_cache(self):
+        """
+        翻訳結果のキャッシュ（settings/cache/render_cache.db）を返します。
+        開けない場合はキャッシュを使わずに翻訳します。
+        
+        引数:
+          なし
+          
+        戻り値:
+          RenderCache または None
+        """
+        if self.translation_cache is None:
+            # sqlite3 などの読み込みは、翻訳を使うまで遅らせる
+            import sqlite3
+
+            from src.core.render_cache import RenderCache
+            path = os.path.join(os.getcwd(), "settings", RENDER_CACHE_FILE)
+            try:
+                self.translation_cache = RenderCache(path)
+            except (OSError, sqlite3.Error) as e:
+                print(f"翻訳キャッシュを開けませんでした: {e}")
+                return None
+            instrumentation.gauge("翻訳キャッシュ", self.describe_translation_cache)
+        return self.translation_cache
+
+    def describe_translation_cache(self):
+        """
+        翻訳キャッシュのヒット率と容量を、パフォーマンス表示用の文字列で返します。
+        
+        引数:
+          なし
+          
+        戻り値:
+          str: 表示する文字列（キャッシュを開いていない場合はNone）
+        """
+        if self.translation_cache is None:
+            return None
+        from src.core.render_cache import TRANSLATION_KIND
+        stats = self.translation_cache.stats()
+        usage = stats.get(TRANSLATION_KIND, {"hits": 0, "misses": 0, "hit_rate": 0.0})
+        return (f"ヒット率 {usage['hit_rate']:.0%}（{usage['hits']}/{usage['hits'] + usage['misses']}）"
+                f"、{stats['entries']} 件 {stats['bytes'] / 1024:.0f} KB")
 
     def set_input_sources(self, basic_frame, element_frame, template_manager):
         """
@@ -231,6 +290,37 @@ class FinalPromptFrame(ttk.LabelFrame):
         self.basic_frame = basic_frame
         self.element_frame = element_frame
         self.template_manager = template_manager
+        self.composer.wildcards = template_manager.wildcards
+        self.composer.compiler = template_manager.partials.compile
+
+    def set_post_processing(self, enabled):
+        """
+        完成プロンプトの後処理（重複文の削除・主語の省略・句読点の正規化）の有無を切り替え、
+        最終プロンプトを再生成します。
+
+        引数:
+          enabled (bool): 後処理を行うかどうか
+
+        戻り値:
+          なし
+        """
+        if enabled and self.post_process_pipeline is None:
+            self.post_process_pipeline = PostProcessPipeline.default()
+        self.composer.set_pipeline(self.post_process_pipeline if enabled else None)
+        self.generate_final_prompt()
+
+    def reroll_wildcards(self, seed=None):
+        """
+        ワイルドカードを選び直すためにシードを変更し、最終プロンプトを再生成します。
+        
+        引数:
+          seed (int): 新しいシード（省略時はランダム）
+          
+        戻り値:
+          なし
+        """
+        self.wildcard_seed = random.randrange(2**32) if seed is None else seed
+        self.schedule_update()
 
     def schedule_update(self):
         """
@@ -246,6 +336,24 @@ class FinalPromptFrame(ttk.LabelFrame):
             self.master.after_cancel(self.update_timer)
         self.update_timer = self.master.after(1000, self.generate_final_prompt)
 
+    def update_variable(self, name, value):
+        """
+        基本プロンプトの変数が1つ変わった時に呼ばれ、その変数の箇所だけを展開し直します。
+        展開結果が変わらない場合は最終プロンプトの再生成を予約しません。
+
+        引数:
+          name (str): 変数名
+          value (str): 新しい値
+
+        戻り値:
+          bool: 再生成を予約した場合はTrue
+        """
+        if not self.composer.set_variable(name, value):
+            return False
+        self.schedule_update()
+        return True
+
+    @instrumented("final_prompt.generate")
     def generate_final_prompt(self):
         """
         基本プロンプトと追加プロンプトを結合し、最終プロンプトを生成します。
@@ -259,16 +367,11 @@ class FinalPromptFrame(ttk.LabelFrame):
         if not self.basic_frame or not self.element_frame or not self.template_manager:
             return
 
-        # BasicPromptFrameから現在の基本プロンプトテキストと変数値を取得
+        # 各フレームから入力を集め、組み立て自体はウィジェットに依存しない PromptComposer に任せる
         basic_text, variables = self.basic_frame.get_current_prompt()
-        final_prompt = self.template_manager.replace_variables(basic_text, variables)
-
-        # ElementPromptFrameから現在の追加プロンプト内容と主語を取得
-        element_prompt_raw, subject_val = self.element_frame.get_prompt_content()
-        if element_prompt_raw:
-            element_text = self.template_manager.replace_variables(element_prompt_raw,
-                                                                   {"character": subject_val})
-            final_prompt += "\n" + element_text
+        element_prompts, subject_val = self.element_frame.get_selection()
+        final_prompt = self.composer.compose(basic_text, variables, element_prompts, subject_val,
+                                             self.wildcard_seed)
 
         self.final_text.delete(1.0, tk.END)
         self.final_text.insert(tk.END, final_prompt)
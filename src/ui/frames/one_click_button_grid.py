@@ -0,0 +1,235 @@
+"""
+one_click_button_grid.py
+定型文ボタンを仮想化して表示するグリッドウィジェットです。
+表示されている行の分だけボタンを生成し、スクロール時はボタンを再利用して
+タイトルとクリック先のインデックスを差し替えます。
+"""
+from tkinter import ttk
+
+VISIBLE_ROWS = 10  # 一度に表示する行数（既定の20件・2列がちょうど収まる）
+BUTTON_WIDTH = 20
+
+
+class VirtualButtonGrid(ttk.Frame):
+    """
+    VirtualButtonGrid クラスは、大量のエントリーを少数のボタンで表示する仮想化グリッドです。
+
+    引数:
+      master (tk.Widget): 親ウィジェット
+      category (str): 表示するカテゴリ名
+      count (int): エントリー総数
+      get_title (callable): (カテゴリ名, インデックス) からボタンタイトルを返す関数
+      on_click (callable): (カテゴリ名, インデックス) を受け取るクリック時のコールバック
+      columns (int): 列数
+      visible_rows (int): 表示する行数
+      *args, **kwargs: その他
+    """
+
+    def __init__(self,
+                 master,
+                 category,
+                 count,
+                 get_title,
+                 on_click,
+                 columns=2,
+                 visible_rows=VISIBLE_ROWS,
+                 *args,
+                 **kwargs):
+        """
+        コンストラクタ
+
+        引数:
+          master (tk.Widget): 親ウィジェット
+          category (str): 表示するカテゴリ名
+          count (int): エントリー総数
+          get_title (callable): (カテゴリ名, インデックス) からボタンタイトルを返す関数
+          on_click (callable): (カテゴリ名, インデックス) を受け取るクリック時のコールバック
+          columns (int): 列数
+          visible_rows (int): 表示する行数
+          *args, **kwargs: その他
+        """
+        super().__init__(master, *args, **kwargs)
+        self.category = category
+        self.count = count
+        self.get_title = get_title
+        self.on_click = on_click
+        self.columns = max(1, columns)
+        self.visible_rows = max(1, visible_rows)
+        self.first_row = 0
+        self._buttons = []  # 再利用するボタンのプール（スロット順）
+
+        self.body = ttk.Frame(self)
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        for col in range(self.columns):
+            self.body.columnconfigure(col, weight=1)
+        self._bind_wheel(self.body)
+        self._ensure_pool()
+        self.refresh()
+
+    @property
+    def total_rows(self):
+        """
+        エントリー総数を表示するのに必要な行数を返します。
+
+        戻り値:
+          int: 行数
+        """
+        return (self.count + self.columns - 1) // self.columns
+
+    def _ensure_pool(self):
+        """
+        表示行数分のボタンが揃うようにプールを拡張します。
+        """
+        needed = min(self.visible_rows, self.total_rows) * self.columns
+        for slot in range(len(self._buttons), needed):
+            row, col = divmod(slot, self.columns)
+            btn = ttk.Button(self.body,
+                             width=BUTTON_WIDTH,
+                             command=lambda s=slot: self._on_slot_click(s))
+            btn.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
+            self._bind_wheel(btn)
+            self.body.rowconfigure(row, weight=1)
+            self._buttons.append(btn)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        widget.bind("<Button-4>", lambda _: self.scroll_to_row(self.first_row - 1))
+        widget.bind("<Button-5>", lambda _: self.scroll_to_row(self.first_row + 1))
+
+    def index_of_slot(self, slot):
+        """
+        ボタンスロットが現在表示しているエントリーのインデックスを返します。
+
+        引数:
+          slot (int): スロット番号
+
+        戻り値:
+          int: エントリーのインデックス
+        """
+        return self.first_row * self.columns + slot
+
+    def _on_slot_click(self, slot):
+        index = self.index_of_slot(slot)
+        if index < self.count:
+            self.on_click(self.category, index)
+
+    def _on_mousewheel(self, event):
+        step = -1 if event.delta > 0 else 1
+        self.scroll_to_row(self.first_row + step)
+
+    def _on_scrollbar(self, action, *args):
+        """
+        スクロールバー操作（moveto / scroll）に応じて先頭行を変更します。
+        """
+        if action == "moveto":
+            self.scroll_to_row(round(float(args[0]) * self.total_rows))
+        elif action == "scroll":
+            amount = int(args[0])
+            if args[1] == "pages":
+                amount *= self.visible_rows
+            self.scroll_to_row(self.first_row + amount)
+
+    def scroll_to_row(self, row):
+        """
+        指定された行が先頭に来るようにスクロールします。
+
+        引数:
+          row (int): 先頭に表示する行
+
+        戻り値:
+          なし
+        """
+        max_first = max(0, self.total_rows - self.visible_rows)
+        row = min(max(0, row), max_first)
+        if row != self.first_row:
+            self.first_row = row
+            self.refresh()
+
+    def see(self, index):
+        """
+        指定されたエントリーが表示範囲に入るようにスクロールします。
+
+        引数:
+          index (int): エントリーのインデックス
+
+        戻り値:
+          なし
+        """
+        row = index // self.columns
+        if row < self.first_row:
+            self.scroll_to_row(row)
+        elif row >= self.first_row + self.visible_rows:
+            self.scroll_to_row(row - self.visible_rows + 1)
+
+    def set_count(self, count):
+        """
+        エントリー総数を変更し、表示を更新します。
+
+        引数:
+          count (int): 新しいエントリー総数
+
+        戻り値:
+          なし
+        """
+        self.count = count
+        self._ensure_pool()
+        max_first = max(0, self.total_rows - self.visible_rows)
+        self.first_row = min(self.first_row, max_first)
+        self.refresh()
+
+    def refresh(self):
+        """
+        表示中の全ボタンのタイトルとスクロールバーを更新します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        for slot, btn in enumerate(self._buttons):
+            index = self.index_of_slot(slot)
+            if index < self.count:
+                btn.config(text=self.get_title(self.category, index))
+                btn.grid()
+            else:
+                btn.grid_remove()
+        total = self.total_rows
+        if total > self.visible_rows:
+            self.scrollbar.set(self.first_row / total, (self.first_row + self.visible_rows) / total)
+            self.scrollbar.grid()
+        else:
+            self.scrollbar.grid_remove()
+
+    def refresh_index(self, index):
+        """
+        指定されたエントリーが表示中であれば、そのボタンのタイトルを更新します。
+
+        引数:
+          index (int): エントリーのインデックス
+
+        戻り値:
+          なし
+        """
+        slot = index - self.first_row * self.columns
+        if 0 <= slot < len(self._buttons) and index < self.count:
+            self._buttons[slot].config(text=self.get_title(self.category, index))
+
+    def button_for(self, index):
+        """
+        指定されたエントリーを表示しているボタンを返します。
+
+        引数:
+          index (int): エントリーのインデックス
+
+        戻り値:
+          ttk.Button または None: 表示中でない場合はNone
+        """
+        slot = index - self.first_row * self.columns
+        if 0 <= slot < len(self._buttons) and index < self.count:
+            return self._buttons[slot]
+        return None
@@ -27,7 +27,7 @@ class OneClickFrame(ttk.Frame):
 
     属性:
       manager: 定型文エントリーを管理するクラスインスタンス
-      button_widgets: カテゴリごとのボタンウィジェット群
+      button_widgets: カテゴリごとのボタングリッド（VirtualButtonGrid）
       disable_copy: コピー機能の有効/無効を管理するフラグ
       title_edit: タイトル編集用のテキストウィジェット（エディタ領域）
       edit_text: 定型文編集用のテキストウィジェット（エディタ領域）
@@ -39,13 +39,14 @@ class OneClickFrame(ttk.Frame):
       なし
     """
 
-    def __init__(self, master, *args, **kwargs):
+    def __init__(self, master, manager=None, *args, **kwargs):
         """
         コンストラクタ。
         ウィジェットの初期化と作成を行います。
         
         引数:
           master (tk.Widget): 親ウィジェット
+          manager (OneClickManager): 定型文の管理クラス。省略時は新たに生成する
           *args: その他の引数（なし）
           **kwargs: キーワード引数（なし）
         
@@ -53,7 +54,8 @@ class OneClickFrame(ttk.Frame):
           なし
         """
         super().__init__(master, *args, **kwargs)
-        self.manager = OneClickManager()  # ロジック部分の管理クラス
+        # ロジック部分の管理クラス
+        self.manager = manager if manager is not None else OneClickManager()
         # 各カテゴリごとのボタンウィジェットを格納する辞書
         self.button_widgets = {}
         self.disable_copy = tk.BooleanVar(value=False)  # コピー無効フラグを追加
@@ -151,18 +153,66 @@ class OneClickFrame(ttk.Frame):
         self._tab_helper.create_tab_notebook()  # タブ作成
         self._editor_helper.create_editor_area()  # 編集領域作成
 
-    def create_button_command(self, category, index):
+    def on_grid_button_click(self, category, index):
         """
-        指定されたカテゴリとインデックスのボタン用コールバック関数を生成します。
+        ボタングリッドのボタンがクリックされた時の処理を行います。
         
         引数:
           category (str): カテゴリ名
           index (int): エントリーのインデックス
         
         戻り値:
-          function: 生成されたコールバック関数
+          なし
+        """
+        self._editor_helper.on_button_click(category, index)
+
+    def get_button_title(self, category, index):
+        """
+        ボタングリッドに表示するタイトルを返します。
+        
+        引数:
+          category (str): カテゴリ名
+          index (int): エントリーのインデックス
+        
+        戻り値:
+          str: ボタンタイトル
+        """
+        entries = self.manager.one_click_entries.get(category, [])
+        return entries[index]["title"] if index < len(entries) else ""
+
+    def refresh_button(self, category, index):
+        """
+        指定されたエントリーのボタン表示を更新します（表示範囲外の場合は何もしません）。
+        
+        引数:
+          category (str): カテゴリ名
+          index (int): エントリーのインデックス
+        
+        戻り値:
+          なし
         """
-        return lambda: self._editor_helper.on_button_click(category, index)
+        grid = self.button_widgets.get(category)
+        if grid is not None:
+            grid.refresh_index(index)
+
+    def show_entry(self, category, index):
+        """
+        指定されたエントリーのタブを選択してボタンを表示し、クリック時と同じ処理（コピー）を行います。
+        
+        引数:
+          category (str): カテゴリ名
+          index (int): エントリーのインデックス
+        
+        戻り値:
+          bool: 表示できた場合はTrue
+        """
+        if not self._tab_helper.select_category(category):
+            return False
+        grid = self.button_widgets.get(category)
+        if grid is not None:
+            grid.see(index)
+        self.on_grid_button_click(category, index)
+        return True
 
     def move_selected_button(self, direction):
         """
@@ -187,15 +237,18 @@ class OneClickFrame(ttk.Frame):
 
         # エントリーを入れ替える
         if self.manager.swap_entries(category, current_index, target_index):
-            # ボタンの表示内容を更新
-            entries = self.manager.one_click_entries[category]
-            self.button_widgets[category][current_index].config(
-                text=entries[current_index]["title"])
-            self.button_widgets[category][target_index].config(text=entries[target_index]["title"])
+            # 移動先が見えるようにスクロールし、ボタンの表示内容を更新
+            grid = self.button_widgets.get(category)
+            if grid is not None:
+                grid.see(target_index)
+            self.refresh_button(category, current_index)
+            self.refresh_button(category, target_index)
 
     def refresh_entries(self):
         """
-        ワンクリックエントリーを再読み込みし、各カテゴリのボタン表示を更新します。
+        ワンクリックエントリーを再読み込みし、変更のあった部分だけ表示を更新します。
+        タブの追加・削除・名前変更・並べ替えと、タイトルが変わったボタンのみを更新し、
+        選択中のタブとエディタの内容は維持します。
         
         引数:
           なし
@@ -203,30 +256,27 @@ class OneClickFrame(ttk.Frame):
         戻り値:
           なし
         """
-        # コピー無効フラグの値を保持
-        disable_copy_value = self.disable_copy.get()
-
-        # すべてのウィジェットを破棄
-        for widget in self.winfo_children():
-            widget.destroy()
-
-        # ボタンウィジェット辞書をクリア
-        self.button_widgets.clear()
-
-        # エントリーを再読み込み
-        self.manager = OneClickManager()
-
-        # コピー無効フラグを再初期化（以前の値を保持）
-        self.disable_copy = tk.BooleanVar(value=disable_copy_value)
-
-        # UIを再構築
-        self.create_widgets()
-
-        # キーバインドを再設定
-        self.bind_all("<Up>", self.handle_up_key)
-        self.bind_all("<Down>", self.handle_down_key)
-        self.bind_all("<Left>", self.handle_left_key)
-        self.bind_all("<Right>", self.handle_right_key)
+        old_titles = {
+            category: [entry["title"] for entry in entries]
+            for category, entries in self.manager.one_click_entries.items()
+        }
+
+        # 保留中の変更を書き込んでからエントリーを再読み込み
+        self.manager.reload()
+
+        renamed = self._tab_helper.sync_tabs()
+        old_names = {new_name: old_name for old_name, new_name in renamed.items()}
+
+        # 生成済みのボタングリッドについて、変化したボタンのみ更新
+        for category, grid in self.button_widgets.items():
+            before = old_titles.get(old_names.get(category, category))
+            entries = self.manager.one_click_entries.get(category, [])
+            if before is None or len(before) != len(entries):
+                grid.set_count(len(entries))
+                continue
+            for index, (old_title, entry) in enumerate(zip(before, entries)):
+                if old_title != entry["title"]:
+                    grid.refresh_index(index)
 
     def load_entries(self):
         """
@@ -310,5 +360,4 @@ class OneClickFrame(ttk.Frame):
                 self.edit_text.delete("1.0", tk.END)
 
                 # ボタンの表示を更新
-                if category in self.button_widgets and index < len(self.button_widgets[category]):
-                    self.button_widgets[category][index].config(text=new_title)
+                self.refresh_button(category, index)
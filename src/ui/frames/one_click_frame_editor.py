@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 
+from src.core.one_click_store import SnapshotChangedError
+
 
 class OneClickFrameEditor:
 
@@ -51,7 +53,13 @@ class OneClickFrameEditor:
 
     def on_button_click(self, category, index):
         owner = self.owner
-        entry = owner.manager.get_entry(category, index)
+        try:
+            entry = owner.manager.get_entry(category, index)
+        except SnapshotChangedError:
+            # 外部で編集されたファイルを読み直し、変更後の内容を表示・コピーする
+            messagebox.showinfo("情報", "定型文ファイルが外部で変更されていたため、再読み込みしました。")
+            owner.refresh_entries()
+            entry = owner.manager.get_entry(category, index)
         text_to_copy = entry["text"]
         title_to_copy = entry["title"]
 
@@ -75,8 +83,7 @@ class OneClickFrameEditor:
 
             owner.manager.update_entry(category, index, new_title, new_text)
 
-            if category in owner.button_widgets and index < len(owner.button_widgets[category]):
-                owner.button_widgets[category][index].config(text=new_title)
+            owner.refresh_button(category, index)
 
     def clear_current_entry(self):
         owner = self.owner
@@ -94,5 +101,4 @@ class OneClickFrameEditor:
                 owner.title_edit.insert(tk.END, new_title)
                 owner.edit_text.delete("1.0", tk.END)
 
-                if category in owner.button_widgets and index < len(owner.button_widgets[category]):
-                    owner.button_widgets[category][index].config(text=new_title)
+                owner.refresh_button(category, index)
@@ -1,6 +1,11 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 
+from src.ui.frames.one_click_button_grid import VirtualButtonGrid
+
+TAB_WIDTH = 14  # タブ幅（カテゴリ数が多い場合は文字幅に合わせる）
+FIXED_WIDTH_TAB_LIMIT = 8  # タブ幅を固定するカテゴリ数の上限
+
 
 class OneClickFrameTab:
 
@@ -11,12 +16,15 @@ class OneClickFrameTab:
         self.owner = owner
         self.last_click_x = 0
         self.last_click_y = 0
+        # ボタングリッドが未生成のタブ（初めて選択された時に生成する）
+        self._pending_tabs = set()
 
     def create_tab_notebook(self):
         owner = self.owner
         # タブの幅を固定するためのスタイル設定
         style = ttk.Style()
-        style.configure("TNotebook.Tab", padding=[2, 1], width=14)
+        many_tabs = len(owner.manager.category_order) > FIXED_WIDTH_TAB_LIMIT
+        style.configure("TNotebook.Tab", padding=[2, 1], width=0 if many_tabs else TAB_WIDTH)
 
         owner.tab_notebook = ttk.Notebook(owner)
         owner.tab_notebook.pack(padx=10, pady=10, fill="both", expand=True)
@@ -31,14 +39,18 @@ class OneClickFrameTab:
         owner.tab_context_menu.add_separator()
         owner.tab_context_menu.add_command(label="タブを左に移動", command=self.move_tab_left)
         owner.tab_context_menu.add_command(label="タブを右に移動", command=self.move_tab_right)
+        owner.tab_context_menu.add_separator()
+        owner.tab_context_menu.add_command(label="ボタンを1行追加", command=self.add_button_row)
 
         # 複数のイベントを削除し、1つだけにシンプル化
         owner.tab_notebook.bind("<ButtonPress-3>", self.show_tab_context_menu)
+        owner.tab_notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
-        # 管理クラスからカテゴリ一覧を取得しタブを作成
+        # 管理クラスからカテゴリ一覧を取得しタブを作成（中身は選択時に生成）
         categories = owner.manager.category_order
         for category in categories:
             self.create_tab_for_category(category)
+        self.build_selected_tab()
 
     def create_tab_for_category(self, category):
         """新しいタブを作成"""
@@ -47,27 +59,44 @@ class OneClickFrameTab:
         frame.bind("<Button-3>", self.on_tab_right_click)
 
         owner.tab_notebook.add(frame, text=category)
-        owner.button_widgets[category] = []
-
-        # 2列グリッド用の設定
-        frame.columnconfigure(0, weight=1)
-        frame.columnconfigure(1, weight=1)
-
-        # エントリーを取得してボタンを配置
-        entries = owner.manager.one_click_entries.get(category, [])
-        for idx, entry in enumerate(entries):
-            row = idx // 2
-            col = idx % 2
-            btn = ttk.Button(frame,
-                             text=entry["title"],
-                             width=20,
-                             command=owner.create_button_command(category, idx))
-            btn.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
-            owner.button_widgets[category].append(btn)
-            frame.rowconfigure(row, weight=1)
-
+        self._pending_tabs.add(str(frame))
         return frame
 
+    def on_tab_changed(self, _):
+        """タブ切り替え時に、未生成のボタングリッドを生成"""
+        self.build_selected_tab()
+
+    def build_selected_tab(self):
+        """選択中のタブのボタングリッドが未生成であれば生成"""
+        owner = self.owner
+        tab_id = owner.tab_notebook.select()
+        if not tab_id or tab_id not in self._pending_tabs:
+            return
+        self._pending_tabs.discard(tab_id)
+        frame = owner.tab_notebook.nametowidget(tab_id)
+        # タブ名が変更されている可能性があるため、生成時点のタブ名を使う
+        category = owner.tab_notebook.tab(tab_id, "text")
+
+        # 表示行分のボタンだけを生成し、スクロール時に再利用する仮想化グリッド
+        grid = VirtualButtonGrid(frame,
+                                 category,
+                                 owner.manager.entry_count(category),
+                                 owner.get_button_title,
+                                 owner.on_grid_button_click,
+                                 columns=owner.manager.columns)
+        grid.pack(fill="both", expand=True)
+        owner.button_widgets[category] = grid
+
+    def select_category(self, category):
+        """指定されたカテゴリのタブを選択し、ボタングリッドを生成"""
+        owner = self.owner
+        for tab_id in owner.tab_notebook.tabs():
+            if owner.tab_notebook.tab(tab_id, "text") == category:
+                owner.tab_notebook.select(tab_id)
+                self.build_selected_tab()
+                return True
+        return False
+
     def on_tab_right_click(self, event):
         """右クリック位置を記録"""
         self.last_click_x = event.x
@@ -118,6 +147,7 @@ class OneClickFrameTab:
             # button_widgets のキーを更新
             if old_name in owner.button_widgets:
                 owner.button_widgets[new_name] = owner.button_widgets.pop(old_name)
+                owner.button_widgets[new_name].category = new_name
             print(f"タブ名を '{old_name}' から '{new_name}' に変更しました")
 
     def add_new_tab(self):
@@ -156,8 +186,11 @@ class OneClickFrameTab:
                 result = owner.manager.remove_category(category)
                 print(f"カテゴリ削除結果: {result}")
 
-                # タブを削除
+                # タブを削除し、ボタングリッドが未生成のまま残らないようにフレームも破棄
+                tab_id = owner.tab_notebook.tabs()[current_tab_index]
                 owner.tab_notebook.forget(current_tab_index)
+                self._pending_tabs.discard(tab_id)
+                owner.tab_notebook.nametowidget(tab_id).destroy()
 
                 # button_widgets から削除
                 if category in owner.button_widgets:
@@ -180,10 +213,7 @@ class OneClickFrameTab:
             messagebox.showinfo("情報", "これ以上左には移動できません。")
             return
         # swap managerの順序リスト内のカテゴリ
-        order = owner.manager.category_order
-        order[current_index - 1], order[current_index] = order[current_index], order[current_index -
-                                                                                     1]
-        owner.manager.save_one_click_entries()
+        owner.manager.swap_categories(current_index - 1, current_index)
         self.update_tabs_order()
         print(f"タブを左に移動: インデックス {current_index} -> {current_index - 1}")
 
@@ -194,32 +224,86 @@ class OneClickFrameTab:
         if current_index >= len(owner.manager.category_order) - 1:
             messagebox.showinfo("情報", "これ以上右には移動できません。")
             return
-        order = owner.manager.category_order
-        order[current_index], order[current_index + 1] = order[current_index +
-                                                               1], order[current_index]
-        owner.manager.save_one_click_entries()
+        owner.manager.swap_categories(current_index, current_index + 1)
         self.update_tabs_order()
         print(f"タブを右に移動: インデックス {current_index} -> {current_index + 1}")
 
+    def add_button_row(self):
+        """選択中のタブの末尾にボタンを1行分追加"""
+        owner = self.owner
+        try:
+            category = owner.tab_notebook.tab("current", "text")
+        except tk.TclError:
+            return
+        if owner.manager.add_entries(category):
+            grid = owner.button_widgets.get(category)
+            if grid is not None:
+                grid.set_count(owner.manager.entry_count(category))
+                grid.see(grid.count - 1)
+
     def update_tabs_order(self):
         """
-        manager.category_order の順序に従い、タブのUIを再構築します。
-        既存のタブを全て削除し、再生成します。
+        manager.category_order の順序に従い、タブの並びを更新します。
+        既存のタブはそのまま移動するため、選択状態とボタンは維持されます。
+        """
+        self.sync_tabs()
+
+    def sync_tabs(self):
+        """
+        manager.category_order とタブの差分を取り、追加・削除・名前変更・並べ替えのみを行います。
+        同じ位置で消えたカテゴリと増えたカテゴリの組は名前変更として扱います。
+
+        戻り値:
+          dict: 名前変更されたカテゴリの {旧名: 新名}
         """
         owner = self.owner
-        # 現在の選択タブのカテゴリ名（再選択用）
-        try:
-            current_category = owner.tab_notebook.tab("current", "text")
-        except Exception:
-            current_category = None
-        # 全タブ削除
-        for tab_id in owner.tab_notebook.tabs():
-            owner.tab_notebook.forget(tab_id)
-        owner.button_widgets = {}
-        # manager.category_orderの順にタブ作成
-        for cat in owner.manager.category_order:
-            self.create_tab_for_category(cat)
-        # 可能なら再選択
-        if current_category and current_category in owner.manager.category_order:
-            new_index = owner.manager.category_order.index(current_category)
-            owner.tab_notebook.select(new_index)
+        notebook = owner.tab_notebook
+        new_order = owner.manager.category_order
+        new_positions = {name: i for i, name in enumerate(new_order)}
+        current = {notebook.tab(tab_id, "text"): tab_id for tab_id in notebook.tabs()}
+        old_order = list(current)
+
+        removed = [name for name in old_order if name not in new_positions]
+        added = [name for name in new_order if name not in current]
+        removed_set = set(removed)
+        renamed = {}
+        for name in added:
+            position = new_positions[name]
+            if position < len(old_order):
+                old_name = old_order[position]
+                if old_name in removed_set and old_name not in renamed:
+                    renamed[old_name] = name
+
+        # 名前変更
+        for old_name, new_name in renamed.items():
+            tab_id = current.pop(old_name)
+            notebook.tab(tab_id, text=new_name)
+            current[new_name] = tab_id
+            grid = owner.button_widgets.pop(old_name, None)
+            if grid is not None:
+                grid.category = new_name
+                owner.button_widgets[new_name] = grid
+
+        # 削除
+        for name in removed:
+            if name in renamed:
+                continue
+            tab_id = current.pop(name)
+            notebook.forget(tab_id)
+            notebook.nametowidget(tab_id).destroy()
+            owner.button_widgets.pop(name, None)
+            self._pending_tabs.discard(tab_id)
+
+        # 追加（中身は選択時に生成）
+        renamed_to = set(renamed.values())
+        for name in added:
+            if name not in renamed_to:
+                current[name] = str(self.create_tab_for_category(name))
+
+        # 並べ替え（位置が変わったタブのみ移動）
+        for position, name in enumerate(new_order):
+            if notebook.index(current[name]) != position:
+                notebook.insert(position, current[name])
+
+        self.build_selected_tab()
+        return renamed
@@ -0,0 +1,125 @@
+"""
+performance_hud.py
+計測の登録簿（instrumentation）の集計結果を一定間隔で表示するパフォーマンス表示ウィンドウです。
+表示している間だけ計測を有効にするため、閉じている時の計測のコストはほぼありません。
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from src.core.instrumentation import instrumentation
+
+REFRESH_INTERVAL_MS = 500
+# 計測名 -> 表示名（登録されていない計測名はそのまま表示する）
+METRIC_LABELS = {
+    "json.load": "JSON読み込み",
+    "template.replace_variables": "変数の置換",
+    "final_prompt.generate": "完成プロンプトの生成",
+    "element_tree.rebuild": "追加プロンプト一覧の再構築",
+    "one_click.load": "定型文の読み込み",
+    "one_click.save": "定型文の保存（バイト）",
+    "translation.request": "翻訳リクエスト",
+    "translation.cache_hit": "翻訳キャッシュのヒット",
+    "translation.cache_miss": "翻訳キャッシュのミス",
+    "ui.stall": "イベントループの停止",
+}
+COLUMNS = (("count", "回数", 60), ("last", "直近(ms)", 80), ("mean", "平均(ms)", 80),
+           ("max", "最大(ms)", 80), ("amount", "量・値", 220))
+
+
+class PerformanceHud(tk.Toplevel):
+    """
+    PerformanceHud クラスは、計測名ごとの回数・処理時間と、ゲージ（キャッシュのヒット率など）を
+    表形式で表示する小さなウィンドウです。開いている間は計測を有効にします。
+
+    引数:
+      master (tk.Widget): 親ウィジェット
+      on_close (callable): ウィンドウが閉じられた時に呼び出す関数（省略可）
+    """
+
+    def __init__(self, master, on_close=None):
+        """
+        コンストラクタ
+
+        引数:
+          master (tk.Widget): 親ウィジェット
+          on_close (callable): ウィンドウが閉じられた時に呼び出す関数（省略可）
+        """
+        super().__init__(master)
+        self.on_close = on_close
+        self._after_id = None
+        self.title("パフォーマンス")
+        self.transient(master)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in COLUMNS], height=14)
+        self.tree.heading("#0", text="項目")
+        self.tree.column("#0", width=220)
+        for name, label, width in COLUMNS:
+            self.tree.heading(name, text=label)
+            self.tree.column(name, width=width, anchor="e" if name != "amount" else "w")
+        self.tree.pack(fill="both", expand=True, padx=8, pady=(8, 4))
+        ttk.Button(self, text="リセット", command=self.reset).pack(anchor="e", padx=8, pady=(0, 8))
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.bind("<Escape>", lambda _: self.close())
+        instrumentation.enabled = True
+        self.refresh()
+
+    def refresh(self):
+        """
+        集計結果を読み出して表を更新し、次の更新を予約します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        metrics, gauges = instrumentation.snapshot()
+        rows = []
+        for name in sorted(metrics, key=lambda n: METRIC_LABELS.get(n, n)):
+            m = metrics[name]
+            rows.append((METRIC_LABELS.get(name, name), (m["count"], f"{m['last'] * 1000:.2f}",
+                                                         f"{m['mean'] * 1000:.2f}",
+                                                         f"{m['max'] * 1000:.2f}",
+                                                         m["amount"] or "")))
+        for name, value in gauges.items():
+            rows.append((name, ("", "", "", "", value)))
+        # 行の数が変わらない限りは値だけを書き換え、表の作り直しによるちらつきを避ける
+        items = self.tree.get_children()
+        if len(items) != len(rows):
+            if items:
+                self.tree.delete(*items)
+            items = [self.tree.insert("", tk.END) for _ in rows]
+        for item, (label, values) in zip(items, rows):
+            self.tree.item(item, text=label, values=values)
+        self._after_id = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def reset(self):
+        """
+        集計結果を消去します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        instrumentation.reset()
+
+    def close(self):
+        """
+        計測を無効にしてウィンドウを閉じます。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        instrumentation.enabled = False
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        self.destroy()
+        if self.on_close:
+            self.on_close()
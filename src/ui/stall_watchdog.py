@@ -0,0 +1,212 @@
+"""
+stall_watchdog.py
+Tkのイベントループが止まっている（ハンドラーの処理が終わらず画面が固まっている）ことを検出するウォッチドッグです。
+一定間隔で after に登録した処理がどれだけ遅れて実行されたかを測り、遅れがしきい値を超えている間は
+補助スレッドからメインスレッドのスタックを sys._current_frames で採取して、多く現れた関数をログに出力します。
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from src.core.instrumentation import instrumentation
+
+# ウォッチドッグを有効にする環境変数（値はしきい値のミリ秒。app.py の --watchdog でも指定できます）
+WATCHDOG_ENV_VAR = "IPWM_WATCHDOG"
+DEFAULT_THRESHOLD_MS = 100
+DEFAULT_INTERVAL_MS = 50
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+MAX_STACK_DEPTH = 30  # 採取するスタックの深さ（内側から）
+REPORT_FRAMES = 8  # ログに出力する関数の数
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"
+
+
+class StallReport:
+    """
+    StallReport クラスは、1回の停止の長さと、採取したスタックの集計です。
+
+    引数:
+      duration (float): 停止していた時間（秒）
+      samples (int): 採取したスタックの数
+      frames (list): (関数の表示名, 現れたサンプルの数) のリスト（多い順）
+    """
+
+    def __init__(self, duration, samples, frames):
+        self.duration = duration
+        self.samples = samples
+        self.frames = frames
+
+    def format(self):
+        """
+        ログに出力する文字列を作成します。
+
+        戻り値:
+          str: 停止の長さと、多く現れた関数の一覧
+        """
+        lines = [f"Tkイベントループが {self.duration * 1000:.0f} ms 停止しました"
+                 f"（スタックのサンプル {self.samples} 件）"]
+        for label, count in self.frames[:REPORT_FRAMES]:
+            lines.append(f"  {count / self.samples:5.0%}  {label}")
+        return "\n".join(lines)
+
+
+class StallWatchdog:
+    """
+    StallWatchdog クラスは、イベントループの遅れを測り、停止中のメインスレッドのスタックを採取します。
+    after による測定はメインスレッドで、スタックの採取は補助スレッドで行います。
+
+    引数:
+      master (tk.Widget): after を呼び出すウィジェット
+      threshold_ms (int): 停止とみなす遅れ（ミリ秒）
+      interval_ms (int): 遅れを測る間隔（ミリ秒）
+      sample_interval_ms (int): 停止中にスタックを採取する間隔（ミリ秒）
+      on_stall (callable): StallReport を受け取る関数（省略時はログに出力します）
+    """
+
+    def __init__(self,
+                 master,
+                 threshold_ms=DEFAULT_THRESHOLD_MS,
+                 interval_ms=DEFAULT_INTERVAL_MS,
+                 sample_interval_ms=DEFAULT_SAMPLE_INTERVAL_MS,
+                 on_stall=None):
+        """
+        コンストラクタ
+
+        引数:
+          master (tk.Widget): after を呼び出すウィジェット
+          threshold_ms (int): 停止とみなす遅れ（ミリ秒）
+          interval_ms (int): 遅れを測る間隔（ミリ秒）
+          sample_interval_ms (int): 停止中にスタックを採取する間隔（ミリ秒）
+          on_stall (callable): StallReport を受け取る関数（省略可）
+        """
+        self.master = master
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.sample_interval = sample_interval_ms / 1000
+        self.on_stall = on_stall or (lambda report: print(report.format()))
+        self.reports = []
+        self._main_thread_id = None
+        self._expected = 0.0  # 次の測定が実行されるはずの時刻
+        self._samples = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._after_id = None
+
+    def start(self):
+        """
+        ウォッチドッグを開始します（メインスレッドから呼び出してください）。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        if self._thread is not None:
+            return
+        self._main_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._schedule()
+        self._thread = threading.Thread(target=self._sample_loop, name="StallWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        ウォッチドッグを停止します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        self._stop.set()
+        if self._after_id is not None:
+            try:
+                self.master.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _schedule(self):
+        with self._lock:
+            self._expected = time.perf_counter() + self.interval
+        self._after_id = self.master.after(int(self.interval * 1000), self.beat)
+
+    def beat(self):
+        """
+        after から呼び出され、予定からの遅れを測ります。遅れがしきい値を超えていれば報告します。
+
+        引数:
+          なし
+
+        戻り値:
+          なし
+        """
+        now = time.perf_counter()
+        with self._lock:
+            delay = now - self._expected
+            samples = self._samples
+            self._samples = []
+            # 次の予約までの間に採取されたスタックが、次の停止に混ざらないようにする
+            self._expected = now + self.interval
+        if delay >= self.threshold:
+            self.report(delay, samples)
+        if not self._stop.is_set():
+            self._schedule()
+
+    def report(self, delay, samples):
+        """
+        停止を集計し、記録して on_stall に渡します。
+
+        引数:
+          delay (float): 遅れ（秒）
+          samples (list): 採取したスタック（関数の表示名のタプル、外側から内側の順）のリスト
+
+        戻り値:
+          StallReport: 集計結果
+        """
+        counts = Counter()
+        depth = {}  # 関数の表示名 -> 内側からの距離（同数の場合は内側の関数を先に並べる）
+        for stack in samples:
+            for i, label in enumerate(reversed(stack)):
+                if label not in depth or i < depth[label]:
+                    depth[label] = i
+            counts.update(set(stack))
+        frames = sorted(counts.items(), key=lambda item: (-item[1], depth[item[0]]))
+        report = StallReport(delay, len(samples), frames)
+        self.reports.append(report)
+        instrumentation.record("ui.stall", delay, start=time.perf_counter() - delay)
+        self.on_stall(report)
+        return report
+
+    def _sample_loop(self):
+        """
+        補助スレッドで実行され、測定が予定より遅れている間はメインスレッドのスタックを採取します。
+        """
+        while not self._stop.is_set():
+            with self._lock:
+                overdue = time.perf_counter() - self._expected
+            if overdue < self.threshold:
+                # 遅れがしきい値に達する時刻まで待つ
+                self._stop.wait(max(self.sample_interval, self.threshold - overdue))
+                continue
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                del frame
+                with self._lock:
+                    self._samples.append(tuple(reversed(stack)))
+            self._stop.wait(self.sample_interval)
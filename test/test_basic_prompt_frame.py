@@ -119,3 +119,60 @@ def test_on_text_change_event(root, basic_prompts):
     frame.on_text_change(mock_event)
 
     assert on_text_change.called, "on_text_change が呼ばれていません。"
+
+
+def test_update_variable_entries_reuses_widgets(frame):
+    """
+    update_variable_entriesメソッドのテスト
+    変数入力欄のウィジェットが破棄されずに再利用され、余った入力欄が非表示になることを確認します。
+    """
+    frame.update_variable_entries({f"var{i}": f"value{i}" for i in range(120)})
+    entries = dict(frame.variable_entries)
+    canvas = frame._variable_canvas
+
+    frame.update_variable_entries({"subject": "猫"})
+    assert frame._variable_canvas is canvas
+    assert list(frame.variable_entries) == ["subject"]
+    assert frame.variable_entries["subject"] is entries["var0"]
+    assert frame.variable_entries["subject"].get() == "猫"
+    assert not entries["var1"].winfo_manager()
+
+    frame.update_variable_entries({f"var{i}": "" for i in range(120)})
+    assert frame.variable_entries["var119"] is entries["var119"]
+    assert entries["var1"].winfo_manager() == "grid"
+
+
+def test_variable_change_reports_name_and_value(root, basic_prompts):
+    """
+    変数入力欄の値が変わった時だけ、変数名と新しい値が通知されることを確認します。
+    """
+    on_variable_change = MagicMock()
+    frame = BasicPromptFrame(root, basic_prompts, lambda event: None, MagicMock(),
+                             on_variable_change)
+    frame.update_variable_entries({"subject": "猫", "place": "庭"})
+    assert not on_variable_change.called, "初期値の設定で通知されています。"
+
+    entry = frame.variable_entries["place"]
+    entry.delete(0, tk.END)
+    entry.insert(0, "公園")
+    on_variable_change.assert_called_with("place", "公園")
+
+    on_variable_change.reset_mock()
+    frame._variable_pool[1][2].set("公園")
+    assert not on_variable_change.called, "値が変わらない書き込みで通知されています。"
+
+
+def test_derived_variables_are_read_only_and_incremental(root):
+    """
+    派生変数が読み取り専用で表示され、元の変数の変更時に値と通知が更新されることを確認します。
+    """
+    on_variable_change = MagicMock()
+    frame = BasicPromptFrame(root, [], lambda event: None, MagicMock(), on_variable_change)
+    frame.update_variable_entries({"age": 15}, {"age_group": "{?age<20}10代{:}大人{/}"})
+    assert frame.variable_entries["age_group"].get() == "10代"
+    assert frame.variable_entries["age_group"].instate(["readonly"])
+
+    frame.set_variable_values({"age": "40", "age_group": "無視される"})
+    assert frame.variable_entries["age_group"].get() == "大人"
+    on_variable_change.assert_any_call("age", "40")
+    on_variable_change.assert_called_with("age_group", "大人")
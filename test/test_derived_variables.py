@@ -0,0 +1,68 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.derived_variables import DerivedVariables
+from src.core.shuffle_sampler import ShuffleSampler
+
+
+@pytest.fixture
+def derived():
+    """
+    年齢と人物から計算する派生変数を作成するフィクスチャ
+    """
+    return DerivedVariables({
+        "description": "{age_group}の{pronoun}",
+        "age_group": "{?age<20}10代{:}{?age<30}20代{:}大人{/}{/}",
+        "pronoun": "{?character=男性}彼{:}彼女{/}",
+    })
+
+
+def test_evaluate_in_dependency_order(derived):
+    """
+    派生変数が依存の順に計算されることを確認するテスト
+    """
+    assert derived.order.index("age_group") < derived.order.index("description")
+    values = derived.evaluate({"age": "25", "character": "男性"})
+    assert values == {"description": "20代の彼", "age_group": "20代", "pronoun": "彼"}
+
+
+def test_update_recomputes_only_affected(derived):
+    """
+    変数の変更で影響を受ける派生変数だけが計算し直され、値が変わらない場合は伝播しないことを確認するテスト
+    """
+    derived.evaluate({"age": "25", "character": "男性"})
+    assert derived.update("age", "25") == {}
+    assert derived.update("age", "27") == {}
+    assert derived.update("age", "45") == {"age_group": "大人", "description": "大人の彼"}
+    assert derived.update("character", "女性") == {"pronoun": "彼女", "description": "大人の彼女"}
+    assert derived.update("unrelated", "x") == {}
+
+
+def test_cycles_are_not_evaluated():
+    """
+    循環している派生変数と、それに依存する派生変数が計算されずに空文字になることを確認するテスト
+    """
+    derived = DerivedVariables({"a": "{b}", "b": "{a}", "c": "{a}!", "d": "{x}?"})
+    assert derived.cycles == ["a", "b", "c"]
+    assert derived.evaluate({"x": "1"}) == {"a": "", "b": "", "c": "", "d": "1?"}
+    assert derived.update("x", "2") == {"d": "2?"}
+
+
+def test_shuffle_sampler_fills_derived_values():
+    """
+    シャッフルの結果に派生変数の値が含まれることを確認するテスト
+    """
+    basic_prompts = [{
+        "name": "ポートレート",
+        "prompt": "{age_group}の{character}",
+        "default_variables": {"age": "15", "character": "女性"},
+        "derived_variables": {"age_group": "{?age<20}10代{:}大人{/}"}
+    }]
+    sampler = ShuffleSampler(basic_prompts, {}, candidates={"age": ["15", "40"]})
+    for sample in sampler.stream(20, seed=0):
+        expected = "10代" if sample.variables["age"] == "15" else "大人"
+        assert sample.variables["age_group"] == expected
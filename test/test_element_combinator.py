@@ -0,0 +1,115 @@
+import itertools
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.element_combinator import ElementCombinator
+
+
+@pytest.fixture
+def element_prompts():
+    """
+    3カテゴリ×4件の追加プロンプトのデータを返すフィクスチャ
+    """
+    return {
+        "default_subject": "人物",
+        "categories": [{
+            "category": name,
+            "prompt_lists": [{
+                "title": f"{name}{i}",
+                "prompt": f"その{{character}}は、{name}{i}です。"
+            } for i in range(4)]
+        } for name in ("感情表現", "ポーズ", "アクション")]
+    }
+
+
+def brute_force(element_prompts, max_per, exclusive, required, min_total, max_total):
+    """
+    すべての部分集合を作ってから条件で絞り込む（比較用の素朴な実装）
+    """
+    items = [(c, p) for c, category in enumerate(element_prompts["categories"])
+             for p in range(len(category["prompt_lists"]))]
+    names = [category["category"] for category in element_prompts["categories"]]
+    result = []
+    for r in range(len(items) + 1):
+        for combo in itertools.combinations(items, r):
+            per = Counter(names[c] for c, _ in combo)
+            if any(n > max_per for n in per.values()):
+                continue
+            if any(per[name] == 0 for name in required):
+                continue
+            if any(sum(1 for name in group if per[name]) > 1 for group in exclusive):
+                continue
+            if r < min_total or (max_total is not None and r > max_total):
+                continue
+            result.append(list(combo))
+    return result
+
+
+@pytest.mark.parametrize("max_per, exclusive, required, min_total, max_total", [
+    (1, [], [], 1, None),
+    (2, [["感情表現", "ポーズ"]], ["アクション"], 1, None),
+    (3, [["感情表現", "アクション"]], [], 2, 4),
+    (4, [], ["感情表現", "ポーズ"], 0, 3),
+])
+def test_enumeration_matches_brute_force(element_prompts, max_per, exclusive, required,
+                                         min_total, max_total):
+    """
+    列挙結果と総数が、全件を作ってから絞り込んだ結果と一致することを確認するテスト
+    """
+    combinator = ElementCombinator(element_prompts, max_per, exclusive, required, min_total,
+                                   max_total)
+    expected = brute_force(element_prompts, max_per, exclusive, required, min_total, max_total)
+    combinations = list(combinator)
+    assert combinator.count() == len(expected)
+    assert sorted(combinations) == sorted(expected)
+    assert len({tuple(c) for c in combinations}) == len(combinations)
+
+
+def test_impossible_constraints(element_prompts):
+    """
+    条件を満たす組み合わせが無い場合は、総数が0で何も生成されないことを確認するテスト
+    """
+    combinator = ElementCombinator(element_prompts, exclusive=[["感情表現", "ポーズ"]],
+                                   required=["感情表現", "ポーズ"])
+    assert combinator.count() == 0
+    assert list(combinator) == []
+    assert list(combinator.sample(5, seed=1)) == []
+    with pytest.raises(ValueError):
+        ElementCombinator(element_prompts, required=["存在しない"])
+
+
+def test_sample_is_seeded_and_valid(element_prompts):
+    """
+    抽出結果がシードで再現でき、条件を満たす組み合わせだけが一様に近い頻度で選ばれることを確認するテスト
+    """
+    combinator = ElementCombinator(element_prompts, max_per_category=2,
+                                   exclusive=[["感情表現", "ポーズ"]], required=["アクション"])
+    valid = {tuple(c) for c in combinator}
+    first = list(combinator.sample(2000, seed=42))
+    assert first == list(combinator.sample(2000, seed=42))
+    assert all(tuple(c) in valid for c in first)
+
+    counts = Counter(tuple(c) for c in combinator.sample(len(valid) * 200, seed=7))
+    assert set(counts) == valid
+    assert max(counts.values()) < 300 and min(counts.values()) > 120
+
+
+def test_huge_space_is_counted_without_enumeration():
+    """
+    膨大な組み合わせの総数を列挙せずに求め、抽出できることを確認するテスト
+    """
+    data = {"categories": [{
+        "category": f"c{c}",
+        "prompt_lists": [{"title": str(p), "prompt": f"{c}-{p}"} for p in range(100)]
+    } for c in range(30)]}
+    combinator = ElementCombinator(data, max_per_category=2, max_total=10)
+    assert combinator.count() > 10**20
+    for combination in combinator.sample(100, seed=0):
+        assert 1 <= len(combination) <= 10
+        assert max(Counter(c for c, _ in combination).values()) <= 2
+    assert combinator.prompts_of([(0, 1), (2, 3)]) == ["0-1", "2-3"]
@@ -18,10 +18,12 @@ def root():
 
 @pytest.fixture
 def frame(root):
-    return FinalPromptFrame(root)
+    frame = FinalPromptFrame(root)
+    frame.get_translation_cache = MagicMock(return_value=None)
+    return frame
 
 
-@patch('ui.final_prompt_frame.requests.post')
+@patch('requests.post')
 def test_translate_to_english(mock_post, frame):
     """
     DeePL APIを利用して日本語プロンプトを英訳する機能のテスト
@@ -72,7 +74,7 @@ def test_translate_to_english_no_text(mock_showwarning, frame):
     mock_showwarning.assert_called_once_with('警告', '翻訳するプロンプトがありません。')
 
 
-@patch('ui.final_prompt_frame.requests.post')
+@patch('requests.post')
 @patch('ui.final_prompt_frame.messagebox.showerror')
 def test_translate_to_english_request_exception(mock_showerror, mock_post, frame):
     """
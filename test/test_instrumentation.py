@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.instrumentation import Instrumentation, instrumentation, instrumented
+
+
+@pytest.fixture
+def registry():
+    """
+    共有の登録簿を有効にし、テスト後に元の状態へ戻すフィクスチャ
+    """
+    instrumentation.reset()
+    instrumentation.enabled = True
+    yield instrumentation
+    instrumentation.enabled = False
+    instrumentation.reset()
+
+
+def test_disabled_records_nothing():
+    """
+    無効な間は timer・count・デコレーターのいずれも記録しないことを確認するテスト
+    """
+    registry = Instrumentation()
+    with registry.timer("a") as timer:
+        timer.value = 10
+    registry.count("b")
+    assert registry.snapshot() == ({}, {})
+
+
+def test_timer_and_amount():
+    """
+    timer が回数・時間・量を集計することを確認するテスト
+    """
+    registry = Instrumentation()
+    registry.enabled = True
+    for size in (100, 50):
+        with registry.timer("save") as timer:
+            timer.value = size
+    registry.count("hit", 3)
+    metrics, _ = registry.snapshot()
+    assert metrics["save"]["count"] == 2
+    assert metrics["save"]["amount"] == 150
+    assert metrics["save"]["max"] >= metrics["save"]["last"] >= 0
+    assert metrics["hit"]["amount"] == 3
+
+
+def test_instrumented_decorator(registry):
+    """
+    デコレーターが例外の場合も含めて処理時間を記録し、戻り値をそのまま返すことを確認するテスト
+    """
+
+    @instrumented("work")
+    def work(fail=False):
+        if fail:
+            raise ValueError("x")
+        return 42
+
+    assert work() == 42
+    with pytest.raises(ValueError):
+        work(fail=True)
+    instrumentation.enabled = False
+    assert work() == 42
+    assert registry.snapshot()[0]["work"]["count"] == 2
+
+
+def test_gauges_are_evaluated_on_snapshot():
+    """
+    ゲージは集計結果を読み出す時に求められ、Noneの場合は表示されず、例外は文字列になることを確認するテスト
+    """
+    registry = Instrumentation()
+    calls = []
+    registry.gauge("rate", lambda: calls.append(1) or "50%")
+    registry.gauge("hidden", lambda: None)
+    registry.gauge("broken", lambda: 1 / 0)
+    assert calls == []
+    _, gauges = registry.snapshot()
+    assert gauges["rate"] == "50%"
+    assert "hidden" not in gauges
+    assert gauges["broken"].startswith("エラー")
+    registry.reset()
+    assert "rate" in registry.snapshot()[1]
+
+
+def test_template_manager_hot_paths(registry):
+    """
+    テンプレートの読み込みと変数の置換が計測されることを確認するテスト
+    """
+    from src.core.template_manager import TemplateManager
+    settings = os.path.join(os.path.dirname(__file__), '..', 'settings')
+    manager = TemplateManager(os.path.join(settings, "basic_prompts.json"),
+                              os.path.join(settings, "element_prompts.json"))
+    manager.replace_variables("{a}", {"a": "1"})
+    metrics, _ = registry.snapshot()
+    assert metrics["json.load"]["count"] == 2
+    assert metrics["template.replace_variables"]["count"] == 1
+
+
+def test_trace_records_spans_per_thread(tmp_path):
+    """
+    トレース中の区間がスレッドごとに記録され、Chrome のトレース形式で書き出されることを確認するテスト
+    """
+    registry = Instrumentation()
+    registry.start_trace()
+    assert registry.active and not registry.enabled
+    with registry.timer("outer"):
+        with registry.timer("inner") as timer:
+            timer.value = 7
+    worker = threading.Thread(target=lambda: registry.record("worker.save", 0.001),
+                              name="Worker")
+    worker.start()
+    worker.join()
+    path = tmp_path / "trace.json"
+    assert registry.write_trace(str(path))
+    assert not registry.active
+
+    with open(path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert spans["inner"]["args"] == {"amount": 7}
+    assert spans["outer"]["ts"] <= spans["inner"]["ts"]
+    inner, outer = spans["inner"], spans["outer"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert spans["worker.save"]["tid"] != spans["outer"]["tid"]
+    names = {e["tid"]: e["args"]["name"] for e in events if e["name"] == "thread_name"}
+    assert names[spans["worker.save"]["tid"]] == "Worker"
+    # トレースのみの場合、名前ごとの集計は行わない
+    assert registry.snapshot()[0] == {}
+
+
+def test_trace_event_limit():
+    """
+    区間の数が上限を超えた場合は記録せず、記録しなかった数を残すことを確認するテスト
+    """
+    registry = Instrumentation()
+    registry.start_trace()
+    with patch("src.core.instrumentation.MAX_TRACE_EVENTS", 2):
+        for _ in range(5):
+            registry.record("x", 0.0)
+    trace = registry.stop_trace()
+    assert len([e for e in trace["traceEvents"] if e["ph"] == "X"]) == 2
+    assert trace["otherData"] == {"dropped_events": 3}
+    assert registry.stop_trace() is None
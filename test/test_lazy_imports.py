@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from src.core.translator import DeepLTranslator, TranslationError
+
+# 起動時には読み込まない（使う時に初めて読み込む）モジュール
+DEFERRED_MODULES = ["requests", "urllib3", "charset_normalizer", "certifi", "sqlite3", "cProfile",
+                    "subprocess", "src.core.render_cache"]
+
+
+def loaded_modules(statement):
+    """
+    新しいプロセスで statement を実行し、読み込まれた DEFERRED_MODULES の一覧を返します。
+    """
+    code = (f"import sys\n{statement}\n"
+            f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code],
+                            cwd=REPO_ROOT,
+                            capture_output=True,
+                            text=True,
+                            timeout=120)
+    assert result.returncode == 0, result.stderr
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def fake_requests(post):
+    """
+    post だけを持つ requests の代わりのモジュールを作成します。
+    """
+    module = types.ModuleType("requests")
+    module.post = post
+    module.exceptions = types.SimpleNamespace(RequestException=OSError)
+    return module
+
+
+def test_app_import_defers_heavy_modules():
+    """
+    アプリケーションの起動（app の読み込み）で、翻訳やプロファイル用のモジュールが読み込まれないことのテスト
+    """
+    assert loaded_modules("import app") == []
+
+
+def test_translator_import_defers_requests():
+    """
+    translator を読み込んだだけでは requests が読み込まれないことのテスト
+    """
+    assert loaded_modules("import src.core.translator") == []
+
+
+def test_translate_imports_requests_on_first_use():
+    """
+    翻訳した時に初めて requests を読み込んで利用することのテスト
+    """
+    response = MagicMock()
+    response.json.return_value = {"translations": [{"text": "a cat"}]}
+    post = MagicMock(return_value=response)
+    with patch.dict(sys.modules, {"requests": fake_requests(post)}):
+        assert DeepLTranslator("key").translate("猫") == "a cat"
+    post.assert_called_once()
+    assert post.call_args.kwargs["data"]["text"] == "猫"
+
+
+def test_translate_wraps_request_errors():
+    """
+    遅延して読み込んだ requests の例外が TranslationError に変換されることのテスト
+    """
+    post = MagicMock(side_effect=OSError("network down"))
+    with patch.dict(sys.modules, {"requests": fake_requests(post)}):
+        with pytest.raises(TranslationError, match="network down"):
+            DeepLTranslator("key").translate("猫")
@@ -0,0 +1,475 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.core.one_click_manager import DEFAULT_ENTRY_COUNT, OneClickManager
+from src.core.one_click_store import (BODY_CACHE_SIZE, COMPACT_RECORD_LIMIT, LazyEntry,
+                                      SnapshotChangedError, dumps_with_index)
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    """
+    新形式のone_click.jsonを一時ディレクトリに作成し、そのパスを返すフィクスチャです。
+    """
+    path = tmp_path / "one_click.json"
+    data = {
+        "order": ["A", "B"],
+        "entries": {
+            "A": [{
+                "title": f"a{i}",
+                "text": f"text a{i}"
+            } for i in range(DEFAULT_ENTRY_COUNT)],
+            "B": [{
+                "title": "b0",
+                "text": "text b0"
+            }]
+        }
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def manager(json_path):
+    """
+    遅延保存の待ち時間を長めに設定したOneClickManagerを返すフィクスチャです。
+    """
+    manager = OneClickManager(json_path, save_delay=60.0)
+    yield manager
+    manager.close()
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_journal_records(json_path):
+    """
+    ジャーナルの編集レコードを返します（先頭行の世代は除きます）。
+    """
+    with open(json_path + ".journal", "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f][1:]
+
+
+def test_load_pads_entries(manager):
+    """
+    エントリー数が標準数に満たないカテゴリが補完されることを確認します。
+    """
+    assert manager.category_order == ["A", "B"]
+    assert len(manager.one_click_entries["B"]) == DEFAULT_ENTRY_COUNT
+    assert manager.one_click_entries["B"][0]["title"] == "b0"
+
+
+def test_mutations_are_deferred_until_flush(manager, json_path):
+    """
+    連続した変更はすぐには書き込まれず、flushで1回にまとめてジャーナルへ追記されることを確認します。
+    """
+    before = os.path.getmtime(json_path)
+    for i in range(DEFAULT_ENTRY_COUNT - 2):
+        manager.swap_entries("A", i, i + 2)
+    manager.update_entry("A", 1, "new", "new text")
+    assert not os.path.exists(json_path + ".journal")
+    assert manager._writer.pending
+
+    assert manager.flush(timeout=5.0)
+    assert not manager._writer.pending
+    # 個々の編集はジャーナルへの追記のみで、スナップショットは書き換えない
+    assert os.path.getmtime(json_path) == before
+    with open(json_path + ".journal", "r", encoding="utf-8") as f:
+        # 先頭行はジャーナルの世代
+        assert json.loads(f.readline()) == {"journal": 1}
+    assert len(read_journal_records(json_path)) == DEFAULT_ENTRY_COUNT - 1
+
+
+def test_journal_replay_on_load(manager, json_path):
+    """
+    ジャーナルに残った編集が次回読み込み時に再生され、スナップショットへ統合されることを確認します。
+    """
+    manager.update_entry("A", 1, "new", "new text")
+    manager.swap_entries("A", 0, 2)
+    manager.flush()
+
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        assert reloaded.one_click_entries["A"][1] == {"title": "new", "text": "new text"}
+        assert reloaded.one_click_entries["A"][0]["title"] == "a2"
+        assert not os.path.exists(json_path + ".journal")
+        assert read_json(json_path)["entries"]["A"][1]["title"] == "new"
+    finally:
+        reloaded.close()
+
+
+def test_torn_journal_tail_is_ignored(manager, json_path):
+    """
+    書き込み途中で途切れたジャーナルの末尾行が無視されることを確認します。
+    """
+    manager.update_entry("A", 3, "kept", "")
+    manager.flush()
+    with open(json_path + ".journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "update", "category": "A", "ind')
+
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        assert reloaded.one_click_entries["A"][3]["title"] == "kept"
+    finally:
+        reloaded.close()
+
+
+def test_compacted_journal_is_not_replayed(manager, json_path):
+    """
+    スナップショットの置き換え後、ジャーナルの削除前にクラッシュした場合に、
+    統合済みのジャーナルが再生されないことを確認します。
+    """
+    manager.update_entry("A", 0, "A", "")
+    manager.update_entry("A", 1, "B", "")
+    manager.save_one_click_entries()
+    manager.swap_entries("A", 0, 1)
+    manager.add_entries("A", 2)
+    manager.flush()
+    with open(json_path + ".journal", "rb") as f:
+        journal = f.read()
+    manager.save_one_click_entries()
+    # クラッシュでジャーナルが削除されずに残った状態を再現する
+    with open(json_path + ".journal", "wb") as f:
+        f.write(journal)
+
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        assert [e["title"] for e in reloaded.one_click_entries["A"][:2]] == ["B", "A"]
+        assert len(reloaded.one_click_entries["A"]) == DEFAULT_ENTRY_COUNT + 2
+        assert not os.path.exists(json_path + ".journal")
+        # 削除後の編集は新しい世代のジャーナルに記録され、次回読み込み時に再生される
+        reloaded.update_entry("A", 2, "after", "")
+        reloaded.flush()
+    finally:
+        reloaded._writer.close()
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        assert reloaded.one_click_entries["A"][2]["title"] == "after"
+        assert [e["title"] for e in reloaded.one_click_entries["A"][:2]] == ["B", "A"]
+    finally:
+        reloaded.close()
+
+
+def test_snapshot_is_written_atomically(manager, json_path):
+    """
+    スナップショット保存後に一時ファイルが残らず、ジャーナルが空になることを確認します。
+    """
+    manager.update_entry("B", 0, "saved", "")
+    manager.save_one_click_entries()
+    assert read_json(json_path)["entries"]["B"][0]["title"] == "saved"
+    assert not os.path.exists(json_path + ".tmp")
+    assert not os.path.exists(json_path + ".journal")
+
+
+def test_journal_compaction(manager, json_path):
+    """
+    ジャーナルが上限を超えるとスナップショットへ統合されることを確認します。
+    """
+    for i in range(COMPACT_RECORD_LIMIT + 1):
+        manager.update_entry("A", 0, f"t{i}", "")
+        manager.flush()
+    assert manager.store.journal_records < COMPACT_RECORD_LIMIT
+    assert read_json(json_path)["entries"]["A"][0]["title"].startswith("t")
+
+
+def test_corrupt_snapshot_is_preserved(json_path):
+    """
+    壊れたone_click.jsonがデフォルト値で上書きされる前に退避されることを確認します。
+    """
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write('{"order": ["A"], "entr')
+    manager = OneClickManager(json_path, save_delay=60.0)
+    manager.close()
+    assert os.path.exists(json_path + ".corrupt")
+
+
+def test_idle_flush(json_path):
+    """
+    変更が途絶えた後、待ち時間経過で自動的に保存されることを確認します。
+    """
+    manager = OneClickManager(json_path, save_delay=0.05)
+    try:
+        manager.rename_category("B", "C")
+        for _ in range(100):
+            if not manager._writer.pending:
+                break
+            time.sleep(0.05)
+        assert read_journal_records(json_path) == [{"op": "rename", "old": "B", "new": "C"}]
+    finally:
+        manager.close()
+    assert read_json(json_path)["order"] == ["A", "C"]
+
+
+def test_close_flushes_category_changes(manager, json_path):
+    """
+    closeで保留中のカテゴリ追加・削除・並べ替えが保存されることを確認します。
+    """
+    manager.add_category("D")
+    manager.remove_category("B")
+    manager.swap_categories(0, 1)
+    manager.close()
+    data = read_json(json_path)
+    assert data["order"] == ["D", "A"]
+    assert set(data["entries"]) == {"A", "D"}
+
+
+def test_entries_beyond_default_count_are_kept(json_path):
+    """
+    標準数を超えるエントリーが切り捨てられずに読み込まれ、行単位で追加できることを確認します。
+    """
+    data = read_json(json_path)
+    data["entries"]["A"].append({"title": "extra", "text": ""})
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    manager = OneClickManager(json_path, save_delay=60.0, columns=3)
+    try:
+        assert manager.entry_count("A") == DEFAULT_ENTRY_COUNT + 1
+        assert manager.add_entries("A")
+        assert manager.entry_count("A") == DEFAULT_ENTRY_COUNT + 4
+    finally:
+        manager.close()
+    assert len(read_json(json_path)["entries"]["A"]) == DEFAULT_ENTRY_COUNT + 4
+
+
+@pytest.mark.parametrize("columns, current, direction, count, expected", [
+    (2, 0, "down", 20, 2),
+    (2, 18, "down", 20, None),
+    (2, 1, "right", 20, None),
+    (3, 4, "up", 9, 1),
+    (3, 5, "right", 9, None),
+    (3, 3, "left", 9, None),
+    (3, 6, "down", 9, None),
+    (3, 7, "right", 8, None),
+    (4, 10, "down", 100, 14),
+])
+def test_get_target_index_with_columns(json_path, columns, current, direction, count, expected):
+    """
+    列数とエントリー数に応じて矢印キーの移動先が計算されることを確認します。
+    """
+    manager = OneClickManager(json_path, save_delay=60.0, columns=columns)
+    try:
+        assert manager.get_target_index(current, direction, count) == expected
+    finally:
+        manager.close()
+
+
+def test_reload_keeps_valid_selection(manager, json_path):
+    """
+    再読み込みで保留中の変更が失われず、有効な選択状態が維持されることを確認します。
+    """
+    manager.update_entry("A", 2, "edited", "")
+    data = read_json(json_path)
+    data["order"].append("外部追加")
+    data["entries"]["外部追加"] = []
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+    manager.reload()
+    assert manager.category_order == ["A", "B", "外部追加"]
+    assert manager.one_click_entries["A"][2]["title"] == "edited"
+    assert (manager.current_category, manager.current_index) == ("A", 2)
+
+    manager.remove_category("A")
+    manager.get_entry("B", 1)
+    data["order"].remove("B")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    manager.reload()
+    assert manager.current_category is None
+
+
+def test_transaction_persists_once(manager, json_path):
+    """
+    トランザクション内の変更がコミット時にまとめて1回で保存されることを確認します。
+    """
+    with manager.transaction():
+        for i in range(DEFAULT_ENTRY_COUNT):
+            manager.update_entry("A", i, f"t{i}", "")
+        assert not manager._writer.pending
+        assert not manager._pending_records
+    assert manager._writer.pending
+    manager.flush()
+    assert len(read_journal_records(json_path)) == DEFAULT_ENTRY_COUNT
+
+
+def test_transaction_rollback(manager):
+    """
+    トランザクション内で例外が発生した場合、データと選択状態が開始前に戻ることを確認します。
+    """
+    manager.get_entry("A", 1)
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.update_entry("A", 5, "changed", "")
+            manager.remove_category("A")
+            manager.add_category("C")
+            raise RuntimeError("abort")
+    assert manager.category_order == ["A", "B"]
+    assert manager.one_click_entries["A"][5]["title"] == "a5"
+    assert (manager.current_category, manager.current_index) == ("A", 1)
+    assert not manager._pending_records
+    assert not manager._writer.pending
+
+
+def test_import_entries(manager, json_path, tmp_path):
+    """
+    CSV/TSVの取り込みで空きエントリーが埋められ、足りない分が追加されることを確認します。
+    """
+    manager.clear_entries("B")
+    tsv = tmp_path / "snippets.tsv"
+    tsv.write_text("".join(f"t{i}\ttext{i}\n" for i in range(25)), encoding="utf-8")
+    assert manager.import_entries(str(tsv), category="B") == 25
+    assert manager.one_click_entries["B"][24] == {"title": "t24", "text": "text24"}
+    assert manager.entry_count("B") == 26
+
+    csv_path = tmp_path / "snippets.csv"
+    csv_path.write_text('新規,"a,b",本文\nA,x,y\n', encoding="utf-8")
+    assert manager.import_entries(str(csv_path)) == 2
+    assert manager.one_click_entries["新規"][0] == {"title": "a,b", "text": "本文"}
+    assert manager.entry_count("A") == DEFAULT_ENTRY_COUNT + 2
+
+    bad = tmp_path / "bad.csv"
+    bad.write_text("C,x,y\nonly-one-column\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        manager.import_entries(str(bad))
+    assert "C" not in manager.category_order
+
+    manager.close()
+    data = read_json(json_path)
+    assert data["entries"]["B"][24]["title"] == "t24"
+    assert "新規" in data["order"]
+
+
+def test_move_range_keeps_selection(manager, json_path):
+    """
+    範囲移動でエントリーが並べ替えられ、選択中のインデックスが追従することを確認します。
+    """
+    manager.get_entry("A", 1)
+    assert manager.move_range("A", 0, 3, 5)
+    titles = [e["title"] for e in manager.one_click_entries["A"][:9]]
+    assert titles == ["a3", "a4", "a5", "a6", "a7", "a0", "a1", "a2", "a8"]
+    assert manager.current_index == 6
+    assert not manager.move_range("A", 3, 3, 0)
+
+    assert manager.copy_category("A", "A2")
+    assert manager.clear_entries("A", 0, 2)
+    manager.close()
+    data = read_json(json_path)
+    assert data["entries"]["A2"][0]["title"] == "a3"
+    assert data["entries"]["A"][0]["title"] == ""
+    assert data["entries"]["A"][5]["title"] == "a0"
+
+
+def test_dumps_with_index_matches_json_dumps():
+    """
+    索引付きの直列化結果が json.dumps(indent=4) と一致し、索引が本文の位置を指すことを確認します。
+    """
+    data = {
+        "order": ["A", "空", "記号\"\\"],
+        "entries": {
+            "A": [{"title": "t", "text": "改行\nと\"引用\""}, {"title": "", "text": ""}],
+            "空": [],
+            "記号\"\\": [{"title": "x", "text": "😀"}]
+        }
+    }
+    raw, index_entries, _ = dumps_with_index(data)
+    assert raw.decode("utf-8") == json.dumps(data, ensure_ascii=False, indent=4)
+    title, offset, length = index_entries["A"][0]
+    assert title == "t"
+    assert json.loads(raw[offset:offset + length].decode("utf-8")) == "改行\nと\"引用\""
+    empty = b'{\n    "order": [],\n    "entries": {}\n}'
+    assert dumps_with_index({"order": [], "entries": {}})[0] == empty
+
+
+def test_bodies_are_loaded_lazily(manager, json_path):
+    """
+    索引がある場合は本文を読まずに起動し、参照した本文だけがキャッシュされることを確認します。
+    """
+    manager.close()
+    assert os.path.exists(json_path + ".idx")
+
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        entry = reloaded.one_click_entries["A"][3]
+        assert isinstance(entry, LazyEntry)
+        assert entry.title == "a3"
+        assert not reloaded.store._body_cache
+        assert reloaded.get_entry("A", 3)["text"] == "text a3"
+        assert len(reloaded.store._body_cache) == 1
+        for i in range(DEFAULT_ENTRY_COUNT):
+            reloaded.store.read_body(reloaded.one_click_entries["A"][i].body_ref)
+        assert len(reloaded.store._body_cache) <= BODY_CACHE_SIZE
+    finally:
+        reloaded.close()
+
+
+def test_lazy_bodies_survive_compaction(manager, json_path):
+    """
+    未読み込みの本文がスナップショットの書き直し後も正しく読めることを確認します。
+    """
+    manager.close()
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        reloaded.update_entry("A", 0, "長いタイトルに変更", "本文" * 100)
+        reloaded.copy_category("A", "C")
+        reloaded.move_range("A", 1, 4, 10)
+        reloaded.save_one_click_entries()
+        reloaded.store._body_cache.clear()
+        texts = [e["text"] for e in reloaded.one_click_entries["A"]]
+        assert texts[0] == "本文" * 100
+        assert texts[10:13] == ["text a1", "text a2", "text a3"]
+        assert reloaded.one_click_entries["C"][5]["text"] == "text a5"
+    finally:
+        reloaded.close()
+    assert read_json(json_path)["entries"]["A"][12]["text"] == "text a3"
+
+
+def test_stale_index_falls_back_to_full_load(manager, json_path):
+    """
+    one_click.json が外部で編集され索引と一致しない場合は、JSON全体から読み込むことを確認します。
+    """
+    manager.close()
+    data = read_json(json_path)
+    data["entries"]["A"][0]["text"] = "外部で編集"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        assert reloaded.one_click_entries["A"][0]["text"] == "外部で編集"
+    finally:
+        reloaded.close()
+    # 読み込み時に索引が作り直され、次回は索引から読み込める
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        assert isinstance(reloaded.one_click_entries["A"][0], LazyEntry)
+        assert reloaded.one_click_entries["A"][0]["text"] == "外部で編集"
+    finally:
+        reloaded.close()
+
+
+def test_body_of_externally_changed_file_is_not_blank(manager, json_path):
+    """
+    読み込み後に one_click.json が外部で変更された場合、本文を空文字列として返さずに例外を送出し、
+    再読み込み後は変更後の本文を取得できることを確認します。
+    """
+    manager.close()
+    reloaded = OneClickManager(json_path, save_delay=60.0)
+    try:
+        data = read_json(json_path)
+        data["entries"]["A"][2]["text"] = "外部で編集"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        with pytest.raises(SnapshotChangedError):
+            reloaded.get_entry("A", 2)
+        assert reloaded.current_index is None
+        reloaded.reload()
+        assert reloaded.get_entry("A", 2) == {"title": "a2", "text": "外部で編集"}
+    finally:
+        reloaded.close()
@@ -0,0 +1,236 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.core.one_click_manager import (DEFAULT_CATEGORIES, DEFAULT_ENTRY_COUNT,
+                                        OneClickManager)
+from src.core.one_click_store import LazyEntry
+
+
+@pytest.fixture(autouse=True)
+def no_dialogs(monkeypatch):
+    """
+    形式変換時の通知ダイアログを無効化するフィクスチャです。
+    """
+    monkeypatch.setattr("src.core.one_click_manager.messagebox.showinfo", lambda *a: None)
+    monkeypatch.setattr("src.core.one_click_manager.messagebox.showwarning", lambda *a: None)
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def open_manager(json_path):
+    return OneClickManager(str(json_path), save_delay=60.0, backend="sqlite")
+
+
+@pytest.mark.parametrize("data, category", [
+    ({
+        "order": ["X"],
+        "entries": {
+            "X": [{
+                "title": "t",
+                "text": "本文"
+            }]
+        }
+    }, "X"),
+    ({
+        "X": [{
+            "title": "t",
+            "text": "本文"
+        }]
+    }, "X"),
+    ([{
+        "title": "t",
+        "text": "本文"
+    }], DEFAULT_CATEGORIES[0]),
+])
+def test_migration_from_all_json_formats(tmp_path, data, category):
+    """
+    新形式・辞書形式・リスト形式のいずれのJSONからもデータベースへ移行できることを確認します。
+    """
+    json_path = tmp_path / "one_click.json"
+    write_json(json_path, data)
+    manager = open_manager(json_path)
+    manager.close()
+
+    assert os.path.exists(tmp_path / "one_click.db")
+    # JSONを削除してもデータベースから読み込めること
+    os.remove(json_path)
+    manager = open_manager(json_path)
+    try:
+        assert manager.one_click_entries[category][0] == {"title": "t", "text": "本文"}
+        assert len(manager.one_click_entries[category]) == DEFAULT_ENTRY_COUNT
+        # 本文は参照した時にデータベースから読み込む
+        entry = manager.one_click_entries[category][0]
+        assert isinstance(entry, LazyEntry)
+        assert manager.store.read_body(entry.body_ref) == "本文"
+    finally:
+        manager.close()
+
+
+def test_edits_and_reorders_are_persisted(tmp_path):
+    """
+    エントリーの入れ替え・カテゴリの並べ替えがデータベースに反映され、JSONにも書き出されることを確認します。
+    """
+    json_path = tmp_path / "one_click.json"
+    write_json(json_path, {"order": ["A", "B"], "entries": {"A": [{"title": "a0", "text": ""}]}})
+    manager = open_manager(json_path)
+    manager.update_entry("A", 1, "a1", "second")
+    manager.swap_entries("A", 0, 1)
+    manager.add_category("C")
+    manager.swap_categories(0, 2)
+    manager.rename_category("B", "B2")
+    manager.remove_category("A")
+    manager.flush()
+    assert manager.store.read_all()["order"] == ["C", "B2"]
+    manager.close()
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        exported = json.load(f)
+    assert exported["order"] == ["C", "B2"]
+
+    manager = open_manager(json_path)
+    try:
+        assert manager.category_order == ["C", "B2"]
+        assert not manager.store.requires_snapshot
+    finally:
+        manager.close()
+
+
+def test_external_json_edit_is_imported(tmp_path):
+    """
+    書き出し後にJSONが外部で編集された場合、次回読み込み時に取り込まれることを確認します。
+    """
+    json_path = tmp_path / "one_click.json"
+    write_json(json_path, {"order": ["A"], "entries": {"A": []}})
+    open_manager(json_path).close()
+
+    write_json(json_path, {"order": ["外部"], "entries": {"外部": [{"title": "e", "text": ""}]}})
+    os.utime(json_path, (1, 1))
+    manager = open_manager(json_path)
+    try:
+        assert manager.category_order == ["外部"]
+        manager.flush()
+    finally:
+        manager.close()
+    manager = open_manager(json_path)
+    assert manager.store.read_all()["order"] == ["外部"]
+    manager.close()
+
+
+def test_external_edit_keeps_unexported_db_edits(tmp_path, monkeypatch):
+    """
+    JSONへ書き出していない編集がある状態でJSONが外部で編集された場合、
+    データベースの内容を退避して警告することを確認します。
+    """
+    warnings = []
+    monkeypatch.setattr("src.core.one_click_manager.messagebox.showwarning",
+                        lambda *a: warnings.append(a))
+    json_path = tmp_path / "one_click.json"
+    write_json(json_path, {"order": ["A"], "entries": {"A": []}})
+    manager = open_manager(json_path)
+    manager.update_entry("A", 0, "DBのみ", "書き出し前の編集")
+    manager.flush()
+    # 終了処理（書き出し）の前にプロセスが終了した状態を再現する
+    manager._writer.close()
+    manager.store.close()
+
+    write_json(json_path, {"order": ["外部"], "entries": {"外部": []}})
+    os.utime(json_path, (1, 1))
+    manager = open_manager(json_path)
+    try:
+        assert manager.category_order == ["外部"]
+        assert len(warnings) == 1
+        with open(str(json_path) + ".conflict", "r", encoding="utf-8") as f:
+            kept = json.load(f)
+        assert kept["entries"]["A"][0] == {"title": "DBのみ", "text": "書き出し前の編集"}
+    finally:
+        manager.close()
+    # 取り込みと書き出しの後は警告しない
+    manager = open_manager(json_path)
+    manager.close()
+    assert len(warnings) == 1
+
+
+def test_copied_category_does_not_share_rows(tmp_path):
+    """
+    複製したカテゴリの本文が、複製元の行の更新・削除の影響を受けないことを確認します。
+    """
+    json_path = tmp_path / "one_click.json"
+    write_json(json_path, {"order": ["A"], "entries": {"A": [{"title": "a", "text": "元の本文"}]}})
+    open_manager(json_path).close()
+    manager = open_manager(json_path)
+    try:
+        manager.copy_category("A", "B")
+        manager.update_entry("A", 0, "a", "変更後")
+        manager.flush()
+        assert manager.one_click_entries["B"][0]["text"] == "元の本文"
+        manager.remove_category("A")
+        manager.flush()
+        assert manager.one_click_entries["B"][0]["text"] == "元の本文"
+    finally:
+        manager.close()
+
+
+def test_full_text_search(tmp_path):
+    """
+    全文検索でタイトル・本文から該当エントリーが見つかることを確認します。
+    """
+    json_path = tmp_path / "one_click.json"
+    write_json(json_path, {
+        "order": ["A"],
+        "entries": {
+            "A": [{
+                "title": "顔ズームアップ",
+                "text": "顔をアップにしたポートレート"
+            }, {
+                "title": "背景",
+                "text": "夕暮れの海辺"
+            }]
+        }
+    })
+    manager = open_manager(json_path)
+    try:
+        assert manager.search("ポートレート") == [("A", 0, "顔ズームアップ")]
+        assert manager.search("海") == [("A", 1, "背景")]
+        manager.update_entry("A", 2, "追加", "ポートレート写真")
+        assert [r[1] for r in manager.search("ポートレート")] == [0, 2]
+    finally:
+        manager.close()
+
+
+def test_bulk_operations_match_memory(tmp_path):
+    """
+    範囲移動・消去・カテゴリ複製の結果がデータベースとメモリ上で一致することを確認します。
+    """
+    json_path = tmp_path / "one_click.json"
+    write_json(json_path, {
+        "order": ["A"],
+        "entries": {
+            "A": [{
+                "title": f"a{i}",
+                "text": f"本文{i}"
+            } for i in range(DEFAULT_ENTRY_COUNT)]
+        }
+    })
+    manager = open_manager(json_path)
+    try:
+        with manager.transaction():
+            assert manager.move_range("A", 2, 6, 10)
+            assert manager.move_range("A", 12, 16, 0)
+            assert manager.clear_entries("A", 5, 7)
+            assert manager.copy_category("A", "B")
+            assert manager.update_entry("B", 0, "b0", "")
+        manager.flush()
+        stored = manager.store.read_all()
+        assert stored["order"] == manager.category_order
+        assert stored["entries"] == manager.one_click_entries
+        texts = [e["text"] for e in manager.one_click_entries["A"]]
+        assert ("A", texts.index("本文13"), "a13") in manager.search("本文13")
+    finally:
+        manager.close()
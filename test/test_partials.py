@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.partials import PartialRegistry
+from src.core.prompt_composer import PromptComposer
+
+
+@pytest.fixture
+def registry():
+    """
+    部品どうしが読み込み合う部品の一覧を作成するフィクスチャ
+    """
+    return PartialRegistry({
+        "lighting_soft": "柔らかな{light|default:\"自然光\"}",
+        "portrait": "{character}の写真。{>lighting_soft}。",
+        "winter": "{>portrait}雪景色。",
+        "other": "無関係な部品。",
+    })
+
+
+def test_includes_are_flattened(registry):
+    """
+    部品が読み込み時に展開され、変数やフィルターも描画されることを確認するテスト
+    """
+    assert registry.get("winter").render({"character": "猫"}) == "猫の写真。柔らかな自然光。雪景色。"
+    compiled = registry.compile("{>winter}{>missing}")
+    assert compiled.render({"character": "犬", "light": "夕日"}) == \
+        "犬の写真。柔らかな夕日。雪景色。{>missing}"
+    assert compiled.variables == {"character", "light"}
+    assert registry.compile("{>winter}{>missing}") is compiled
+
+
+def test_only_dependents_are_recompiled(registry):
+    """
+    部品の変更時に、その部品に依存するテンプレートだけが変換し直されることを確認するテスト
+    """
+    other = registry.get("other")
+    text = registry.compile("表紙: {>portrait}")
+    unrelated = registry.compile("{>other}")
+    assert registry.dependents("lighting_soft") == {"portrait", "winter"}
+
+    sources = {
+        "lighting_soft": "逆光",
+        "portrait": "{character}の写真。{>lighting_soft}。",
+        "winter": "{>portrait}雪景色。",
+        "other": "無関係な部品。",
+    }
+    assert registry.update(sources) == {"lighting_soft", "portrait", "winter"}
+    assert registry.update(sources) == set()
+    assert registry.get("other") is other
+    assert registry.compile("{>other}") is unrelated
+    assert registry.compile("表紙: {>portrait}") is not text
+    assert registry.get("winter").render({"character": "猫"}) == "猫の写真。逆光。雪景色。"
+
+
+def test_added_partial_resolves_previous_references(registry):
+    """
+    存在しなかった部品が追加された場合、それを参照していたテンプレートが変換し直されることを確認するテスト
+    """
+    assert registry.compile("{>new}").render({}) == "{>new}"
+    sources = {"new": "新しい部品"}
+    assert registry.update(sources) >= {"new"}
+    assert registry.compile("{>new}").render({}) == "新しい部品"
+
+
+def test_cycles_are_detected():
+    """
+    循環している読み込みが検出され、循環の内側の読み込みは展開されずに元の表記で残ることを確認するテスト
+    """
+    registry = PartialRegistry({"a": "A{>b}", "b": "B{>a}", "c": "C{>a}", "self": "S{>self}"})
+    assert sorted(registry.cycles) == [["a", "b"], ["self"]]
+    assert registry.get("a").render({}) == "A{>b}"
+    assert registry.get("b").render({}) == "B{>a}"
+    assert registry.get("c").render({}) == "CA{>b}"
+    assert registry.get("self").render({}) == "S{>self}"
+
+
+def test_composer_uses_registry(registry):
+    """
+    PromptComposer に部品の変換関数を渡すと、部品の更新後に展開結果が変わることを確認するテスト
+    """
+    composer = PromptComposer(compiler=registry.compile)
+    assert composer.compose("{>winter}", {"character": "猫"}, ["{>other}"]) == \
+        "猫の写真。柔らかな自然光。雪景色。\n無関係な部品。"
+    registry.update({"lighting_soft": "逆光", "portrait": "{character}と{>lighting_soft}",
+                     "winter": "{>portrait}", "other": "別の部品"})
+    assert composer.compose("{>winter}", {"character": "猫"}, ["{>other}"]) == "猫と逆光\n別の部品"
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.prompt_composer import PromptComposer
+from src.core.prompt_pipeline import PostProcessPipeline
+from src.core.template_manager import TemplateManager
+
+TEMPLATE = "{age}歳の{character}のポートレート写真です。"
+ELEMENTS = ["その{character}は、笑っています。", "その{character}は、手を広げています。"]
+
+
+@pytest.fixture
+def composer():
+    """
+    テスト用の PromptComposer を作成するフィクスチャ
+    """
+    return PromptComposer()
+
+
+def test_compose_matches_previous_behavior(composer):
+    """
+    組み立て結果が replace_variables を使った従来の処理と一致することを確認するテスト
+    """
+    manager = TemplateManager("basic_prompts.json", "element_prompts.json")
+    variables = {"age": "25", "character": "女性"}
+    expected = (manager.replace_variables(TEMPLATE, variables) + "\n" +
+                manager.replace_variables("\n".join(ELEMENTS), {"character": "猫"}))
+    assert composer.compose(TEMPLATE, variables, ELEMENTS, "猫") == expected
+    assert composer.compose(TEMPLATE, variables) == manager.replace_variables(TEMPLATE, variables)
+
+
+def test_unchanged_stages_are_reused(composer):
+    """
+    入力の変わらない段階は前回の結果が再利用されることを確認するテスト
+    """
+    variables = {"age": "25", "character": "女性"}
+    first = composer.compose(TEMPLATE, variables, ELEMENTS, "猫")
+    assert composer.compose(TEMPLATE, dict(variables), list(ELEMENTS), "猫") is first
+    assert composer.stats == {"basic": [1, 1], "element": [1, 1], "join": [1, 1]}
+
+    text = composer.compose(TEMPLATE, {"age": "30", "character": "女性"}, ELEMENTS, "猫")
+    assert text.startswith("30歳の女性")
+    assert composer.stats["element"] == [2, 1]
+
+
+def test_set_variable_reports_changes(composer):
+    """
+    変数を1つ更新した時に、展開結果が変わるかどうかを返すことを確認するテスト
+    """
+    assert composer.set_variable("age", "20") is True
+    composer.compose(TEMPLATE, {"age": "25", "character": "女性"})
+    assert composer.set_variable("age", "25") is False
+    assert composer.set_variable("unknown", "x") is False
+    assert composer.set_variable("age", "40") is True
+    assert composer.compose(TEMPLATE, {"age": "40", "character": "女性"}).startswith("40歳")
+
+
+def test_compose_batch(composer):
+    """
+    一括生成が1件ずつ組み立てた結果と一致することを確認するテスト
+    """
+    jobs = [(TEMPLATE, {"age": str(age), "character": "女性"}, ELEMENTS[:n], subject)
+            for age in (20, 30) for n in (0, 1, 2) for subject in ("猫", "犬")]
+    expected = [PromptComposer().compose(*job) for job in jobs]
+    assert composer.compose_batch(jobs) == expected
+
+
+def test_set_pipeline_recomposes(composer):
+    """
+    後処理は既定では行わず、後処理を切り替えると同じ入力でも結果を組み立て直すことを確認するテスト
+    """
+    variables = {"age": "20", "character": "女性"}
+    elements = [ELEMENTS[0], ELEMENTS[0]]
+    plain = composer.compose(TEMPLATE, variables, elements, "猫")
+    assert plain.count("笑っています。") == 2
+    composer.set_pipeline(PostProcessPipeline.default())
+    assert composer.compose(TEMPLATE, variables, elements, "猫").count("笑っています。") == 1
+    composer.set_pipeline(None)
+    assert composer.compose(TEMPLATE, variables, elements, "猫") == plain
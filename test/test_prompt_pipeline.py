@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.prompt_composer import PromptComposer
+from src.core.prompt_pipeline import (PostProcessPipeline, collapse_subject, dedupe_sentences,
+                                      make_length_cap, normalize_punctuation)
+
+
+@pytest.fixture
+def pipeline():
+    """
+    標準の後処理を持つパイプラインを作成するフィクスチャ
+    """
+    return PostProcessPipeline.default()
+
+
+def test_dedupe_sentences():
+    """
+    重複した文が削除され、すべて重複していた行は行ごと取り除かれることを確認するテスト
+    """
+    text = "青空です。海です。\nその人物は、笑っています。\nその人物は、笑っています。\n\n青空です。"
+    assert dedupe_sentences(text) == "青空です。海です。\nその人物は、笑っています。\n"
+
+
+def test_normalize_punctuation():
+    """
+    句読点の連続や「、。」、行末の空白、連続する空行が整えられることを確認するテスト
+    """
+    assert normalize_punctuation("写真です。。背景は海です、。  \n\n\n\n終わり！！") == \
+        "写真です。背景は海です。\n\n終わり！"
+
+
+def test_collapse_subject():
+    """
+    同じ主語の書き出しが続く行で、2行目以降の書き出しが省略されることを確認するテスト
+    """
+    text = "その人物は、笑っています。\nその人物は、手を広げています。\nその猫は、眠っています。"
+    assert collapse_subject(text) == "その人物は、笑っています。\n手を広げています。\nその猫は、眠っています。"
+
+
+def test_length_cap_cuts_at_sentence_boundary():
+    """
+    文字数の上限を超えた場合、文の区切りで切り詰められることを確認するテスト
+    """
+    cap = make_length_cap(10)
+    assert cap("短い文です。") == "短い文です。"
+    assert cap("一つ目の文です。二つ目の文です。") == "一つ目の文です。"
+    assert cap("区切りの無いとても長い文") == "区切りの無いとても長"
+
+
+def test_stages_are_memoized_on_input(pipeline):
+    """
+    同じ入力では各段階が再実行されず、段階を置き換えた場合は上流の記憶が使われることを確認するテスト
+    """
+    text = "その人物は、笑っています。\nその人物は、走っています。"
+    first = pipeline.run(text)
+    assert pipeline.run(text) == first
+    timings = pipeline.timings()
+    assert all(t["runs"] == 1 and t["hits"] == 1 for t in timings.values())
+
+    pipeline.add_stage("length_cap", make_length_cap(14))
+    assert pipeline.run(text) == "その人物は、笑っています。"
+    timings = pipeline.timings()
+    assert timings["dedupe"]["hits"] == 2
+    assert timings["length_cap"]["runs"] == 1
+    assert pipeline.remove_stage("length_cap") is True
+    assert pipeline.remove_stage("length_cap") is False
+
+
+def test_composer_applies_pipeline(pipeline):
+    """
+    PromptComposer に設定した後処理が完成プロンプトに適用されることを確認するテスト
+    """
+    composer = PromptComposer(pipeline=pipeline)
+    elements = ["その{character}は、笑っています。"] * 2 + ["その{character}は、座っています。"]
+    assert composer.compose("{a}の写真です。。", {"a": "猫"}, elements, "人物") == \
+        "猫の写真です。\nその人物は、笑っています。\n座っています。"
@@ -0,0 +1,149 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.partials import PartialRegistry
+from src.core.prompt_composer import PromptComposer
+from src.core.prompt_pipeline import PostProcessPipeline
+from src.core.render_cache import BatchRenderer, RenderCache, content_key
+from src.core.wildcards import WildcardLibrary
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """
+    一時ディレクトリにキャッシュファイルを作成するフィクスチャ
+    """
+    cache = RenderCache(str(tmp_path / "cache" / "render_cache.db"))
+    yield cache
+    cache.close()
+
+
+def make_jobs(templates):
+    """
+    基本プロンプト2件 × 主語3件の組み合わせを作成します。
+    """
+    return [(templates[name], {"wear": "コート"}, ["{character}が笑う。"], subject)
+            for name in ("a", "b") for subject in ("少女", "少年", "老人")]
+
+
+class FakeTranslator:
+    """
+    呼ばれた回数を記録する翻訳関数
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return text.upper() + "(en)"
+
+
+def test_content_key_ignores_dict_order():
+    """
+    辞書のキーの順序が違っても同じキーになり、値が違えば別のキーになることを確認するテスト
+    """
+    assert content_key({"a": 1, "b": 2}) == content_key({"b": 2, "a": 1})
+    assert content_key({"a": 1}) != content_key({"a": 2})
+
+
+def test_rerun_only_renders_edited_rows(tmp_path):
+    """
+    テンプレートを1つ編集して一括生成をやり直すと、影響を受けた行だけが描画・翻訳されることを確認するテスト
+    """
+    path = str(tmp_path / "render_cache.db")
+    templates = {"a": "{wear}を着た人。", "b": "{wear}の人。"}
+    translator = FakeTranslator()
+
+    cache = RenderCache(path)
+    first = BatchRenderer(PromptComposer(), cache, translator).run(make_jobs(templates))
+    cache.close()
+    assert len(translator.calls) == 6
+
+    # 別のプロセスで開き直した場合も、編集していない基本プロンプトの行は再利用される
+    templates["b"] = "{wear}を羽織った人。"
+    cache = RenderCache(path)
+    batch = BatchRenderer(PromptComposer(), cache, translator)
+    second = batch.run(make_jobs(templates))
+    assert batch.last_run["reused"] == 3
+    assert batch.last_run["rendered"] == 3
+    assert batch.last_run["translated"] == 3
+    assert second[:3] == first[:3]
+    assert second[3] == ("コートを羽織った人。\n少女が笑う。", "コートを羽織った人。\n少女が笑う。(en)")
+    assert cache.stats()["render"]["hits"] == 3
+    cache.close()
+
+
+def test_key_covers_partials_and_pipeline(cache):
+    """
+    読み込んでいる部品の内容や後処理の構成が変わると、別のキーになることを確認するテスト
+    """
+    partials = PartialRegistry({"light": "柔らかい光"})
+    batch = BatchRenderer(PromptComposer(compiler=partials.compile), cache, partials=partials)
+    key = batch.render_key("{>light}の中で。", {})
+    assert key == batch.render_key("{>light}の中で。", {})
+    partials.update({"light": "強い光"})
+    assert batch.render_key("{>light}の中で。", {}) != key
+    assert batch.run([("{>light}の中で。", {})]) == [("強い光の中で。", None)]
+
+    capped = BatchRenderer(PromptComposer(pipeline=PostProcessPipeline.default(10)), cache)
+    longer = BatchRenderer(PromptComposer(pipeline=PostProcessPipeline.default(20)), cache)
+    assert capped.render_key("テスト", {}) != longer.render_key("テスト", {})
+
+
+def test_wildcards_are_cached_only_with_seed(cache, tmp_path):
+    """
+    ワイルドカードを含む行はシードを指定した場合だけ保存され、候補ファイルの変更で別のキーになることを確認するテスト
+    """
+    directory = tmp_path / "wildcards"
+    directory.mkdir()
+    (directory / "hair.txt").write_text("黒髪\n", encoding="utf-8")
+    composer = PromptComposer(wildcards=WildcardLibrary(str(directory)))
+    batch = BatchRenderer(composer, cache)
+    assert batch.render_key("{__hair__}", {}) is None
+    key = batch.render_key("{__hair__}", {}, (), "", 1)
+    (directory / "hair.txt").write_text("黒髪\n金髪\n", encoding="utf-8")
+    assert batch.render_key("{__hair__}", {}, (), "", 1) != key
+    assert batch.render_key("髪", {}, (), "", 1) is not None
+
+
+def test_eviction_keeps_size_bounded(tmp_path):
+    """
+    容量の上限を超えると、最も長く使われていない項目から削除されることを確認するテスト
+    """
+    cache = RenderCache(str(tmp_path / "render_cache.db"), max_bytes=100)
+    for i in range(5):
+        cache.put("render", f"k{i}", "x" * 30)
+        cache.get("render", "k0")  # k0 は使い続けているため残る
+    stats = cache.stats()
+    assert stats["bytes"] <= 100
+    assert stats["evictions"] > 0
+    assert cache.get("render", "k0") == "x" * 30
+    assert cache.get("render", "k1") is None
+    assert cache.get("render", "k4") == "x" * 30
+    cache.close()
+
+
+def test_failed_translation_keeps_progress(cache):
+    """
+    翻訳が途中で失敗しても、それまでの描画・翻訳結果は保存されていることを確認するテスト
+    """
+    calls = []
+
+    def translate(text):
+        calls.append(text)
+        if len(calls) == 2:
+            raise RuntimeError("network")
+        return "ok"
+
+    jobs = [("一。", {}), ("二。", {}), ("三。", {})]
+    with pytest.raises(RuntimeError):
+        BatchRenderer(PromptComposer(), cache, translate).run(jobs)
+    batch = BatchRenderer(PromptComposer(), cache, translate)
+    assert batch.run(jobs) == [("一。", "ok"), ("二。", "ok"), ("三。", "ok")]
+    assert batch.last_run["translation_reused"] == 1
+    assert batch.last_run["reused"] == 2
@@ -0,0 +1,212 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.core.one_click_manager import OneClickManager
+from src.core.search_index import (KIND_BASIC, KIND_ELEMENT, KIND_ONE_CLICK, LibrarySearch,
+                                   SearchIndex)
+
+
+class StubTemplateManager:
+    """
+    基本・追加プロンプトを返すだけのテンプレートマネージャです。
+    """
+
+    def __init__(self, basic_prompts, element_prompts):
+        self.basic_prompts = basic_prompts
+        self.element_prompts = element_prompts
+
+    def get_basic_prompts(self):
+        return self.basic_prompts
+
+    def get_element_prompts(self):
+        return self.element_prompts
+
+
+@pytest.fixture
+def template_manager():
+    return StubTemplateManager([{
+        "name": "ポートレート",
+        "prompt": "{subject}の顔のアップ",
+        "default_variables": {}
+    }, {
+        "name": "風景",
+        "prompt": "夕暮れの海辺",
+        "default_variables": {}
+    }], {
+        "categories": [{
+            "category": "品質",
+            "prompt_lists": [{
+                "title": "高画質",
+                "prompt": "masterpiece, best quality"
+            }]
+        }]
+    })
+
+
+@pytest.fixture
+def one_click_manager(tmp_path):
+    path = tmp_path / "one_click.json"
+    path.write_text(json.dumps({
+        "order": ["表情"],
+        "entries": {
+            "表情": [{
+                "title": "笑顔",
+                "text": "満面の笑みを浮かべた顔"
+            }]
+        }
+    }, ensure_ascii=False), encoding="utf-8")
+    manager = OneClickManager(str(path), save_delay=60.0)
+    yield manager
+    manager.close()
+
+
+def hit_keys(hits):
+    return [(hit.kind, *hit.key) for hit in hits]
+
+
+def test_search_index_matching():
+    """
+    部分一致・複数語のAND検索・全角半角の同一視と、タイトル一致の優先を確認します。
+    """
+    index = SearchIndex()
+    index.upsert(("a",), "本文だけ", "ここに笑顔がある")
+    index.upsert(("b",), "笑顔の写真", "")
+    index.upsert(("c",), "Best Quality", "ＭＡＳＴＥＲＰＩＥＣＥ")
+    assert [key for key, _, _ in index.search("笑顔")] == [("b",), ("a",)]
+    assert [key for key, _, _ in index.search("顔")] == [("b",), ("a",)]
+    assert [key for key, _, _ in index.search("masterpiece best")] == [("c",)]
+    assert index.search("笑顔 quality") == []
+    assert index.search("  ") == []
+    # 索引語はすべて含むが部分文字列としては一致しない場合
+    assert index.search("顔笑") == []
+
+
+def test_search_index_update_and_remove():
+    """
+    文書の更新・削除が索引に反映され、更新後も登録順が変わらないことを確認します。
+    """
+    index = SearchIndex()
+    index.upsert(("a",), "りんご", "")
+    index.upsert(("b",), "りんごジュース", "")
+    assert not index.upsert(("a",), "りんご", "")
+    index.upsert(("a",), "みかん", "")
+    assert [key for key, _, _ in index.search("りんご")] == [("b",)]
+    index.upsert(("a",), "りんご飴", "")
+    assert [key for key, _, _ in index.search("りんご")] == [("a",), ("b",)]
+    assert index.remove(("b",))
+    assert [key for key, _, _ in index.search("りんご")] == [("a",)]
+    assert len(index) == 1
+
+
+def test_search_index_keys_by_group():
+    """
+    文書キーの一覧を、末尾を除いた部分（定型文のカテゴリ）ごとに取得できることを確認します。
+    """
+    index = SearchIndex()
+    index.upsert((KIND_ONE_CLICK, "a", 0), "りんご", "")
+    index.upsert((KIND_ONE_CLICK, "b", 0), "みかん", "")
+    index.upsert((KIND_ONE_CLICK, "a", 1), "ぶどう", "")
+    index.upsert((KIND_BASIC, 0), "もも", "")
+    assert index.keys((KIND_ONE_CLICK, "a")) == [(KIND_ONE_CLICK, "a", 0), (KIND_ONE_CLICK, "a", 1)]
+    assert index.groups((KIND_ONE_CLICK,)) == [(KIND_ONE_CLICK, "a"), (KIND_ONE_CLICK, "b")]
+    index.remove((KIND_ONE_CLICK, "b", 0))
+    assert index.groups((KIND_ONE_CLICK,)) == [(KIND_ONE_CLICK, "a")]
+    assert len(index.keys()) == 3
+
+
+def test_library_search_covers_all_sources(template_manager, one_click_manager):
+    """
+    基本プロンプト・追加プロンプト・定型文のいずれも検索できることを確認します。
+    """
+    search = LibrarySearch(template_manager, one_click_manager)
+    assert hit_keys(search.search("顔")) == [(KIND_ONE_CLICK, "表情", 0), (KIND_BASIC, 0)]
+    assert hit_keys(search.search("quality")) == [(KIND_ELEMENT, 0, 0)]
+    assert search.search("夕暮れ")[0].label == "風景"
+
+
+def test_library_search_follows_edits(template_manager, one_click_manager):
+    """
+    定型文の編集・並べ替え・カテゴリ操作とテンプレートの再読み込みが索引に反映されることを確認します。
+    """
+    search = LibrarySearch(template_manager, one_click_manager)
+    one_click_manager.update_entry("表情", 3, "泣き顔", "涙を流す")
+    assert hit_keys(search.search("涙")) == [(KIND_ONE_CLICK, "表情", 3)]
+    one_click_manager.swap_entries("表情", 3, 5)
+    assert hit_keys(search.search("涙")) == [(KIND_ONE_CLICK, "表情", 5)]
+    one_click_manager.rename_category("表情", "顔")
+    assert hit_keys(search.search("涙")) == [(KIND_ONE_CLICK, "顔", 5)]
+    one_click_manager.copy_category("顔", "コピー")
+    assert len(search.search("涙")) == 2
+    one_click_manager.remove_category("顔")
+    assert hit_keys(search.search("涙")) == [(KIND_ONE_CLICK, "コピー", 5)]
+    with pytest.raises(RuntimeError):
+        with one_click_manager.transaction():
+            one_click_manager.clear_entries("コピー")
+            assert search.search("涙") == []
+            raise RuntimeError("abort")
+    assert len(search.search("涙")) == 1
+
+    template_manager.basic_prompts = template_manager.basic_prompts[1:]
+    search.refresh_templates()
+    assert hit_keys(search.search("夕暮れ")) == [(KIND_BASIC, 0)]
+    assert search.search("アップ") == []
+
+    search.close()
+    one_click_manager.update_entry("コピー", 0, "追加後", "")
+    assert search.search("追加後") == []
+
+
+def test_query_time_on_large_index():
+    """
+    10万件の索引に対する検索が十分に速いことを確認します（目標は1回10ms未満）。
+    """
+    index = SearchIndex()
+    for i in range(100000):
+        index.upsert(("doc", i), f"タイトル{i}", f"本文{i % 977}の定型文です。品質{i % 13}")
+    queries = ["タイトル12345", "品質7", "本文5の", "定型文", "タイトル", "定型文 品質12", "存在しない語句"]
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    elapsed = (time.perf_counter() - start) / len(queries)
+    assert elapsed < 0.01
+
+
+def test_background_build_does_not_load_bodies(tmp_path, template_manager):
+    """
+    定型文の索引をバックグラウンドで構築し、本文のキャッシュを埋めないことを確認します。
+    構築中に編集されたカテゴリは、最新の内容で索引に反映されます。
+    """
+    path = tmp_path / "one_click.json"
+    path.write_text(json.dumps({
+        "order": [f"カテゴリ{c}" for c in range(3)],
+        "entries": {
+            f"カテゴリ{c}": [{
+                "title": f"見出し{c}-{i}",
+                "text": f"本文{c}-{i}"
+            } for i in range(1500)] for c in range(3)
+        }
+    }, ensure_ascii=False), encoding="utf-8")
+    # 一度保存して索引ファイルを作り、本文を遅延読み込みする状態で開き直す
+    OneClickManager(str(path), save_delay=60.0).close()
+    manager = OneClickManager(str(path), save_delay=60.0)
+    try:
+        search = LibrarySearch(template_manager, manager, background=True)
+        manager.update_entry("カテゴリ1", 7, "編集後", "差し替えた本文")
+        assert search.wait(30)
+        assert not search.building
+        assert hit_keys(search.search("本文2-1499")) == [(KIND_ONE_CLICK, "カテゴリ2", 1499)]
+        assert hit_keys(search.search("差し替えた")) == [(KIND_ONE_CLICK, "カテゴリ1", 7)]
+        assert (KIND_ONE_CLICK, "カテゴリ1", 7) not in hit_keys(search.search("本文1-7", 5000))
+        assert len(search.index.keys((KIND_ONE_CLICK,))) == 4500
+        assert len(manager.store._body_cache) == 0
+
+        manager.remove_category("カテゴリ0")
+        assert search.search("本文0-1") == []
+        search.close()
+    finally:
+        manager.close()
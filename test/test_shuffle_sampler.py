@@ -0,0 +1,87 @@
+import os
+import random
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.shuffle_sampler import AliasTable, ShuffleSampler
+
+
+@pytest.fixture
+def basic_prompts():
+    """
+    テスト用の基本プロンプトのデータを返すフィクスチャ
+    """
+    return [{
+        "name": "ポートレート",
+        "prompt": "{age}歳の{character}の写真です。",
+        "default_variables": {"age": 25, "character": "女性"}
+    }, {
+        "name": "風景",
+        "prompt": "{character}と{location}の風景です。",
+        "default_variables": {"character": "男性", "location": "海"},
+        "weight": 3
+    }]
+
+
+@pytest.fixture
+def element_prompts():
+    """
+    テスト用の追加プロンプトのデータを返すフィクスチャ
+    """
+    return {
+        "default_subject": "人物",
+        "categories": [{
+            "category": name,
+            "prompt_lists": [{"title": f"{name}{i}", "prompt": f"{name}{i}"} for i in range(3)]
+        } for name in ("感情表現", "ポーズ", "空")]
+    }
+
+
+def test_alias_table_follows_weights():
+    """
+    エイリアス表の抽選が重みに比例し、重み0の項目が選ばれないことを確認するテスト
+    """
+    table = AliasTable([1, 0, 3, 4])
+    rng = random.Random(0)
+    counts = Counter(table.draw(rng) for _ in range(80000))
+    assert counts[1] == 0
+    for index, weight in ((0, 1), (2, 3), (3, 4)):
+        assert abs(counts[index] / 80000 - weight / 8) < 0.01
+    with pytest.raises(ValueError):
+        AliasTable([0, 0])
+
+
+def test_stream_is_reproducible(basic_prompts, element_prompts):
+    """
+    同じシードでは同じ組み合わせが生成されることを確認するテスト
+    """
+    sampler = ShuffleSampler(basic_prompts, element_prompts)
+    assert list(sampler.stream(500, seed=3)) == list(sampler.stream(500, seed=3))
+    assert list(sampler.stream(500, seed=3)) != list(sampler.stream(500, seed=4))
+
+
+def test_samples_respect_weights_and_candidates(basic_prompts, element_prompts):
+    """
+    基本プロンプトの重み、変数の候補、カテゴリの重みが抽選に反映されることを確認するテスト
+    """
+    sampler = ShuffleSampler(basic_prompts, element_prompts,
+                             candidates={"location": {"山": 1, "川": 0}},
+                             category_weights={"空": 0}, element_count=2)
+    samples = list(sampler.stream(4000, seed=1))
+    basic = Counter(s.basic_index for s in samples)
+    assert abs(basic[1] / 4000 - 0.75) < 0.03
+    for sample in samples:
+        assert set(sample.variables) == set(basic_prompts[sample.basic_index]["default_variables"])
+        assert sample.variables["character"] in ("女性", "男性")
+        assert sample.variables.get("location", "山") == "山"
+        assert len(sample.element_keys) == 2 and len(set(sample.element_keys)) == 2
+        assert all(c != 2 for c, _ in sample.element_keys)
+        assert sample.element_prompts == [
+            element_prompts["categories"][c]["prompt_lists"][p]["prompt"]
+            for c, p in sample.element_keys
+        ]
+        assert sample.subject == "人物"
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ui.stall_watchdog import StallWatchdog
+
+
+class FakeMaster:
+    """
+    after で登録された処理を保持するだけのウィジェットの代わり
+    """
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, func):
+        self.callbacks.append(func)
+        return len(self.callbacks)
+
+    def after_cancel(self, _):
+        pass
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for func in callbacks:
+            func()
+
+
+def slow_handler(seconds):
+    """
+    イベントループを止める重いハンドラーの代わり
+    """
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stall_is_reported_with_hot_frames():
+    """
+    after の処理が遅れた時に停止として報告され、停止中のスタックに重いハンドラーが現れることを確認するテスト
+    """
+    master = FakeMaster()
+    reports = []
+    watchdog = StallWatchdog(master, threshold_ms=50, interval_ms=10, sample_interval_ms=2,
+                             on_stall=reports.append)
+    watchdog.start()
+    try:
+        slow_handler(0.3)
+        master.run_pending()
+    finally:
+        watchdog.stop()
+    assert len(reports) == 1
+    report = reports[0]
+    assert report.duration >= 0.25
+    assert report.samples > 0
+    labels = [label for label, _ in report.frames]
+    assert any(label.endswith(" slow_handler") for label in labels[:2])
+    assert "slow_handler" in report.format()
+
+
+def test_no_report_when_on_time():
+    """
+    遅れがしきい値未満の場合は報告されないことを確認するテスト
+    """
+    master = FakeMaster()
+    reports = []
+    watchdog = StallWatchdog(master, threshold_ms=200, interval_ms=10, on_stall=reports.append)
+    watchdog.start()
+    try:
+        for _ in range(3):
+            time.sleep(0.02)
+            master.run_pending()
+    finally:
+        watchdog.stop()
+    assert reports == []
+    assert master.callbacks  # 次の測定が予約され続けている
+
+
+def test_report_aggregates_samples():
+    """
+    スタックの集計で、多く現れた関数が先に、同数の場合は内側の関数が先に並ぶことを確認するテスト
+    """
+    watchdog = StallWatchdog(FakeMaster(), on_stall=lambda report: None)
+    samples = [("main", "handler", "post"), ("main", "handler", "dumps"), ("main", "handler")]
+    report = watchdog.report(0.5, samples)
+    assert report.frames[:2] == [("handler", 3), ("main", 3)]
+    assert report.samples == 3
+    assert watchdog.reports == [report]
@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import tkinter as tk
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.bench_startup import create_settings
+from src.core.startup_profiler import REPORT_FILE, StartupProfiler, measure_import_times
+
+# 合成した大きなライブラリでの起動時間の上限（ミリ秒）。環境変数で変更できます
+STARTUP_BUDGET_MS = float(os.environ.get("IPWM_STARTUP_BUDGET_MS", 3000))
+STARTUP_PHASES = ["imports", "tk_root", "settings_dir", "template_manager", "app_settings",
+                  "ui_manager", "app_menu", "first_idle"]
+
+
+def has_display():
+    """
+    Tkのウィンドウを作成できる環境かどうかを返します。
+    """
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        return False
+    return True
+
+
+def test_phases_and_report(tmp_path):
+    """
+    段階ごとの経過時間が計測順に記録され、cProfile の結果と合わせて書き出されることを確認するテスト
+    """
+    profiler = StartupProfiler()
+    profiler.add_phase("imports", 0.25)
+    profiler.start_profile()
+    with profiler.phase("work"):
+        time.sleep(0.01)
+    data = profiler.write(str(tmp_path), import_times=False)
+    assert [p["name"] for p in data["phases"]] == ["imports", "work"]
+    assert data["phases"][1]["ms"] >= 10
+    assert data["total_ms"] == pytest.approx(profiler.total() * 1000)
+    assert os.path.exists(data["cprofile"])
+    with open(tmp_path / REPORT_FILE, encoding="utf-8") as f:
+        assert json.load(f)["total_ms"] == data["total_ms"]
+    assert "work" in profiler.report()
+
+
+def test_disabled_profiler_records_nothing():
+    """
+    無効な場合は段階を記録しないことを確認するテスト
+    """
+    profiler = StartupProfiler(enabled=False)
+    with profiler.phase("work"):
+        pass
+    profiler.add_phase("imports", 1.0)
+    profiler.start_profile()
+    assert profiler.phases == []
+    assert profiler.profile is None
+
+
+def test_measure_import_times():
+    """
+    python -X importtime の結果から、モジュールごとの読み込み時間が累計の長い順に得られることを確認するテスト
+    """
+    modules = measure_import_times("json", limit=5)
+    assert modules
+    assert any(m["module"] == "json" for m in modules)
+    assert modules == sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)
+    with pytest.raises(RuntimeError):
+        measure_import_times("no_such_module_for_test")
+
+
+@pytest.mark.skipif(not has_display(), reason="Tkのウィンドウを作成できない環境です")
+def test_cold_start_budget(tmp_path):
+    """
+    大量の定型文を持つ合成データで新しいプロセスを起動し、最初のアイドルまでの時間が上限以内であることを確認するテスト
+    """
+    create_settings(str(tmp_path), 64, 200)
+    out_dir = tmp_path / "profile"
+    command = [sys.executable, os.path.join(REPO_ROOT, "app.py"),
+               "--profile-startup", str(out_dir), "--exit-after-startup"]
+    subprocess.run(command, cwd=str(tmp_path), check=True, timeout=120)
+    with open(out_dir / REPORT_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    assert [p["name"] for p in data["phases"]] == STARTUP_PHASES
+    assert "imports" in data
+    assert data["total_ms"] < STARTUP_BUDGET_MS, json.dumps(data["phases"], ensure_ascii=False)
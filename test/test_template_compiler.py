@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.template_compiler import compile_template
+from src.core.template_renderer import TemplateRenderer
+
+
+@pytest.mark.parametrize("template, values, expected", [
+    ("{age|int}歳", {"age": "25歳くらい"}, "25歳"),
+    ('{wear|default:"コート"}を着て', {}, "コートを着て"),
+    ('{wear|default:"コート"}を着て', {"wear": ""}, "コートを着て"),
+    ('{wear|default:"コート"}を着て', {"wear": "ドレス"}, "ドレスを着て"),
+    ("{name|strip|upper}", {"name": "  abc "}, "ABC"),
+    ("{name|truncate:3}", {"name": "あいうえお"}, "あいう"),
+    ("{name|upper}", {}, "{name|upper}"),
+    ("{name|unknown}", {"name": "x"}, "{name|unknown}"),
+    ("{age}", {"age": 25}, "25"),
+])
+def test_filters(template, values, expected):
+    """
+    フィルターが順に適用され、値が無い場合や不明なフィルターは元の表記が残ることを確認するテスト
+    """
+    assert compile_template(template).render(values) == expected
+
+
+@pytest.mark.parametrize("values, expected", [
+    ({"background": "海", "time": "朝"}, "写真。背景は海。朝の光。"),
+    ({"background": " ", "time": "夜"}, "写真。背景なし。夜の暗さ。"),
+    ({}, "写真。背景なし。"),
+])
+def test_conditionals(values, expected):
+    """
+    条件分岐（否定・比較・else を含む）が値に応じて描画されることを確認するテスト
+    """
+    template = ("写真。{?background}背景は{background}。{/}{?!background}背景なし。{/}"
+                "{?time=朝}朝の光。{:}{?time!=}{time}の暗さ。{/}{/}")
+    assert compile_template(template).render(values) == expected
+
+
+def test_malformed_tags_are_left_intact():
+    """
+    閉じていない条件や対応の無い閉じタグは元の表記のまま残ることを確認するテスト
+    """
+    assert compile_template("{?a}あ{b}").render({"a": "x", "b": "い"}) == "{?a}あい"
+    assert compile_template("{/}と{:}と{?}").render({}) == "{/}と{:}と{?}"
+    assert compile_template("{?a}あ{:}い").render({}) == "{?a}あ{:}い"
+
+
+def test_compiled_templates_are_cached():
+    """
+    同じテンプレートの変換結果が再利用されることを確認するテスト
+    """
+    template = "{?x}{x|upper}{/}-{y}"
+    compiled = compile_template(template)
+    assert compile_template(template) is compiled
+    assert compiled.variables == {"x", "y"}
+
+
+def test_renderer_updates_only_dependent_segments():
+    """
+    条件分岐を含むテンプレートでも、変数の変更が差分で反映されることを確認するテスト
+    """
+    renderer = TemplateRenderer("{name}さん{?title}（{title}）{/}", {"name": "田中", "title": ""})
+    assert renderer.text == "田中さん"
+    assert renderer.set_variable("title", "部長") is True
+    assert renderer.text == "田中さん（部長）"
+    assert renderer.set_variable("title", " ") is True
+    assert renderer.text == "田中さん"
+    assert renderer.placeholders == ["name", "title"]
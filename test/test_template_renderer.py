@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.template_manager import TemplateManager
+from src.core.template_renderer import TemplateRenderer
+
+
+@pytest.fixture
+def renderer():
+    """
+    テスト用のテンプレート展開オブジェクトを作成するフィクスチャ
+    """
+    return TemplateRenderer("{subject}が{place}で{subject}を見る", {"subject": "猫", "place": "庭"})
+
+
+def test_render_matches_replace_variables(renderer):
+    """
+    展開結果が TemplateManager.replace_variables と一致することを確認するテスト
+    """
+    manager = TemplateManager("basic_prompts.json", "element_prompts.json")
+    template = renderer.template
+    variables = {"subject": "猫", "place": "庭"}
+    assert renderer.text == manager.replace_variables(template, variables)
+    assert renderer.placeholders == ["subject", "place"]
+
+
+def test_set_variable_updates_only_changed_slots(renderer):
+    """
+    変数を1つ変えるとその箇所（複数回の出現を含む）だけが書き換わることを確認するテスト
+    """
+    assert renderer.set_variable("subject", "犬") is True
+    assert renderer.text == "犬が庭で犬を見る"
+    assert renderer.set_variable("place", "公園") is True
+    assert renderer.text == "犬が公園で犬を見る"
+
+
+def test_noop_changes_are_dropped(renderer):
+    """
+    値が変わらない場合やテンプレートに無い変数の場合はFalseを返すことを確認するテスト
+    """
+    text = renderer.text
+    assert renderer.set_variable("subject", "猫") is False
+    assert renderer.set_variable("unknown", "値") is False
+    assert renderer.update({"subject": "猫", "place": "庭"}) is False
+    assert renderer.text is text
+
+
+def test_missing_variables_are_left_intact():
+    """
+    値の無いプレースホルダは元の表記のまま残ることを確認するテスト
+    """
+    renderer = TemplateRenderer("{a}と{b}、{}は対象外")
+    assert renderer.text == "{a}と{b}、{}は対象外"
+    renderer.set_variable("a", "りんご")
+    assert renderer.text == "りんごと{b}、{}は対象外"
@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.prompt_composer import PromptComposer
+from src.core.template_manager import TemplateManager
+from src.core.wildcards import WildcardLibrary
+
+
+@pytest.fixture
+def library(tmp_path):
+    """
+    候補ファイルを置いたワイルドカードのフォルダを作成するフィクスチャ
+    """
+    (tmp_path / "hair.txt").write_text("\ufeff黒髪\n# コメント\n\n  茶髪  \n金髪\n", encoding="utf-8")
+    (tmp_path / "look.txt").write_text("{__hair__}の人物\n", encoding="utf-8")
+    return WildcardLibrary(str(tmp_path))
+
+
+def test_index_skips_comments_and_blank_lines(library):
+    """
+    空行とコメント行が候補から除かれ、BOMと前後の空白が取り除かれることを確認するテスト
+    """
+    wildcard_file = library.get("hair")
+    assert len(wildcard_file) == 3
+    assert [wildcard_file.line(i) for i in range(3)] == ["黒髪", "茶髪", "金髪"]
+    assert library.names() == ["hair", "look"]
+    assert library.get("missing") is None
+
+
+def test_resolve_is_seeded(library):
+    """
+    同じシードでは同じ結果になり、ワイルドカードごとに別々に選ばれることを確認するテスト
+    """
+    text = "{__hair__}と{__hair__}、{__missing__}、{name}"
+    results = {library.resolve(text, random.Random(seed)) for seed in range(50)}
+    assert library.resolve(text, random.Random(3)) == library.resolve(text, random.Random(3))
+    assert all(r.endswith("、{__missing__}、{name}") for r in results)
+    assert {r.split("と")[0] for r in results} == {"黒髪", "茶髪", "金髪"}
+    assert "茶髪と金髪、{__missing__}、{name}" in results
+    assert library.resolve("{__look__}", random.Random(0)).endswith("髪の人物")
+
+
+def test_file_changes_invalidate_index(library, tmp_path):
+    """
+    候補ファイルが更新された場合に索引が作り直されることを確認するテスト
+    """
+    first = library.get("hair")
+    assert library.get("hair") is first
+    path = tmp_path / "hair.txt"
+    path.write_text("白髪\n", encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    assert library.resolve("{__hair__}", random.Random(0)) == "白髪"
+    path.unlink()
+    assert library.resolve("{__hair__}", random.Random(0)) == "{__hair__}"
+
+
+def test_template_manager_and_composer_resolve_wildcards(library, tmp_path):
+    """
+    TemplateManager.render と PromptComposer がシード付きでワイルドカードを置換することを確認するテスト
+    """
+    manager = TemplateManager("basic_prompts.json", "element_prompts.json")
+    manager.wildcards = library
+    text = manager.render("{age}歳、{__hair__}", {"age": "20"}, seed=5)
+    assert text == manager.render("{age}歳、{__hair__}", {"age": "20"}, seed=5)
+    assert text.split("、")[1] in ("黒髪", "茶髪", "金髪")
+
+    composer = PromptComposer(wildcards=library)
+    jobs = [("{__hair__}の写真", {}, ["その{character}は{__hair__}です。"], "人物", seed)
+            for seed in range(20)]
+    assert composer.compose_batch(jobs) == PromptComposer(wildcards=library).compose_batch(jobs)
+    assert "{__" not in "".join(composer.compose_batch(jobs))